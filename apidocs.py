@@ -0,0 +1,130 @@
+"""Documentación Swagger (``/apidocs`` y ``/apispec_1.json``).
+
+flasgger es de lo más caro de importar (arrastra jsonschema, yaml y
+mistune) y el spec se construye leyendo el YAML de los docstrings de cada
+vista. Nada de eso hace falta para servir la API, así que según
+``APIDOCS_MODE`` se hace en un momento u otro:
+
+- ``lazy`` (por defecto): la app arranca sin flasgger. La primera petición
+  a una ruta de la documentación crea aparte una app Flask con las mismas
+  rutas y Swagger, que atiende desde entonces esas URLs.
+- ``eager``: Swagger se monta al crear la app, como antes.
+- ``frozen``: ``/apispec_1.json`` se sirve desde el fichero generado en el
+  despliegue con ``flask --app application export-apispec`` (ver
+  ``APISPEC_PATH``), con cabeceras de caché largas. Los workers no parsean
+  YAML; la interfaz de ``/apidocs`` se sigue montando bajo demanda.
+- ``off``: sin documentación.
+"""
+import hashlib
+import json
+import threading
+
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+
+
+# Rutas que registra flasgger con su configuración por defecto
+DOCS_PATHS = ("/apidocs", "/apispec_", "/flasgger_static/", "/oauth2-redirect.html")
+
+
+def init_apidocs(app, template):
+    mode = app.config["APIDOCS_MODE"]
+    if mode == "eager":
+        from flasgger import Swagger
+
+        Swagger(app, template=template)
+    elif mode == "lazy":
+        app.wsgi_app = LazyApiDocs(app.wsgi_app, lambda: build_docs_app(app, template))
+    elif mode == "frozen":
+        serve_frozen_spec(app)
+        ui_paths = tuple(p for p in DOCS_PATHS if p != "/apispec_")
+        app.wsgi_app = LazyApiDocs(
+            app.wsgi_app, lambda: build_docs_app(app, template), ui_paths
+        )
+    elif mode != "off":
+        raise ValueError(f"APIDOCS_MODE desconocido: {mode!r}")
+
+
+def build_docs_app(app, template):
+    """App con las mismas rutas que ``app`` y Swagger montado."""
+    from flasgger import Swagger
+
+    docs = Flask(app.import_name)
+    docs.config.update(app.config)
+    for blueprint in app.blueprints.values():
+        docs.register_blueprint(blueprint)
+    CORS(docs)
+    Swagger(docs, template=template)
+    return docs
+
+
+def export_spec(app, template, path):
+    """Genera el spec a partir de los docstrings y lo guarda en ``path``."""
+    docs = build_docs_app(app, template)
+    spec = docs.test_client().get("/apispec_1.json").get_json()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(spec, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return spec
+
+
+def serve_frozen_spec(app):
+    """
+    Sirve ``/apispec_1.json`` desde el fichero de ``APISPEC_PATH``, leído en
+    la primera petición (no al crear la app: ``export-apispec`` tiene que
+    poder cargarla antes de que exista). Se responde con ETag del contenido
+    y ``Cache-Control`` de ``APISPEC_MAX_AGE`` segundos; mientras falte el
+    fichero, con 503.
+    """
+    path = app.config["APISPEC_PATH"]
+    max_age = app.config["APISPEC_MAX_AGE"]
+    frozen = {}
+
+    def apispec():
+        if not frozen:
+            try:
+                with open(path, "rb") as f:
+                    body = f.read()
+            except FileNotFoundError:
+                app.logger.error(
+                    "No existe %s; genéralo con 'flask --app application export-apispec'", path
+                )
+                return jsonify({"msg": "API spec not available"}), 503
+            frozen.update(body=body, etag=hashlib.sha1(body).hexdigest())
+
+        response = app.response_class(frozen["body"], mimetype="application/json")
+        response.set_etag(frozen["etag"])
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        return response.make_conditional(request)
+
+    app.add_url_rule("/apispec_1.json", "apispec_1", apispec)
+
+
+class LazyApiDocs:
+    """
+    Middleware WSGI que manda las rutas de la documentación a una app que
+    se construye en la primera petición; el resto va a la app principal.
+
+    Flask no admite registrar rutas después de la primera petición, por eso
+    la documentación vive en su propia app en lugar de añadirse a la
+    principal.
+    """
+
+    def __init__(self, wsgi_app, build, paths=DOCS_PATHS):
+        self.wsgi_app = wsgi_app
+        self.build = build
+        self.paths = paths
+        self._docs = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith(self.paths):
+            return self.docs()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+    def docs(self):
+        if self._docs is None:
+            with self._lock:
+                if self._docs is None:
+                    self._docs = self.build()
+        return self._docs
@@ -1,61 +1,339 @@
 import os
-from datetime import datetime
+import threading
+import weakref
+from datetime import timedelta
 
-from flask import Flask, jsonify, request, render_template
+import click
+from flask import Blueprint, Flask, Response, current_app, has_app_context, jsonify, request, render_template
 from flask_jwt_extended import (
     create_access_token,
+    create_refresh_token,
     get_jwt_identity,
     jwt_required,
     JWTManager,
 )
-from flasgger import Swagger
 from flask_cors import CORS
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 import pymongo
-import bcrypt
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from apidocs import export_spec, init_apidocs
+from centers_cache import CentersSnapshot, bump_centers_version
+from compression import init_compression
+from etags import conditional
+from json_provider import init_json
+from metrics import init_metrics, mongo_listeners
+from migrations import ensure_all_indexes
+from passwords import HasherBusy, PasswordHasher
+from patients_import import FORMATS, import_patients
+from rate_limit import MemoryBuckets, MongoBuckets, RateLimited, RateLimiter, parse_limits, rate_limited
+from services import (
+    DATE_FIELDS,
+    DATE_PROJECTION,
+    DATE_SORT,
+    LIVE,
+    PROFILE_FIELDS,
+    PROFILE_PROJECTION,
+    InvalidRequest,
+    availability_payload,
+    booking_doc,
+    booking_write,
+    bulk_booking_payload,
+    bulk_cancel_query,
+    cancel_filter,
+    cancelled_query,
+    collided_indexes,
+    day_bounds,
+    format_date,
+    format_dates,
+    occupancy_batch,
+    occupancy_write,
+    page_payload,
+    page_projection,
+    parse_batch_size,
+    parse_bulk,
+    parse_day,
+    parse_fields,
+    parse_page,
+    parse_range,
+    parse_registration,
+    parse_slot,
+    plan_bookings,
+    range_query,
+    wants_ndjson,
+    week_bounds,
+)
+from slow_queries import SlowQueryLog
+from synthetic_data import check_capacity, default_centers, generate
+from versions import bump_version, read_version, user_key, user_tag
 
 
-app = Flask(__name__)
+api = Blueprint("api", __name__, cli_group=None)
 
-CORS(app)
+SWAGGER_TEMPLATE = {
+    "swagger": "2.0",
+    "info": {
+        "title": "API de Clínica",
+        "description": "Documentación de la API para agendar citas",
+        "version": "0.0.1",
+    },
+    "securityDefinitions": {
+        "Bearer": {
+            "type": "apiKey",
+            "name": "Authorization",
+            "in": "header",
+            "description": "Añade 'Bearer <tu_token>' para autenticación",
+        }
+    },
+    "security": [{"Bearer": []}],
+}
+
+
+def default_config():
+    """Configuración por defecto, leída de las variables de entorno."""
+    env = os.environ.get
+    return {
+        "JWT_SECRET_KEY": "misuperclavedeldestinofinal",
+        "JWT_ACCESS_TOKEN_EXPIRES": timedelta(seconds=int(env("JWT_ACCESS_TOKEN_EXPIRES", "900"))),
+        "JWT_REFRESH_TOKEN_EXPIRES": timedelta(
+            seconds=int(env("JWT_REFRESH_TOKEN_EXPIRES", str(30 * 24 * 3600)))
+        ),
+        "MAX_PAGE_SIZE": int(env("MAX_PAGE_SIZE", "100")),
+        "MAX_BULK_SIZE": int(env("MAX_BULK_SIZE", "50")),
+        "STREAM_BATCH_SIZE": int(env("STREAM_BATCH_SIZE", "500")),
+        "MAX_STREAM_BATCH_SIZE": int(env("MAX_STREAM_BATCH_SIZE", "10000")),
+        # Mongo: el cliente se crea en cada proceso en el primer uso
+        "MONGODB_URI": env("MONGODB_URI", "mongodb://localhost:27017/"),
+        "MONGODB_DB": env("MONGODB_DB", "Clinica"),
+        "MONGO_MAX_POOL_SIZE": int(env("MONGO_MAX_POOL_SIZE", "100")),
+        "MONGO_MIN_POOL_SIZE": int(env("MONGO_MIN_POOL_SIZE", "0")),
+        "MONGO_WAIT_QUEUE_TIMEOUT_MS": int(env("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0")) or None,
+        "MONGO_SERVER_SELECTION_TIMEOUT_MS": int(env("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000")),
+        "MONGO_CONNECT_TIMEOUT_MS": int(env("MONGO_CONNECT_TIMEOUT_MS", "20000")),
+        # bcrypt en un pool acotado (ver passwords); BCRYPT_ROUNDS=4 para tests
+        "BCRYPT_ROUNDS": int(env("BCRYPT_ROUNDS", "12")),
+        "BCRYPT_POOL_SIZE": int(env("BCRYPT_POOL_SIZE", "0")) or None,
+        "BCRYPT_QUEUE_SIZE": int(env("BCRYPT_QUEUE_SIZE", "32")),
+        "BCRYPT_QUEUE_TIMEOUT": float(env("BCRYPT_QUEUE_TIMEOUT", "2")),
+        # Codificador JSON de las respuestas: orjson o stdlib (ver json_provider)
+        "JSON_PROVIDER": env("JSON_PROVIDER", "orjson"),
+        # Compresión gzip/brotli de las respuestas (ver compression)
+        "COMPRESS_ENABLED": env("COMPRESS_ENABLED", "1") == "1",
+        "COMPRESS_MIN_SIZE": int(env("COMPRESS_MIN_SIZE", "1024")),
+        "COMPRESS_LEVEL": int(env("COMPRESS_LEVEL", "6")),
+        "COMPRESS_BR_LEVEL": int(env("COMPRESS_BR_LEVEL", "4")),
+        "COMPRESS_MIMETYPES": ("application/json", "application/x-ndjson", "text/html", "text/plain"),
+        # Métricas en /metrics (ver metrics)
+        "METRICS_ENABLED": env("METRICS_ENABLED", "1") == "1",
+        # Límite de peticiones (ver rate_limit); backend memory o mongo
+        "RATE_LIMIT_ENABLED": env("RATE_LIMIT_ENABLED", "1") == "1",
+        "RATE_LIMIT_BACKEND": env("RATE_LIMIT_BACKEND", "memory"),
+        # Proxies de confianza delante de la app (X-Forwarded-For); 0 = ninguno
+        "PROXY_COUNT": int(env("PROXY_COUNT", "0")),
+        "RATE_LIMITS": {
+            "login": parse_limits(env("RATE_LIMIT_LOGIN", "ip:30/minute,username:10/minute")),
+            "register": parse_limits(env("RATE_LIMIT_REGISTER", "ip:10/minute")),
+        },
+        # Consultas más lentas que SLOW_QUERY_MS se registran (0 = desactivado)
+        "SLOW_QUERY_MS": float(env("SLOW_QUERY_MS", "100")),
+        "SLOW_QUERY_EXPLAIN_RATE": float(env("SLOW_QUERY_EXPLAIN_RATE", "0.1")),
+        # Swagger: lazy, eager, frozen u off (ver apidocs)
+        "APIDOCS_MODE": env("APIDOCS_MODE", "lazy"),
+        "APISPEC_PATH": env("APISPEC_PATH", os.path.join(os.path.dirname(__file__), "apispec.json")),
+        "APISPEC_MAX_AGE": int(env("APISPEC_MAX_AGE", "86400")),
+        # Centros en memoria (ver centers_cache)
+        "CENTERS_TTL": float(env("CENTERS_TTL", "300")),
+        "CENTERS_POLL_INTERVAL": float(env("CENTERS_POLL_INTERVAL", "5")),
+        "CENTERS_CHANGE_STREAM": env("CENTERS_CHANGE_STREAM", "1") == "1",
+    }
 
-app.config["JWT_SECRET_KEY"] = "misuperclavedeldestinofinal"
 
-jwt = JWTManager(app)
-swagger = Swagger(
-    app,
-    template={
-        "swagger": "2.0",
-        "info": {
-            "title": "API de Clínica",
-            "description": "Documentación de la API para agendar citas",
-            "version": "0.0.1",
-        },
-        "securityDefinitions": {
-            "Bearer": {
-                "type": "apiKey",
-                "name": "Authorization",
-                "in": "header",
-                "description": "Añade 'Bearer <tu_token>' para autenticación",
-            }
-        },
-        "security": [{"Bearer": []}],
-    },
-)
+def create_app(config=None):
+    """
+    Crea la app Flask con la configuración por defecto más ``config``.
+
+    No abre conexiones: el cliente de Mongo se crea en cada proceso la
+    primera vez que se usa (ver get_client), así que la app se puede
+    cargar en el proceso maestro de un servidor pre-fork (gunicorn
+    --preload) sin compartir sockets con los workers.
+    """
+    app = Flask(__name__)
+    app.config.update(default_config())
+    app.config.update(config or {})
+
+    init_json(app)
+    CORS(app)
+    JWTManager(app)
+    app.register_blueprint(api)
+    init_apidocs(app, SWAGGER_TEMPLATE)
+    init_metrics(app)
+    init_compression(app)
+    if app.config["PROXY_COUNT"]:
+        # IP y esquema del cliente, no los del proxy (ver rate_limit)
+        proxies = app.config["PROXY_COUNT"]
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies)
+
+    app.extensions["clinica"] = ProcessResources(app)
+    return app
+
+
+# ================== RECURSOS DEL PROCESO ==================
+class ProcessResources:
+    """
+    Recursos de una app en el proceso actual: clientes de Mongo (el
+    síncrono y el asíncrono de ``asgi``), pool de bcrypt, snapshot de
+    centros, registro de consultas lentas y límite de peticiones.
+
+    Cada app creada con create_app tiene los suyos en
+    ``app.extensions["clinica"]``, configurados con su propia configuración,
+    así que crear otra app (p. ej. en los tests) no toca la del módulo. Tras
+    un fork se reinician todos (ver reset_process_state).
+    """
+
+    def __init__(self, app):
+        config = app.config
+        listeners = mongo_listeners() if config["METRICS_ENABLED"] else []
+        self.slow_query_log = SlowQueryLog(
+            lambda: get_client(app),
+            threshold_ms=config["SLOW_QUERY_MS"],
+            explain_rate=config["SLOW_QUERY_EXPLAIN_RATE"],
+        )
+        if config["SLOW_QUERY_MS"] > 0:
+            listeners.append(self.slow_query_log)
+
+        self.mongo_settings = dict(
+            uri=config["MONGODB_URI"],
+            db=config["MONGODB_DB"],
+            maxPoolSize=config["MONGO_MAX_POOL_SIZE"],
+            minPoolSize=config["MONGO_MIN_POOL_SIZE"],
+            waitQueueTimeoutMS=config["MONGO_WAIT_QUEUE_TIMEOUT_MS"],
+            serverSelectionTimeoutMS=config["MONGO_SERVER_SELECTION_TIMEOUT_MS"],
+            connectTimeoutMS=config["MONGO_CONNECT_TIMEOUT_MS"],
+            event_listeners=listeners,
+        )
+        self.client = None
+        self.async_client = None
+        self.client_lock = threading.Lock()
+
+        self.password_hasher = PasswordHasher(
+            rounds=config["BCRYPT_ROUNDS"],
+            pool_size=config["BCRYPT_POOL_SIZE"] or os.cpu_count() or 1,
+            queue_size=config["BCRYPT_QUEUE_SIZE"],
+            queue_timeout=config["BCRYPT_QUEUE_TIMEOUT"],
+        )
+        self.centers_snapshot = CentersSnapshot(
+            lambda: get_db(app),
+            ttl=config["CENTERS_TTL"],
+            poll_interval=config["CENTERS_POLL_INTERVAL"],
+            change_stream=config["CENTERS_CHANGE_STREAM"],
+        )
+        if config["RATE_LIMIT_BACKEND"] == "mongo":
+            self.rate_limiter = RateLimiter(MongoBuckets(lambda: get_db(app)))
+        else:
+            self.rate_limiter = RateLimiter(MemoryBuckets())
+
+        _all_resources.add(self)
+
+    def reset(self):
+        """
+        Olvida los recursos heredados del proceso padre tras un fork.
+
+        MongoClient no es fork-safe y los hilos (pool de bcrypt, change
+        stream de centros) no sobreviven al fork: el worker crea los suyos
+        en el primer uso.
+        """
+        self.client = None
+        self.async_client = None
+        # Otro hilo del padre podía tenerlo cogido al hacer el fork
+        self.client_lock = threading.Lock()
+        self.password_hasher.reset()
+        self.centers_snapshot.reset()
+        self.slow_query_log.reset()
+        self.rate_limiter.reset()
+
+
+_all_resources = weakref.WeakSet()
+
+
+def resources(flask_app=None):
+    """Recursos de ``flask_app``; por defecto, los de la app en curso o los de ``app``."""
+    if flask_app is None:
+        flask_app = current_app._get_current_object() if has_app_context() else app
+    return flask_app.extensions["clinica"]
+
+
+# Los recursos de la app en curso, con los nombres que usan las vistas
+password_hasher = LocalProxy(lambda: resources().password_hasher)
+centers_snapshot = LocalProxy(lambda: resources().centers_snapshot)
+slow_query_log = LocalProxy(lambda: resources().slow_query_log)
+rate_limiter = LocalProxy(lambda: resources().rate_limiter)
+
+
+def get_client(flask_app=None):
+    """
+    Cliente de Mongo de la app en este proceso; se crea en el primer uso.
+    Con el lock, las primeras peticiones concurrentes de un worker con hilos
+    no crean cada una su cliente (con su pool y sus hilos de monitorización).
+    """
+    state = resources(flask_app)
+    if state.client is None:
+        with state.client_lock:
+            if state.client is None:
+                settings = dict(state.mongo_settings)
+                uri = settings.pop("uri")
+                settings.pop("db")
+                state.client = pymongo.MongoClient(uri, **settings)
+    return state.client
+
+
+def get_db(flask_app=None):
+    return get_client(flask_app)[resources(flask_app).mongo_settings["db"]]
+
+
+def reset_process_state():
+    """
+    Reinicia los recursos de todas las apps tras un fork. Se registra con
+    os.register_at_fork y gunicorn.conf.py lo llama también desde post_fork.
+    """
+    for state in list(_all_resources):
+        state.reset()
+
+
+os.register_at_fork(after_in_child=reset_process_state)
+
+
+@api.app_errorhandler(InvalidRequest)
+def invalid_request(error):
+    return jsonify({"msg": error.msg}), error.status
+
+
+@api.app_errorhandler(RateLimited)
+def rate_limited_error(error):
+    response = jsonify({"msg": "Too many requests"})
+    response.headers.update(error.headers())
+    return response, 429
+
 
-mongo_uri = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/")
-myclient = pymongo.MongoClient(mongo_uri)
+@api.app_errorhandler(HasherBusy)
+def hasher_busy(error):
+    # Pool de bcrypt saturado: mejor rechazar pronto que bloquear el worker
+    response = jsonify({"msg": "Server busy, try again later"})
+    response.headers["Retry-After"] = "1"
+    return response, 503
 
 
 # ================== RUTA RAÍZ ==================
-@app.route("/", methods=["GET"])
+@api.route("/", methods=["GET"])
 def hello():
     # Devolvemos una plantilla HTML
     return render_template("index.html")
 
 
 # ================== AUTENTICACIÓN ==================
-@app.route("/login", methods=["POST"])
+@api.route("/login", methods=["POST"])
+@rate_limited(rate_limiter, "login")
 def login():
     """
     Iniciar sesión en la aplicación
@@ -75,11 +353,15 @@ def login():
               type: string
     responses:
       200:
-        description: Token de acceso generado correctamente
+        description: Token de acceso y token de refresco generados correctamente
       401:
         description: Credenciales incorrectas
+      429:
+        description: Demasiados intentos; ver la cabecera Retry-After
+      503:
+        description: Servidor saturado, reintentar más tarde
     """
-    mydb = myclient["Clinica"]
+    mydb = get_db()
     mycol = mydb["usuarios"]
 
     username = request.json.get("username", None)
@@ -90,14 +372,39 @@ def login():
 
     user = mycol.find_one({"username": username})
 
-    if user and bcrypt.checkpw(password.encode("utf-8"), user["password"].encode("utf-8")):
+    if user and password_hasher.check(password, user["password"]):
+        if password_hasher.needs_rehash(user["password"]):
+            rehash_password(mycol, user, password)
         access_token = create_access_token(identity=username)
-        return jsonify(access_token=access_token)
+        refresh_token = create_refresh_token(identity=username)
+        return jsonify(access_token=access_token, refresh_token=refresh_token)
     else:
         return jsonify({"msg": "Bad username or password"}), 401
 
 
-@app.route("/register", methods=["POST"])
+@api.route("/token/refresh", methods=["POST"])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Obtiene un nuevo token de acceso a partir del token de refresco
+    ---
+    tags:
+      - Autenticación
+    security:
+      - Bearer: []
+    description: Enviar 'Bearer <refresh_token>'. No vuelve a comprobar la contraseña.
+    responses:
+      200:
+        description: Nuevo token de acceso
+      401:
+        description: Token de refresco ausente, caducado o inválido
+    """
+    access_token = create_access_token(identity=get_jwt_identity())
+    return jsonify(access_token=access_token)
+
+
+@api.route("/register", methods=["POST"])
+@rate_limited(rate_limiter, "register")
 def register():
     """
     Registrar un nuevo usuario
@@ -133,46 +440,25 @@ def register():
             description: Usuario creado correctamente
         400:
             description: Solicitud incorrecta
+        429:
+            description: Demasiados registros desde la misma IP; ver la cabecera Retry-After
     """
-    mydb = myclient["Clinica"]
+    mydb = get_db()
     mycol = mydb["usuarios"]
 
-    username = request.json.get("username", None)
-    password = request.json.get("password", None)
-    name = request.json.get("name", None)
-    lastname = request.json.get("lastname", None)
-    email = request.json.get("email", None)
-    phone = request.json.get("phone", None)
-    date = request.json.get("date", None)
-
-    try:
-        date = datetime.strptime(date, "%d/%m/%Y").strftime("%d/%m/%Y")
-    except ValueError:
-        return jsonify({"msg": "Invalid date format"}), 400
-
-    if username is None or password is None:
-        return jsonify({"msg": "Bad request"}), 400
+    user = parse_registration(request.json)
+    user["password"] = password_hasher.hash(request.json["password"])
 
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
-    password = hashed_password.decode("utf-8")
-
-    user = {
-        "username": username,
-        "password": password,
-        "name": name,
-        "lastname": lastname,
-        "email": email,
-        "phone": phone,
-        "date": date,
-    }
     mycol.insert_one(user)
+    bump_version(mydb, user_key(user["username"]))
 
     return jsonify({"msg": "user created"}), 200
 
 
 # ================== CENTROS ==================
-@app.route("/centers", methods=["GET"])
+@api.route("/centers", methods=["GET"])
 @jwt_required()
+@conditional(lambda: centers_stamp())
 def center():
     """
     Obtiene una lista de todos los centros
@@ -200,17 +486,17 @@ def center():
               telefono:
                 type: string
                 description: Teléfono del centro
+      304:
+        description: Sin cambios desde la versión indicada en If-None-Match / If-Modified-Since
     """
 
-    mydb = myclient["Clinica"]
-    mycol = mydb["centros"]
-    centers = mycol.find({}, {"_id": 0})
-    return jsonify(list(centers))
+    return jsonify(centers_snapshot.list())
 
 
 # ================== PERFIL ==================
-@app.route("/profile", methods=["GET"])
+@api.route("/profile", methods=["GET"])
 @jwt_required()
+@conditional(lambda: user_stamp(), private=True)
 def profile():
     """
     Obtiene el perfil del usuario actual
@@ -221,19 +507,30 @@ def profile():
         - Bearer: []
     summary: Obtiene el perfil del usuario actual
     description: Devuelve la información del perfil del usuario autenticado en formato JSON.
+    parameters:
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Campos separados por comas (username, name, lastname, email, phone, date); por defecto todos
     responses:
         200:
             description: Perfil del usuario
+        304:
+            description: Sin cambios desde la versión indicada en If-None-Match / If-Modified-Since
+        400:
+            description: Campos incorrectos
     """
     current_user = get_jwt_identity()
-    mydb = myclient["Clinica"]
+    projection = parse_fields(request.args, PROFILE_FIELDS, PROFILE_PROJECTION)
+    mydb = get_db()
     mycol = mydb["usuarios"]
-    user = mycol.find_one({"username": current_user}, {"_id": 0, "password": 0})
+    user = mycol.find_one({"username": current_user}, projection)
     return jsonify(user)
 
 
 # ================== CITAS ==================
-@app.route("/date/create", methods=["POST"])
+@api.route("/date/create", methods=["POST"])
 @jwt_required()
 def createDate():
     """
@@ -266,41 +563,102 @@ def createDate():
     """
 
     current_user = get_jwt_identity()
-    mydb = myclient["Clinica"]
+    mydb = get_db()
     mycol = mydb["citas"]
-    myCenters = mydb["centros"]
 
     date = request.json.get("date", None)
     center = request.json.get("center", None)
 
-    existing_center = myCenters.find_one({"name": center})
-    if not existing_center:
+    # Validación contra el snapshot en memoria: sin ida y vuelta a Mongo.
+    # Una lista o un objeto no es un nombre de centro (ni se puede buscar).
+    if not isinstance(center, str) or center not in centers_snapshot.by_name():
         return jsonify({"msg": "Center not found"}), 400
 
+    date = parse_slot(date)
+
+    # Reserva atómica en una sola escritura (ver services.booking_write)
     try:
-        date = datetime.strptime(date, "%d/%m/%Y %H:00:00")
-        day = date.strftime("%d/%m/%Y")
-        hour = date.strftime("%H")
-    except ValueError:
-        return jsonify({"msg": "Invalid date format"}), 400
-
-    existing_date = mycol.find_one({"day": day, "hour": hour})
-    if existing_date:
+        mycol.update_one(*booking_write(current_user, center, date), upsert=True)
+    except DuplicateKeyError:
         return jsonify({"msg": "Date and hour already taken"}), 400
 
-    new_date = {
-        "username": current_user,
-        "day": day,
-        "hour": hour,
-        "created_at": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-        "center": center,
-    }
-    mycol.insert_one(new_date)
+    mark_slot(center, date, True)
+    bump_version(mydb, user_key(current_user))
 
     return jsonify({"msg": "Date created successfully"}), 200
 
 
-@app.route("/date/getByDay", methods=["POST"])
+@api.route("/date/bulkCreate", methods=["POST"])
+@jwt_required()
+def bulkCreateDates():
+    """
+    Crea varias citas en una sola petición (p. ej. una serie semanal).
+    ---
+    tags:
+        - Citas
+    security:
+        - Bearer: []
+    parameters:
+        - name: body
+          in: body
+          required: true
+          schema:
+            type: object
+            properties:
+                dates:
+                    type: array
+                    description: Entre 1 y MAX_BULK_SIZE citas
+                    items:
+                        type: object
+                        properties:
+                            center:
+                                type: string
+                                example: "Centro de Salud"
+                            date:
+                                type: string
+                                description: Fecha en formato DD/MM/YYYY HH:00:00
+                                example: "25/12/2025 14:00:00"
+    responses:
+        200:
+            description: Resultado por cita (created, taken, center_not_found o invalid_date) y número de citas creadas
+        400:
+            description: Solicitud incorrecta
+    """
+    current_user = get_jwt_identity()
+    items = parse_bulk(request.json, "dates", current_app.config["MAX_BULK_SIZE"])
+    results, pending = plan_bookings(items, centers_snapshot.by_name())
+
+    mydb = get_db()
+    mycol = mydb["citas"]
+
+    # Un único insert_many sin orden: los huecos libres se insertan aunque
+    # otros choquen con el índice único
+    collided = []
+    if pending:
+        docs = [booking_doc(current_user, r["center"], slot) for r, slot in pending]
+        try:
+            mycol.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            collided = collided_indexes(exc)
+
+    # Un choque puede ser una cita cancelada, que sí se puede reutilizar
+    for index in collided:
+        result, slot = pending[index]
+        try:
+            mycol.update_one(*booking_write(current_user, result["center"], slot), upsert=True)
+        except DuplicateKeyError:
+            result["status"] = "taken"
+
+    booked = [(r["center"], slot) for r, slot in pending if r["status"] == "created"]
+    for write in occupancy_batch(booked):
+        mydb["ocupacion"].update_one(*write, upsert=True)
+    if booked:
+        bump_version(mydb, user_key(current_user))
+
+    return jsonify(bulk_booking_payload(results)), 200
+
+
+@api.route("/date/getByDay", methods=["POST"])
 @jwt_required()
 def getDatesByDay():
     """
@@ -311,11 +669,34 @@ def getDatesByDay():
     security:
         - Bearer: []
     parameters:
-        - name: day
+        - name: body
           in: body
-          type: integer
           required: true
-          description: El día para el cual se desean obtener las citas, entre 1 y 31.
+          schema:
+            type: object
+            properties:
+                day:
+                    type: string
+                    description: Día en formato DD/MM/YYYY. Por compatibilidad también se acepta un entero entre 1 y 31 (día del mes actual).
+                    example: "25/12/2025"
+                center:
+                    type: string
+                    description: Nombre del centro (opcional)
+        - name: stream
+          in: query
+          type: boolean
+          required: false
+          description: Si es 1 la lista se envía en streaming (JSON o NDJSON con Accept application/x-ndjson)
+        - name: batch_size
+          in: query
+          type: integer
+          required: false
+          description: Tamaño de lote del cursor de Mongo en modo streaming
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Campos de cada cita separados por comas (username, center, date, created_at); por defecto todos
     responses:
         200:
             description: Una lista de citas para el día especificado.
@@ -323,36 +704,162 @@ def getDatesByDay():
             description: Solicitud incorrecta
     """
 
-    mydb = myclient["Clinica"]
-    mycol = mydb["citas"]
-    day = request.json.get("day", None)
+    day = parse_day(request.json.get("day", None))
+    center = request.json.get("center", None)
+    dates = find_dates_in_range(*day_bounds(day), center)
 
-    if not day or (day > 31 or day < 1):
-        return jsonify({"msg": "Bad request"}), 400
+    return dates_response(dates)
+
+
+@api.route("/date/getByWeek", methods=["POST"])
+@jwt_required()
+def getDatesByWeek():
+    """
+    Obtiene las citas de la semana (lunes a domingo) que contiene el día indicado.
+    ---
+    tags:
+        - Citas
+    security:
+        - Bearer: []
+    parameters:
+        - name: body
+          in: body
+          required: true
+          schema:
+            type: object
+            properties:
+                day:
+                    type: string
+                    description: Cualquier día de la semana en formato DD/MM/YYYY
+                    example: "25/12/2025"
+                center:
+                    type: string
+                    description: Nombre del centro (opcional)
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Campos de cada cita separados por comas (username, center, date, created_at); por defecto todos
+    responses:
+        200:
+            description: Una lista de citas para la semana especificada.
+        400:
+            description: Solicitud incorrecta
+    """
+
+    day = parse_day(request.json.get("day", None))
+    center = request.json.get("center", None)
+    dates = find_dates_in_range(*week_bounds(day), center)
+
+    return dates_response(dates)
+
+
+@api.route("/date/getByRange", methods=["POST"])
+@jwt_required()
+def getDatesByRange():
+    """
+    Obtiene las citas entre dos instantes [start, end).
+    ---
+    tags:
+        - Citas
+    security:
+        - Bearer: []
+    parameters:
+        - name: body
+          in: body
+          required: true
+          schema:
+            type: object
+            properties:
+                start:
+                    type: string
+                    description: Inicio del rango (incluido) en formato DD/MM/YYYY HH:00:00
+                    example: "22/12/2025 08:00:00"
+                end:
+                    type: string
+                    description: Fin del rango (excluido) en formato DD/MM/YYYY HH:00:00
+                    example: "27/12/2025 20:00:00"
+                center:
+                    type: string
+                    description: Nombre del centro (opcional)
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Campos de cada cita separados por comas (username, center, date, created_at); por defecto todos
+    responses:
+        200:
+            description: Una lista de citas dentro del rango.
+        400:
+            description: Solicitud incorrecta
+    """
 
-    dates = mycol.find({"day": day, "cancel": {"$ne": 1}}, {"_id": 0})
+    start, end = parse_range(request.json)
+    center = request.json.get("center", None)
+    dates = find_dates_in_range(start, end, center)
 
-    return jsonify(format_dates(list(dates)))
+    return dates_response(dates)
 
 
-@app.route("/date/getByUser", methods=["GET"])
+@api.route("/date/getByUser", methods=["GET"])
 @jwt_required()
+@conditional(lambda: user_stamp(), private=True)
 def getDateByUser():
     """
     Obtiene las citas del usuario logeado
     ---
     tags:
         - Citas
+    security:
+        - Bearer: []
+    parameters:
+        - name: limit
+          in: query
+          type: integer
+          required: false
+          description: Tamaño de página (1-MAX_PAGE_SIZE). Si se indica, la respuesta es {"items", "next_cursor"}.
+        - name: after
+          in: query
+          type: string
+          required: false
+          description: Valor de next_cursor devuelto por la página anterior
+        - name: stream
+          in: query
+          type: boolean
+          required: false
+          description: Si es 1 la lista se envía en streaming (JSON o NDJSON con Accept application/x-ndjson)
+        - name: batch_size
+          in: query
+          type: integer
+          required: false
+          description: Tamaño de lote del cursor de Mongo en modo streaming
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Campos de cada cita separados por comas (username, center, date, created_at); por defecto todos
+    responses:
+        200:
+            description: Lista de citas, o una página de citas si se indica limit
+        304:
+            description: Sin cambios desde la versión indicada en If-None-Match / If-Modified-Since
+        400:
+            description: Parámetros de paginación o campos incorrectos
     """
     current_user = get_jwt_identity()
-    mydb = myclient["Clinica"]
+    query = {"username": current_user, **LIVE}
+
+    if "limit" in request.args:
+        return paginate_dates(query)
+
+    mydb = get_db()
     mycol = mydb["citas"]
 
-    dates = mycol.find({"username": current_user, "cancel": {"$ne": 1}}, {"_id": 0})
-    return jsonify(format_dates(list(dates)))
+    dates = mycol.find(query, date_projection())
+    return dates_response(dates)
 
 
-@app.route("/date/delete", methods=["POST"])
+@api.route("/date/delete", methods=["POST"])
 @jwt_required()
 def deleteDate():
     """
@@ -363,35 +870,130 @@ def deleteDate():
     """
 
     current_user = get_jwt_identity()
-    mydb = myclient["Clinica"]
+    mydb = get_db()
     mycol = mydb["citas"]
 
     date = request.json.get("date", None)
     center = request.json.get("center", None)
 
-    try:
-        date = datetime.strptime(date, "%d/%m/%Y %H:00:00")
-        day = date.strftime("%d/%m/%Y")
-        hour = date.strftime("%H")
-    except ValueError:
-        return jsonify({"msg": "Invalid date format"}), 400
+    date = parse_slot(date)
 
-    date_doc = mycol.find_one({"day": day, "hour": hour, "center": center})
+    date_doc = mycol.find_one(cancel_filter(center, date))
     if not date_doc:
         return jsonify({"msg": "Date not found"}), 400
 
     if date_doc["username"] != current_user:
         return jsonify({"msg": "Unauthorized"}), 401
 
-    mycol.update_one(
-        {"day": day, "hour": hour, "center": center},
-        {"$set": {"cancel": 1}},
-    )
+    mycol.update_one(cancel_filter(center, date), {"$set": {"cancel": 1}})
+    mark_slot(center, date, False)
+    bump_version(mydb, user_key(current_user))
 
     return jsonify({"msg": "Date deleted successfully"}), 200
 
 
-@app.route("/dates", methods=["GET"])
+@api.route("/date/bulkDelete", methods=["POST"])
+@jwt_required()
+def bulkDeleteDates():
+    """
+    Cancela varias citas del usuario en una sola escritura
+    ---
+    tags:
+        - Citas
+    security:
+        - Bearer: []
+    parameters:
+        - name: body
+          in: body
+          required: true
+          schema:
+            type: object
+            description: Lista "dates" de pares {center, date} o rango "start"/"end" con "center" opcional
+            properties:
+                dates:
+                    type: array
+                    items:
+                        type: object
+                        properties:
+                            center:
+                                type: string
+                            date:
+                                type: string
+                                example: "25/12/2025 14:00:00"
+                start:
+                    type: string
+                    example: "25/12/2025 14:00:00"
+                end:
+                    type: string
+                    example: "25/12/2025 20:00:00"
+                center:
+                    type: string
+    responses:
+        200:
+            description: Citas encontradas (matched) y canceladas (modified); las de otros usuarios no cuentan
+        400:
+            description: Solicitud incorrecta
+    """
+    current_user = get_jwt_identity()
+    query = bulk_cancel_query(current_user, request.json, current_app.config["MAX_BULK_SIZE"])
+
+    mydb = get_db()
+    result = mydb["citas"].update_many(query, {"$set": {"cancel": 1}})
+
+    if result.modified_count:
+        # Solo se leen las citas ya canceladas para liberar sus horas
+        freed = mydb["citas"].find(cancelled_query(query), {"_id": 0, "center": 1, "slot_start": 1})
+        slots = [(d["center"], d["slot_start"]) for d in freed if d.get("slot_start")]
+        for write in occupancy_batch(slots, taken=False):
+            mydb["ocupacion"].update_one(*write)
+        bump_version(mydb, user_key(current_user))
+
+    return jsonify({"matched": result.matched_count, "modified": result.modified_count}), 200
+
+
+@api.route("/availability", methods=["GET"])
+@jwt_required()
+def availability():
+    """
+    Obtiene las horas libres y ocupadas de un centro en un día
+    ---
+    tags:
+        - Citas
+    security:
+        - Bearer: []
+    parameters:
+        - name: center
+          in: query
+          type: string
+          required: true
+          description: Nombre del centro
+        - name: day
+          in: query
+          type: string
+          required: true
+          description: Día en formato DD/MM/YYYY
+          example: "25/12/2025"
+    responses:
+        200:
+            description: Horas ("HH") ocupadas y libres del día
+        400:
+            description: Solicitud incorrecta
+    """
+    center = request.args.get("center", None)
+    if not center:
+        return jsonify({"msg": "Bad request"}), 400
+    day = parse_day(request.args.get("day", None))
+
+    if center not in centers_snapshot.by_name():
+        return jsonify({"msg": "Center not found"}), 400
+
+    mydb = get_db()
+    doc = mydb["ocupacion"].find_one({"center": center, "day": day}, {"_id": 0, "hours": 1})
+
+    return jsonify(availability_payload(center, day, doc))
+
+
+@api.route("/dates", methods=["GET"])
 @jwt_required()
 def getDates():
     """
@@ -399,23 +1001,60 @@ def getDates():
     ---
     tags:
         - Citas
+    security:
+        - Bearer: []
+    parameters:
+        - name: limit
+          in: query
+          type: integer
+          required: false
+          description: Tamaño de página (1-MAX_PAGE_SIZE). Si se indica, la respuesta es {"items", "next_cursor"}.
+        - name: after
+          in: query
+          type: string
+          required: false
+          description: Valor de next_cursor devuelto por la página anterior
+        - name: stream
+          in: query
+          type: boolean
+          required: false
+          description: Si es 1 la lista se envía en streaming (JSON o NDJSON con Accept application/x-ndjson)
+        - name: batch_size
+          in: query
+          type: integer
+          required: false
+          description: Tamaño de lote del cursor de Mongo en modo streaming
+        - name: fields
+          in: query
+          type: string
+          required: false
+          description: Campos de cada cita separados por comas (username, center, date, created_at); por defecto todos
+    responses:
+        200:
+            description: Lista de citas, o una página de citas si se indica limit
+        400:
+            description: Parámetros de paginación o campos incorrectos
     """
 
-    current_user = get_jwt_identity()
-    mydb = myclient["Clinica"]
+    query = dict(LIVE)
+
+    if "limit" in request.args:
+        return paginate_dates(query)
+
+    mydb = get_db()
     mycol = mydb["citas"]
 
-    dates = mycol.find({"cancel": {"$ne": 1}}, {"_id": 0})
+    dates = mycol.find(query, date_projection())
 
-    return jsonify(format_dates(list(dates)))
+    return dates_response(dates)
 
 
 # ================== MIGRACIÓN ==================
-@app.route("/migracion", methods=["GET"])
+@api.route("/migracion", methods=["GET"])
 def migracion():
-    dblist = myclient.list_database_names()
-    if "Clinica" not in dblist:
-        mydb = myclient["Clinica"]
+    dblist = get_client().list_database_names()
+    if resources().mongo_settings["db"] not in dblist:
+        mydb = get_db()
         collections = ["usuarios", "centros", "citas"]
 
         for collection in collections:
@@ -433,20 +1072,210 @@ def migracion():
                 },
             ]
         )
+        bump_centers_version(mydb)
+        centers_snapshot.invalidate()
+        ensure_all_indexes(mydb)
 
         return jsonify({"msg": "Database and collections created"}), 200
     else:
+        # Las reservas dependen del índice único: se asegura también aquí
+        ensure_all_indexes(get_db())
         return jsonify({"msg": "Database already exists"}), 200
 
 
+@api.cli.command("invalidate-centers")
+def invalidate_centers_command():
+    """Invalida el snapshot de centros en todos los procesos de la API."""
+    bump_centers_version(get_db())
+    print("Versión de centros incrementada.")
+
+
+@api.cli.command("export-apispec")
+@click.option("--output", default=None, help="Fichero de salida (por defecto APISPEC_PATH).")
+def export_apispec_command(output):
+    """Genera el spec de la API para servirlo con APIDOCS_MODE=frozen."""
+    path = output or current_app.config["APISPEC_PATH"]
+    spec = export_spec(current_app, SWAGGER_TEMPLATE, path)
+    print(f"{len(spec['paths'])} rutas escritas en {path}")
+
+
+@api.cli.command("import-patients")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Por defecto según la extensión.")
+@click.option("--batch-size", default=1000, show_default=True)
+@click.option("--workers", type=int, help="Procesos para bcrypt (por defecto, todos los núcleos).")
+@click.option("--restart", is_flag=True, help="Ignora el punto de control y empieza de cero.")
+def import_patients_command(path, fmt, batch_size, workers, restart):
+    """Importa pacientes desde CSV o NDJSON (ver patients_import)."""
+    stats = import_patients(
+        get_db(),
+        path,
+        fmt=fmt,
+        batch_size=batch_size,
+        workers=workers,
+        rounds=current_app.config["BCRYPT_ROUNDS"],
+        restart=restart,
+    )
+    print(f"Importación terminada: {stats['inserted']} pacientes nuevos.")
+
+
+@api.cli.command("generate-data")
+@click.option("--users", default=10000, show_default=True)
+@click.option("--centers", type=int, help="Por defecto, los necesarios para --dates en --days.")
+@click.option("--dates", default=1000000, show_default=True)
+@click.option("--days", default=365, show_default=True, help="Días a partir de --start.")
+@click.option("--start", help="Primer día (DD/MM/YYYY); por defecto hoy.")
+@click.option("--cancel-rate", default=0.1, show_default=True)
+@click.option("--batch-size", default=5000, show_default=True)
+@click.option("--processes", default=1, show_default=True)
+@click.option("--seed", default=1, show_default=True)
+@click.option("--prefix", default="sint", show_default=True, help="Prefijo de usuarios y centros.")
+@click.option("--password", default="paciente", show_default=True, help="Contraseña de todos los usuarios.")
+def generate_data_command(
+    users, centers, dates, days, start, cancel_rate, batch_size, processes, seed, prefix, password
+):
+    """Genera usuarios, centros y citas sintéticos (ver synthetic_data)."""
+    if centers is None:
+        centers = default_centers(dates, days)
+    try:
+        check_capacity(dates, centers, days)
+    except ValueError as exc:
+        raise click.UsageError(str(exc))
+    written = generate(
+        get_db,
+        users=users,
+        centers=centers,
+        dates=dates,
+        days=days,
+        start=parse_day(start) if start else None,
+        cancel_rate=cancel_rate,
+        batch_size=batch_size,
+        processes=processes,
+        seed=seed,
+        prefix=prefix,
+        password_hash=password_hasher.hash(password),
+    )
+    bump_centers_version(get_db())
+    print(f"Generación terminada: {written} citas.")
+
+
 # ================== UTIL ==================
-def format_dates(dates):
-    result = []
+def rehash_password(mycol, user, password):
+    """
+    Actualiza el hash al coste configurado tras un login correcto.
+
+    El filtro incluye el hash antiguo para no pisar un cambio concurrente.
+    Si el pool está saturado se deja para el siguiente login.
+    """
+    try:
+        new_hash = password_hasher.hash(password)
+    except HasherBusy:
+        return
+    mycol.update_one(
+        {"_id": user["_id"], "password": user["password"]},
+        {"$set": {"password": new_hash}},
+    )
+
+
+def centers_stamp():
+    """
+    Sello de /centers: huella del contenido del snapshot en memoria (sin ir
+    a Mongo), que cambia con cada recarga por TTL o change stream aunque no
+    se haya tocado el contador de versión.
+    """
+    snapshot = centers_snapshot.get()
+    return f"centros-{snapshot.digest}", snapshot.updated_at
+
+
+def user_stamp():
+    """
+    Sello de los datos del usuario actual (perfil y citas): una lectura por _id.
+
+    Incluye una huella del usuario: todos empiezan en la versión 1 y, sin
+    ella, un usuario recibiría 304 con la ETag de otro. Sin Last-Modified:
+    una reserva en el mismo segundo que la respuesta anterior no movería la
+    fecha (HTTP solo tiene segundos) y daría un 304 con datos viejos.
+    """
+    identity = get_jwt_identity()
+    version, _ = read_version(get_db(), user_key(identity))
+    return f"user-{user_tag(identity)}-{version}", None
+
+
+def mark_slot(center, slot, taken):
+    """Marca u libera la hora de ``slot`` en la ocupación del centro y día."""
+    mydb = get_db()
+    mydb["ocupacion"].update_one(*occupancy_write(center, slot, taken), upsert=taken)
+
+
+def find_dates_in_range(start, end, center=None):
+    """Cursor de las citas no canceladas en [start, end) (ver services.range_query)."""
+    mydb = get_db()
+    mycol = mydb["citas"]
+
+    return mycol.find(range_query(start, end, center), date_projection())
+
+
+def date_projection():
+    """Proyección de los listados de citas según ``?fields=``."""
+    return parse_fields(request.args, DATE_FIELDS, DATE_PROJECTION)
+
+
+def paginate_dates(query):
+    """Página de citas con paginación keyset sobre (slot_start, _id)."""
+    limit, query = parse_page(request.args, query, current_app.config["MAX_PAGE_SIZE"])
+
+    mydb = get_db()
+    mycol = mydb["citas"]
+
+    # Se pide un elemento de más para saber si hay página siguiente
+    projection = page_projection(date_projection())
+    page = list(mycol.find(query, projection).sort(DATE_SORT).limit(limit + 1))
+
+    return jsonify(page_payload(page, limit))
+
+
+def wants_stream():
+    """Streaming bajo demanda: ?stream=1 o Accept: application/x-ndjson."""
+    return request.args.get("stream") == "1" or wants_ndjson(request.headers.get("Accept"))
+
+
+def dates_response(dates):
+    """
+    Respuesta para un cursor de citas.
+
+    El orden lo resuelve Mongo con el índice de (slot_start, _id), así que
+    aquí solo se da formato. En modo streaming el cursor se va escribiendo
+    documento a documento y la memoria queda acotada por el tamaño de lote.
+    """
+    dates = dates.sort(DATE_SORT)
+
+    if not wants_stream():
+        return jsonify(format_dates(dates))
+
+    batch_size = parse_batch_size(
+        request.args, current_app.config["STREAM_BATCH_SIZE"], current_app.config["MAX_STREAM_BATCH_SIZE"]
+    )
+    dates = dates.batch_size(batch_size)
+
+    # El generador se consume fuera del contexto de la petición
+    dumps = current_app.json.dumps_bytes
+    if wants_ndjson(request.headers.get("Accept")):
+        return Response(stream_ndjson(dates, dumps), mimetype="application/x-ndjson")
+    return Response(stream_json_array(dates, dumps), mimetype="application/json")
+
+
+def stream_json_array(dates, dumps):
+    yield b"["
+    separator = b""
     for date in dates:
-        date["date"] = f"{date['day']} {date['hour']}:00:00"
-        del date["day"]
-        del date["hour"]
-        result.append(date)
+        yield separator + dumps(format_date(date))
+        separator = b","
+    yield b"]"
+
+
+def stream_ndjson(dates, dumps):
+    for date in dates:
+        yield dumps(format_date(date)) + b"\n"
+
 
-    result.sort(key=lambda x: datetime.strptime(x["date"], "%d/%m/%Y %H:00:00"))
-    return result
+app = create_app()
@@ -0,0 +1,546 @@
+"""Variante asíncrona (ASGI) de la API de citas.
+
+Expone las mismas rutas JSON que ``application.py`` como vistas
+``async def`` sobre ``pymongo.AsyncMongoClient``: mientras una petición
+espera a Mongo el bucle de eventos atiende otras, así que un proceso
+sostiene muchas más conexiones concurrentes en los listados. Se sirve con
+un servidor ASGI, por ejemplo:
+
+    uvicorn asgi:app --workers 4
+
+La lógica de las rutas (validación, filtros, paginación y formato) es la de
+``services``; de ``application`` se reutilizan la configuración, los tokens
+JWT, el pool de bcrypt y el snapshot de centros. Las peticiones
+condicionales (ETag), ``/apidocs`` y ``/migracion`` solo existen en la app
+WSGI.
+"""
+import asyncio
+import time
+
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse as BaseJSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import application
+from metrics import CONTENT_TYPE, HTTP_IN_FLIGHT, HTTP_LATENCY, HTTP_REQUESTS, registry
+from passwords import HasherBusy
+from rate_limit import RateLimited, client_ip
+from services import (
+    DATE_FIELDS,
+    DATE_PROJECTION,
+    DATE_SORT,
+    LIVE,
+    PROFILE_FIELDS,
+    PROFILE_PROJECTION,
+    InvalidRequest,
+    availability_payload,
+    booking_doc,
+    booking_write,
+    bulk_booking_payload,
+    bulk_cancel_query,
+    cancel_filter,
+    cancelled_query,
+    collided_indexes,
+    day_bounds,
+    format_date,
+    format_dates,
+    occupancy_batch,
+    occupancy_write,
+    page_payload,
+    page_projection,
+    parse_batch_size,
+    parse_bulk,
+    parse_day,
+    parse_fields,
+    parse_page,
+    parse_range,
+    parse_registration,
+    parse_slot,
+    plan_bookings,
+    range_query,
+    wants_ndjson,
+    week_bounds,
+)
+from versions import bump_version, user_key
+
+
+flask_app = application.app
+password_hasher = application.password_hasher
+centers_snapshot = application.centers_snapshot
+rate_limiter = application.rate_limiter
+
+def get_db():
+    """
+    Base de datos sobre el cliente asíncrono, guardado con los recursos de
+    la app Flask (se reinicia con ellos tras un fork). Se crea en el primer
+    uso, ya dentro del bucle de eventos del worker, con la misma
+    configuración de pool que el cliente síncrono. No hace falta lock: entre
+    la comprobación y la asignación no hay ningún ``await``.
+    """
+    state = application.resources(flask_app)
+    settings = state.mongo_settings
+    if state.async_client is None:
+        options = {k: v for k, v in settings.items() if k not in ("uri", "db")}
+        state.async_client = AsyncMongoClient(settings["uri"], **options)
+    return state.async_client[settings["db"]]
+
+
+# ================== UTIL ==================
+class JSONResponse(BaseJSONResponse):
+    """Codifica con el proveedor JSON de la app Flask (ver json_provider)."""
+
+    def render(self, content):
+        return flask_app.json.dumps_bytes(content)
+
+
+async def read_json(request):
+    try:
+        body = flask_app.json.loads(await request.body())
+    except ValueError:
+        raise InvalidRequest()
+    if not isinstance(body, dict):
+        raise InvalidRequest()
+    return body
+
+
+def current_identity(request, refresh=False):
+    """
+    Identidad del token Bearer, validado con la configuración JWT de la app
+    Flask (mismos mensajes y códigos que flask_jwt_extended).
+    """
+    header = request.headers.get("Authorization", "")
+    if not header.startswith("Bearer "):
+        raise InvalidRequest("Missing Authorization Header", 401)
+
+    try:
+        with flask_app.app_context():
+            claims = decode_token(header[len("Bearer "):])
+    except ExpiredSignatureError:
+        raise InvalidRequest("Token has expired", 401)
+    except (PyJWTError, JWTExtendedException) as exc:
+        raise InvalidRequest(str(exc), 422)
+
+    if refresh and claims["type"] != "refresh":
+        raise InvalidRequest("Only refresh tokens are allowed", 422)
+    if not refresh and claims["type"] != "access":
+        raise InvalidRequest("Only non-refresh tokens are allowed", 422)
+    return claims[flask_app.config["JWT_IDENTITY_CLAIM"]]
+
+
+async def check_rate_limit(request, route, body):
+    """
+    Mismos límites que la app WSGI (RATE_LIMITS de la configuración). Con
+    el backend mongo las lecturas y escrituras son síncronas: van a un hilo
+    para no bloquear el bucle de eventos.
+    """
+    config = flask_app.config
+    if not config["RATE_LIMIT_ENABLED"]:
+        return
+
+    def value(key):
+        if key == "ip":
+            remote = request.client.host if request.client else None
+            return client_ip(remote, request.headers.get("X-Forwarded-For"), config["PROXY_COUNT"])
+        if key == "username":
+            username = body.get("username", None)
+            return username if isinstance(username, str) else None
+        if key == "identity":
+            try:
+                return current_identity(request)
+            except InvalidRequest:
+                return None
+        return None
+
+    limits = config["RATE_LIMITS"].get(route, ())
+    if config["RATE_LIMIT_BACKEND"] == "mongo":
+        await asyncio.to_thread(rate_limiter.check, route, limits, value)
+    else:
+        rate_limiter.check(route, limits, value)
+
+
+async def get_centers():
+    """Snapshot de centros; solo se va a un hilo si hay que recargarlo."""
+    return centers_snapshot.peek() or await asyncio.to_thread(centers_snapshot.get)
+
+
+async def mark_slot(center, slot, taken):
+    await get_db()["ocupacion"].update_one(*occupancy_write(center, slot, taken), upsert=taken)
+
+
+def date_projection(request):
+    return parse_fields(request.query_params, DATE_FIELDS, DATE_PROJECTION)
+
+
+async def dates_response(request, dates):
+    """Igual que en la app WSGI, con un cursor asíncrono."""
+    dates = dates.sort(DATE_SORT)
+    ndjson = wants_ndjson(request.headers.get("Accept"))
+
+    if request.query_params.get("stream") != "1" and not ndjson:
+        return JSONResponse(format_dates(await dates.to_list(None)))
+
+    batch_size = parse_batch_size(
+        request.query_params,
+        flask_app.config["STREAM_BATCH_SIZE"],
+        flask_app.config["MAX_STREAM_BATCH_SIZE"],
+    )
+    dates = dates.batch_size(batch_size)
+
+    if ndjson:
+        return StreamingResponse(stream_ndjson(dates), media_type="application/x-ndjson")
+    return StreamingResponse(stream_json_array(dates), media_type="application/json")
+
+
+async def stream_json_array(dates):
+    yield b"["
+    separator = b""
+    async for date in dates:
+        yield separator + flask_app.json.dumps_bytes(format_date(date))
+        separator = b","
+    yield b"]"
+
+
+async def stream_ndjson(dates):
+    async for date in dates:
+        yield flask_app.json.dumps_bytes(format_date(date)) + b"\n"
+
+
+async def paginate_dates(request, query):
+    limit, query = parse_page(request.query_params, query, flask_app.config["MAX_PAGE_SIZE"])
+    projection = page_projection(date_projection(request))
+    page = await get_db()["citas"].find(query, projection).sort(DATE_SORT).limit(limit + 1).to_list(None)
+    return JSONResponse(page_payload(page, limit))
+
+
+# ================== AUTENTICACIÓN ==================
+async def login(request):
+    body = await read_json(request)
+    await check_rate_limit(request, "login", body)
+    username = body.get("username", None)
+    password = body.get("password", None)
+
+    if not username or not password:
+        return JSONResponse({"msg": "Bad username or password"}, 401)
+
+    mycol = get_db()["usuarios"]
+    user = await mycol.find_one({"username": username})
+
+    if user and await asyncio.to_thread(password_hasher.check, password, user["password"]):
+        if password_hasher.needs_rehash(user["password"]):
+            await rehash_password(mycol, user, password)
+        with flask_app.app_context():
+            access_token = create_access_token(identity=username)
+            refresh_token = create_refresh_token(identity=username)
+        return JSONResponse({"access_token": access_token, "refresh_token": refresh_token})
+
+    return JSONResponse({"msg": "Bad username or password"}, 401)
+
+
+async def rehash_password(mycol, user, password):
+    try:
+        new_hash = await asyncio.to_thread(password_hasher.hash, password)
+    except HasherBusy:
+        return
+    await mycol.update_one(
+        {"_id": user["_id"], "password": user["password"]},
+        {"$set": {"password": new_hash}},
+    )
+
+
+async def refresh(request):
+    identity = current_identity(request, refresh=True)
+    with flask_app.app_context():
+        access_token = create_access_token(identity=identity)
+    return JSONResponse({"access_token": access_token})
+
+
+async def register(request):
+    body = await read_json(request)
+    await check_rate_limit(request, "register", body)
+    user = parse_registration(body)
+    user["password"] = await asyncio.to_thread(password_hasher.hash, body["password"])
+
+    mydb = get_db()
+    await mydb["usuarios"].insert_one(user)
+    await bump_version(mydb, user_key(user["username"]))
+
+    return JSONResponse({"msg": "user created"})
+
+
+# ================== CENTROS Y PERFIL ==================
+async def center(request):
+    current_identity(request)
+    snapshot = await get_centers()
+    return JSONResponse([dict(c) for c in snapshot.centers])
+
+
+async def profile(request):
+    current_user = current_identity(request)
+    projection = parse_fields(request.query_params, PROFILE_FIELDS, PROFILE_PROJECTION)
+    user = await get_db()["usuarios"].find_one({"username": current_user}, projection)
+    return JSONResponse(user)
+
+
+# ================== CITAS ==================
+async def createDate(request):
+    current_user = current_identity(request)
+    body = await read_json(request)
+    center = body.get("center", None)
+
+    if not isinstance(center, str) or center not in (await get_centers()).by_name:
+        return JSONResponse({"msg": "Center not found"}, 400)
+
+    date = parse_slot(body.get("date", None))
+
+    mydb = get_db()
+    try:
+        await mydb["citas"].update_one(*booking_write(current_user, center, date), upsert=True)
+    except DuplicateKeyError:
+        return JSONResponse({"msg": "Date and hour already taken"}, 400)
+
+    await mark_slot(center, date, True)
+    await bump_version(mydb, user_key(current_user))
+
+    return JSONResponse({"msg": "Date created successfully"})
+
+
+async def bulkCreateDates(request):
+    current_user = current_identity(request)
+    body = await read_json(request)
+    items = parse_bulk(body, "dates", flask_app.config["MAX_BULK_SIZE"])
+    results, pending = plan_bookings(items, (await get_centers()).by_name)
+
+    mydb = get_db()
+    mycol = mydb["citas"]
+
+    collided = []
+    if pending:
+        docs = [booking_doc(current_user, r["center"], slot) for r, slot in pending]
+        try:
+            await mycol.insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            collided = collided_indexes(exc)
+
+    for index in collided:
+        result, slot = pending[index]
+        try:
+            await mycol.update_one(*booking_write(current_user, result["center"], slot), upsert=True)
+        except DuplicateKeyError:
+            result["status"] = "taken"
+
+    booked = [(r["center"], slot) for r, slot in pending if r["status"] == "created"]
+    for write in occupancy_batch(booked):
+        await mydb["ocupacion"].update_one(*write, upsert=True)
+    if booked:
+        await bump_version(mydb, user_key(current_user))
+
+    return JSONResponse(bulk_booking_payload(results))
+
+
+async def getDatesByDay(request):
+    current_identity(request)
+    body = await read_json(request)
+    day = parse_day(body.get("day", None))
+    query = range_query(*day_bounds(day), body.get("center", None))
+    return await dates_response(request, get_db()["citas"].find(query, date_projection(request)))
+
+
+async def getDatesByWeek(request):
+    current_identity(request)
+    body = await read_json(request)
+    day = parse_day(body.get("day", None))
+    query = range_query(*week_bounds(day), body.get("center", None))
+    return await dates_response(request, get_db()["citas"].find(query, date_projection(request)))
+
+
+async def getDatesByRange(request):
+    current_identity(request)
+    body = await read_json(request)
+    start, end = parse_range(body)
+    query = range_query(start, end, body.get("center", None))
+    return await dates_response(request, get_db()["citas"].find(query, date_projection(request)))
+
+
+async def getDateByUser(request):
+    current_user = current_identity(request)
+    query = {"username": current_user, **LIVE}
+
+    if "limit" in request.query_params:
+        return await paginate_dates(request, query)
+
+    return await dates_response(request, get_db()["citas"].find(query, date_projection(request)))
+
+
+async def deleteDate(request):
+    current_user = current_identity(request)
+    body = await read_json(request)
+    center = body.get("center", None)
+    date = parse_slot(body.get("date", None))
+
+    mydb = get_db()
+    date_doc = await mydb["citas"].find_one(cancel_filter(center, date))
+    if not date_doc:
+        return JSONResponse({"msg": "Date not found"}, 400)
+
+    if date_doc["username"] != current_user:
+        return JSONResponse({"msg": "Unauthorized"}, 401)
+
+    await mydb["citas"].update_one(cancel_filter(center, date), {"$set": {"cancel": 1}})
+    await mark_slot(center, date, False)
+    await bump_version(mydb, user_key(current_user))
+
+    return JSONResponse({"msg": "Date deleted successfully"})
+
+
+async def bulkDeleteDates(request):
+    current_user = current_identity(request)
+    body = await read_json(request)
+    query = bulk_cancel_query(current_user, body, flask_app.config["MAX_BULK_SIZE"])
+
+    mydb = get_db()
+    result = await mydb["citas"].update_many(query, {"$set": {"cancel": 1}})
+
+    if result.modified_count:
+        freed = mydb["citas"].find(cancelled_query(query), {"_id": 0, "center": 1, "slot_start": 1})
+        slots = [(d["center"], d["slot_start"]) async for d in freed if d.get("slot_start")]
+        for write in occupancy_batch(slots, taken=False):
+            await mydb["ocupacion"].update_one(*write)
+        await bump_version(mydb, user_key(current_user))
+
+    return JSONResponse({"matched": result.matched_count, "modified": result.modified_count})
+
+
+async def availability(request):
+    current_identity(request)
+    center = request.query_params.get("center", None)
+    if not center:
+        return JSONResponse({"msg": "Bad request"}, 400)
+    day = parse_day(request.query_params.get("day", None))
+
+    if center not in (await get_centers()).by_name:
+        return JSONResponse({"msg": "Center not found"}, 400)
+
+    doc = await get_db()["ocupacion"].find_one(
+        {"center": center, "day": day}, {"_id": 0, "hours": 1}
+    )
+    return JSONResponse(availability_payload(center, day, doc))
+
+
+async def getDates(request):
+    current_identity(request)
+    query = dict(LIVE)
+
+    if "limit" in request.query_params:
+        return await paginate_dates(request, query)
+
+    return await dates_response(request, get_db()["citas"].find(query, date_projection(request)))
+
+
+async def metrics(request):
+    return Response(registry.render(), headers={"Content-Type": CONTENT_TYPE})
+
+
+# ================== APP ==================
+class RequestMetrics:
+    """
+    Middleware ASGI con las mismas métricas HTTP que los hooks de la app
+    Flask; la latencia se toma al enviar la cabecera de la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        recorded = False
+
+        def record(status):
+            nonlocal recorded
+            recorded = True
+            # El router añade el endpoint al scope al resolver la ruta
+            endpoint = ROUTE_PATHS.get(scope.get("endpoint"), "<unmatched>")
+            HTTP_LATENCY.observe(time.perf_counter() - start, endpoint, scope["method"])
+            HTTP_REQUESTS.inc(endpoint, scope["method"], str(status))
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.start":
+                record(message["status"])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            if not recorded:
+                record(500)
+            HTTP_IN_FLIGHT.dec()
+
+
+async def invalid_request(request, error):
+    return JSONResponse({"msg": error.msg}, error.status)
+
+
+async def rate_limited(request, error):
+    return JSONResponse({"msg": "Too many requests"}, 429, headers=error.headers())
+
+
+async def hasher_busy(request, error):
+    return JSONResponse({"msg": "Server busy, try again later"}, 503, headers={"Retry-After": "1"})
+
+
+routes = [
+    Route("/login", login, methods=["POST"]),
+    Route("/token/refresh", refresh, methods=["POST"]),
+    Route("/register", register, methods=["POST"]),
+    Route("/centers", center, methods=["GET"]),
+    Route("/profile", profile, methods=["GET"]),
+    Route("/date/create", createDate, methods=["POST"]),
+    Route("/date/bulkCreate", bulkCreateDates, methods=["POST"]),
+    Route("/date/getByDay", getDatesByDay, methods=["POST"]),
+    Route("/date/getByWeek", getDatesByWeek, methods=["POST"]),
+    Route("/date/getByRange", getDatesByRange, methods=["POST"]),
+    Route("/date/getByUser", getDateByUser, methods=["GET"]),
+    Route("/date/delete", deleteDate, methods=["POST"]),
+    Route("/date/bulkDelete", bulkDeleteDates, methods=["POST"]),
+    Route("/availability", availability, methods=["GET"]),
+    Route("/dates", getDates, methods=["GET"]),
+]
+if flask_app.config["METRICS_ENABLED"]:
+    routes.append(Route("/metrics", metrics, methods=["GET"]))
+ROUTE_PATHS = {route.endpoint: route.path for route in routes}
+
+middleware = [
+    Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+]
+if flask_app.config["METRICS_ENABLED"]:
+    middleware.append(Middleware(RequestMetrics))
+if flask_app.config["COMPRESS_ENABLED"]:
+    # Solo gzip: el middleware de Starlette no tiene brotli
+    middleware.append(
+        Middleware(
+            GZipMiddleware,
+            minimum_size=flask_app.config["COMPRESS_MIN_SIZE"],
+            compresslevel=flask_app.config["COMPRESS_LEVEL"],
+        )
+    )
+
+app = Starlette(
+    routes=routes,
+    middleware=middleware,
+    exception_handlers={
+        InvalidRequest: invalid_request,
+        HasherBusy: hasher_busy,
+        RateLimited: rate_limited,
+    },
+)
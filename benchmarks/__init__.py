@@ -0,0 +1 @@
+"""Benchmarks de la API de citas (no forman parte de la suite de tests)."""
@@ -0,0 +1,60 @@
+"""Benchmark de arranque en frío: importación y primera petición.
+
+Para cada ``APIDOCS_MODE`` lanza ``--runs`` procesos nuevos de Python que
+importan ``application`` y atienden con el cliente de pruebas de Flask una
+primera petición a ``/`` y luego una a ``/apispec_1.json``. Es lo que paga
+un worker recién creado (gunicorn sin --preload, reciclado de workers,
+entornos serverless). Se muestra la mediana de cada fase.
+
+Uso:
+    python -m benchmarks.cold_start --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import application
+t1 = time.perf_counter()
+client = application.app.test_client()
+assert client.get("/").status_code == 200
+t2 = time.perf_counter()
+status = client.get("/apispec_1.json").status_code
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first": t2 - t0, "docs": t3 - t2, "status": status}))
+"""
+
+
+def probe(mode):
+    env = dict(os.environ, APIDOCS_MODE=mode)
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--modes", nargs="+", default=["eager", "lazy", "off"])
+    args = parser.parse_args()
+
+    print(f"{'modo':>6} {'import ms':>10} {'1ª petición ms':>15} {'1er spec ms':>12}")
+    for mode in args.modes:
+        runs = [probe(mode) for _ in range(args.runs)]
+        median = {k: statistics.median(r[k] for r in runs) * 1000 for k in ("import", "first", "docs")}
+        docs = f"{median['docs']:.1f}" if runs[0]["status"] == 200 else "-"
+        print(f"{mode:>6} {median['import']:>10.1f} {median['first']:>15.1f} {docs:>12}")
+
+
+if __name__ == "__main__":
+    main()
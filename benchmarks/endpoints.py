@@ -0,0 +1,235 @@
+"""Benchmark de carga de los endpoints con una mezcla reproducible.
+
+Lanza una mezcla ponderada de peticiones (``/login``, ``/centers``,
+``/date/create``, ``/date/getByUser`` y ``/dates``) contra la app WSGI con el
+cliente de pruebas de Flask, así que mide solo el coste del servidor:
+
+- ``--backend memory``: BD en memoria (mongomock), sin nada instalado.
+- ``--backend mongo``: un mongod real en ``MONGODB_URI``, sobre la base de
+  datos ``--db`` (se vacía al empezar).
+
+La secuencia de operaciones, los usuarios y los huecos se generan a partir
+de ``--seed``: dos ejecuciones con los mismos argumentos lanzan las mismas
+peticiones. Se muestran p50/p95/p99 y peticiones por segundo por endpoint y
+se guardan en JSON para comparar con una ejecución anterior (``--compare``).
+
+Uso:
+    python -m benchmarks.endpoints --backend memory --requests 5000
+    python -m benchmarks.endpoints --backend mongo --concurrency 8 \\
+        --compare benchmarks/results/anterior.json
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import mongomock
+
+import application
+from migrations import ensure_all_indexes, load_migration
+
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+# Peso de cada operación en la mezcla
+DEFAULT_MIX = {"login": 5, "centers": 25, "create": 15, "by_user": 35, "dates": 20}
+PASSWORD = "bench-password"
+
+
+def setup_db(backend, db_name):
+    if backend == "memory":
+        application.resources().client = mongomock.MongoClient()
+        # mongomock no tiene change streams: basta con el contador de versión
+        application.centers_snapshot.change_stream = False
+    application.resources().mongo_settings["db"] = db_name
+
+    client = application.get_client()
+    client.drop_database(db_name)
+    db = client[db_name]
+    ensure_all_indexes(db)
+    load_migration("001_init_clinica.py").seed_centers(db)
+    application.centers_snapshot.invalidate()
+
+
+def register_users(client, count):
+    tokens = {}
+    for i in range(count):
+        username = f"bench{i}"
+        body = {"username": username, "password": PASSWORD, "date": "01/01/1990"}
+        r = client.post("/register", json=body)
+        assert r.status_code == 200, r.get_data(as_text=True)
+        r = client.post("/login", json={"username": username, "password": PASSWORD})
+        tokens[username] = r.get_json()["access_token"]
+    return tokens
+
+
+def plan(args, usernames, centers):
+    """Secuencia de operaciones ``(nombre, usuario, parámetros)`` fija para una semilla."""
+    rng = random.Random(args.seed)
+    names = list(args.mix)
+    weights = [args.mix[n] for n in names]
+    first_day = datetime(2030, 1, 1)
+
+    operations = []
+    for _ in range(args.requests):
+        name = rng.choices(names, weights)[0]
+        user = rng.choice(usernames)
+        slot = first_day + timedelta(days=rng.randrange(args.days), hours=rng.randrange(8, 20))
+        operations.append((name, user, {"center": rng.choice(centers), "slot": slot}))
+    return operations
+
+
+def run_operation(client, tokens, name, user, params):
+    headers = {"Authorization": f"Bearer {tokens[user]}"}
+    if name == "login":
+        return client.post("/login", json={"username": user, "password": PASSWORD})
+    if name == "centers":
+        return client.get("/centers", headers=headers)
+    if name == "create":
+        body = {"center": params["center"], "date": params["slot"].strftime("%d/%m/%Y %H:00:00")}
+        return client.post("/date/create", json=body, headers=headers)
+    if name == "by_user":
+        return client.get("/date/getByUser", headers=headers)
+    if name == "dates":
+        return client.get("/dates?limit=50", headers=headers)
+    raise ValueError(name)
+
+
+def drive(operations, tokens, concurrency):
+    """Reparte la secuencia entre ``concurrency`` hilos; devuelve las muestras."""
+    samples = []
+    lock = threading.Lock()
+
+    def worker(chunk):
+        client = application.app.test_client()
+        local = []
+        for name, user, params in chunk:
+            started = time.perf_counter()
+            response = run_operation(client, tokens, name, user, params)
+            local.append((name, time.perf_counter() - started, response.status_code))
+        with lock:
+            samples.extend(local)
+
+    threads = [
+        threading.Thread(target=worker, args=(operations[i::concurrency],))
+        for i in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def summarize(samples, elapsed):
+    groups = {}
+    for name, latency, status in samples:
+        groups.setdefault(name, []).append((latency, status))
+    groups["total"] = [(latency, status) for _, latency, status in samples]
+
+    summary = {}
+    for name, rows in groups.items():
+        latencies = [latency for latency, _ in rows]
+        statuses = {}
+        for _, status in rows:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        summary[name] = {
+            "requests": len(rows),
+            "throughput": len(rows) / elapsed,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "status": statuses,
+        }
+    return summary
+
+
+def git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True
+        )
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def report(summary, previous=None):
+    print(f"{'endpoint':<10} {'req':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, row in summary.items():
+        line = (
+            f"{name:<10} {row['requests']:>6} {row['throughput']:>9.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+        before = (previous or {}).get(name)
+        if before:
+            change = (row["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+            line += f"   p95 {change:+.1f}% frente a la anterior"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--db", default="ClinicaBench", help="BD del backend mongo")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=30, help="días en los que se reparten las citas")
+    parser.add_argument("--rounds", type=int, default=10, help="coste de bcrypt")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--mix", type=json.loads, default=DEFAULT_MIX, help='pesos en JSON, p. ej. \'{"dates": 1}\''
+    )
+    parser.add_argument("--output", type=Path, help="JSON de resultados (por defecto en benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, help="JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    application.password_hasher.rounds = args.rounds
+    # Todas las peticiones salen de la misma IP: sin límite de peticiones
+    application.app.config["RATE_LIMIT_ENABLED"] = False
+    setup_db(args.backend, args.db)
+    client = application.app.test_client()
+    tokens = register_users(client, args.users)
+    centers = [c["name"] for c in application.get_db()["centros"].find({}, {"name": 1})]
+
+    operations = plan(args, sorted(tokens), centers)
+    drive(operations[: args.warmup], tokens, 1)
+    samples, elapsed = drive(operations[args.warmup:], tokens, args.concurrency)
+    summary = summarize(samples, elapsed)
+
+    previous = None
+    if args.compare:
+        previous = json.loads(args.compare.read_text(encoding="utf-8"))["summary"]
+    report(summary, previous)
+
+    result = {
+        "benchmark": "endpoints",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "args": {k: str(v) if isinstance(v, Path) else v for k, v in vars(args).items()},
+        "elapsed_s": elapsed,
+        "summary": summary,
+    }
+    output = args.output or RESULTS_DIR / f"endpoints-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    print(f"Resultados en {output}")
+
+
+if __name__ == "__main__":
+    main()
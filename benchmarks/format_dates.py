@@ -0,0 +1,79 @@
+"""Micro-benchmark de format_dates: orden en Python frente a orden en Mongo.
+
+Compara la versión anterior de ``format_dates`` (reconstruye la fecha y
+ordena con ``datetime.strptime`` por elemento) con la actual, que recibe el
+cursor ya ordenado por ``slot_start`` y solo da formato. El coste del orden
+en Mongo es el recorrido del índice y no se incluye aquí.
+
+Uso:
+    python -m benchmarks.format_dates --sizes 10000 100000 1000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from application import format_dates
+
+
+def legacy_format_dates(dates):
+    """format_dates antes de ordenar en Mongo (copia para comparar)."""
+    result = []
+    for date in dates:
+        date["date"] = f"{date['day']} {date['hour']}:00:00"
+        del date["day"]
+        del date["hour"]
+        result.append(date)
+
+    result.sort(key=lambda x: datetime.strptime(x["date"], "%d/%m/%Y %H:00:00"))
+    return result
+
+
+def make_dates(size, seed=0):
+    """Documentos como los devuelve Mongo con la proyección de los listados."""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    slots = sorted(start + timedelta(hours=rng.randrange(24 * 365)) for _ in range(size))
+    return [
+        {
+            "username": f"user{i % 1000}",
+            "day": slot.strftime("%d/%m/%Y"),
+            "hour": slot.strftime("%H"),
+            "created_at": "01/01/2025 00:00:00",
+            "center": "Centro de Salud Madrid Norte",
+        }
+        for i, slot in enumerate(slots)
+    ]
+
+
+def best_of(func, make_input, repeat):
+    best = None
+    for _ in range(repeat):
+        data = make_input()
+        started = time.perf_counter()
+        func(data)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'antes (s)':>12} {'ahora (s)':>12} {'mejora':>8}")
+    for size in args.sizes:
+        ordered = make_dates(size)
+        # Sin orden en Mongo los documentos llegan en orden de inserción
+        shuffled = list(ordered)
+        random.Random(1).shuffle(shuffled)
+
+        before = best_of(legacy_format_dates, lambda: [dict(d) for d in shuffled], args.repeat)
+        after = best_of(format_dates, lambda: [dict(d) for d in ordered], args.repeat)
+        print(f"{size:>10} {before:>12.3f} {after:>12.3f} {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
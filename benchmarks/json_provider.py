@@ -0,0 +1,64 @@
+"""Micro-benchmark de la serialización de respuestas JSON.
+
+Compara el proveedor por defecto de Flask (``json`` de la biblioteca
+estándar, el que usaba la app) con ``StdlibProvider`` y ``OrjsonProvider``
+(ver json_provider) al construir la respuesta de un listado de citas ya
+formateado, como hace ``jsonify``. También mide los documentos tal como
+salen de Mongo (con ``_id`` y ``slot_start``), que el proveedor por
+defecto no sabe codificar.
+
+Uso:
+    python -m benchmarks.json_provider --sizes 100 10000 100000
+"""
+import argparse
+from datetime import datetime
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+from application import app, format_dates
+from benchmarks.format_dates import best_of, make_dates
+from json_provider import OrjsonProvider, StdlibProvider, orjson
+
+
+def raw_dates(size):
+    """Documentos completos de ``citas``, sin proyección ni formato."""
+    docs = make_dates(size)
+    for doc in docs:
+        doc["_id"] = ObjectId()
+        doc["slot_start"] = datetime.strptime(f"{doc['day']} {doc['hour']}", "%d/%m/%Y %H")
+        doc["slot_epoch"] = int(doc["slot_start"].timestamp())
+    return docs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    providers = {"flask": DefaultJSONProvider(app), "stdlib": StdlibProvider(app)}
+    if orjson is not None:
+        providers["orjson"] = OrjsonProvider(app)
+
+    print(f"{'filas':>8} {'proveedor':>10} {'formato (ms)':>13} {'crudo (ms)':>11} {'MB/s':>8} {'mejora':>7}")
+    for size in args.sizes:
+        formatted = format_dates(make_dates(size))
+        raw = raw_dates(size)
+        body_size = len(providers["flask"].response(formatted).get_data())
+        baseline = None
+        for name, provider in providers.items():
+            elapsed = best_of(provider.response, lambda: formatted, args.repeat)
+            baseline = baseline or elapsed
+            if name == "flask":
+                raw_ms = "-"
+            else:
+                raw_ms = f"{best_of(provider.response, lambda: raw, args.repeat) * 1000:.2f}"
+            print(
+                f"{size:>8} {name:>10} {elapsed * 1000:>13.2f} {raw_ms:>11} "
+                f"{body_size / elapsed / 1e6:>8.1f} {baseline / elapsed:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Micro-benchmark del coste de comprobar un límite de peticiones.
+
+Mide ``MemoryBuckets.take`` desde uno o varios hilos, con claves repartidas
+entre muchos clientes, y el ``RateLimiter.check`` completo de ``/login``
+(dos reglas: IP y usuario).
+
+Uso:
+    python -m benchmarks.rate_limit --checks 200000 --threads 1 4
+"""
+import argparse
+import threading
+import time
+
+from rate_limit import MemoryBuckets, RateLimiter, parse_limits
+
+
+def bench_take(store, checks, threads, keys):
+    per_thread = checks // threads
+
+    def worker(offset):
+        take = store.take
+        for i in range(per_thread):
+            take(f"login:ip:10.0.{(i + offset) % keys}", 0.001, 1000)
+
+    workers = [threading.Thread(target=worker, args=(n * 7919,)) for n in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return (time.perf_counter() - started) / (per_thread * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=200000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--keys", type=int, default=10000)
+    args = parser.parse_args()
+
+    for threads in args.threads:
+        cost = bench_take(MemoryBuckets(), args.checks, threads, args.keys)
+        print(f"take, {threads} hilo(s): {cost * 1e6:.2f} µs")
+
+    limiter = RateLimiter()
+    # Límites muy altos: se mide la comprobación, no el rechazo
+    limits = parse_limits("ip:100000000/second,username:100000000/second")
+    values = {"ip": "10.0.0.1", "username": "ana"}
+    started = time.perf_counter()
+    for _ in range(args.checks):
+        limiter.check("login", limits, values.get)
+    print(f"check de /login (2 reglas): {(time.perf_counter() - started) / args.checks * 1e6:.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark de emisión de tokens: /login frente a /token/refresh.
+
+Usa la app con el backend en memoria (mongomock) y el cliente de pruebas de
+Flask, así que mide solo el coste del servidor. ``/login`` incluye la
+búsqueda del usuario y la verificación bcrypt; ``/token/refresh`` solo
+valida el token de refresco y firma uno nuevo.
+
+Uso:
+    python -m benchmarks.tokens --requests 200 --rounds 12
+"""
+import argparse
+import json
+import time
+
+import mongomock
+
+import application
+
+
+USER = {"username": "bench", "password": "bench-password", "date": "01/01/2000"}
+
+
+def setup(rounds):
+    application.resources().client = mongomock.MongoClient()
+    application.password_hasher.rounds = rounds
+    # Todas las peticiones salen de la misma IP: sin límite de peticiones
+    application.app.config["RATE_LIMIT_ENABLED"] = False
+    client = application.app.test_client()
+    r = client.post("/register", data=json.dumps(USER), content_type="application/json")
+    assert r.status_code == 200, r.get_data(as_text=True)
+    return client
+
+
+def measure(name, func, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        r = func()
+        assert r.status_code == 200, r.get_data(as_text=True)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<16} {requests / elapsed:>10.1f} req/s {elapsed / requests * 1000:>10.2f} ms/req")
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=12, help="coste de bcrypt")
+    args = parser.parse_args()
+
+    client = setup(args.rounds)
+    credentials = json.dumps({"username": USER["username"], "password": USER["password"]})
+
+    def login():
+        return client.post("/login", data=credentials, content_type="application/json")
+
+    refresh_token = login().get_json()["refresh_token"]
+    headers = {"Authorization": f"Bearer {refresh_token}"}
+
+    def refresh():
+        return client.post("/token/refresh", headers=headers)
+
+    login_rate = measure("/login", login, args.requests)
+    refresh_rate = measure("/token/refresh", refresh, args.requests)
+    print(f"/token/refresh es {refresh_rate / login_rate:.0f}x más rápido que /login")
+
+
+if __name__ == "__main__":
+    main()
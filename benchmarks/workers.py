@@ -0,0 +1,119 @@
+"""Rendimiento de la app WSGI con distintos workers e hilos de gunicorn.
+
+Para cada combinación de ``--workers`` x ``--threads`` arranca gunicorn con
+``gunicorn.conf.py``, lanza peticiones GET concurrentes contra ``--path``
+durante ``--duration`` segundos y muestra peticiones por segundo y
+latencias. Necesita un MongoDB accesible en ``MONGODB_URI`` para las rutas
+que consultan datos.
+
+Uso:
+    python -m benchmarks.workers --workers 1 2 4 --threads 1 4 8 \\
+        --path /centers --token "$TOKEN" --concurrency 32
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise RuntimeError(f"gunicorn no responde en {url}")
+
+
+def drive(url, headers, concurrency, duration):
+    """Peticiones en bucle desde ``concurrency`` hilos; devuelve latencias y errores."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        local = []
+        failed = 0
+        while time.monotonic() < deadline:
+            request = urllib.request.Request(url, headers=headers)
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(request, timeout=10).read()
+                local.append(time.perf_counter() - started)
+            except (urllib.error.URLError, ConnectionError):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+
+def run(workers, threads, args):
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_THREADS=str(threads),
+        GUNICORN_BIND=f"127.0.0.1:{args.port}",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:application"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base = f"http://127.0.0.1:{args.port}"
+        wait_ready(base + "/")
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        latencies, errors = drive(base + args.path, headers, args.concurrency, args.duration)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+    print(
+        f"{workers:>7} {threads:>7} {len(latencies) / args.duration:>10.1f} "
+        f"{statistics.median(latencies) * 1000 if latencies else 0:>9.2f} "
+        f"{p95 * 1000:>9.2f} {errors:>7}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--path", default="/centers")
+    parser.add_argument("--token", default=os.environ.get("BENCH_TOKEN"))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'threads':>7} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'errores':>7}")
+    for workers in args.workers:
+        for threads in args.threads:
+            run(workers, threads, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Snapshot en memoria de la colección ``centros``.
+
+Los centros cambian muy de vez en cuando, pero se consultan en cada
+``/centers`` y en cada reserva. Este módulo mantiene en el proceso una copia
+inmutable indexada por nombre que se renueva:
+
+- cuando caduca el TTL,
+- cuando se llama a ``invalidate()`` (gancho explícito),
+- cuando llega un evento del change stream de ``centros`` (si el despliegue
+  es un replica set),
+- o, si no hay change stream, cuando cambia el contador de versión de la
+  colección ``versiones`` (ver ``versions``), que se comprueba como mucho
+  una vez por ``poll_interval`` y nunca en cada petición.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from types import MappingProxyType
+from datetime import datetime
+from typing import Callable, Mapping, NamedTuple, Optional, Tuple
+
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+
+from versions import bump_version, read_version
+
+
+logger = logging.getLogger(__name__)
+
+CENTERS_VERSION_ID = "centros"
+
+
+class Snapshot(NamedTuple):
+    by_name: Mapping[str, Mapping]
+    centers: Tuple[Mapping, ...]
+    version: int
+    updated_at: Optional[datetime]
+    loaded_at: float
+    # Huella del contenido: cambia con cada recarga que trae otros centros
+    digest: str
+
+
+def bump_centers_version(db: Database) -> None:
+    """Incrementa el contador de versión de centros (invalida todos los procesos)."""
+    bump_version(db, CENTERS_VERSION_ID)
+
+
+def centers_digest(centers) -> str:
+    """Huella estable del contenido de los centros (igual en todos los procesos)."""
+    data = json.dumps([dict(c) for c in centers], sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+class CentersSnapshot:
+    """
+    Copia inmutable de ``centros`` compartida por todo el proceso.
+
+    ``get_db`` se evalúa en cada recarga para seguir al cliente de Mongo
+    actual (los tests lo sustituyen por mongomock).
+    """
+
+    def __init__(
+        self,
+        get_db: Callable[[], Database],
+        ttl: float = 300.0,
+        poll_interval: float = 5.0,
+        change_stream: bool = True,
+    ):
+        self._get_db = get_db
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.change_stream = change_stream
+        self._snapshot: Optional[Snapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watching = False
+
+    # ---------- lectura ----------
+    def peek(self) -> Optional[Snapshot]:
+        """
+        Snapshot vigente si se puede devolver sin tocar Mongo; si no, None.
+
+        La app asíncrona lo usa para llamar a ``get()`` en un hilo solo
+        cuando hace falta ir a la base de datos.
+        """
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is None or now - snapshot.loaded_at > self.ttl:
+            return None
+        if not self._watching and now - self._checked_at > self.poll_interval:
+            return None
+        return snapshot
+
+    def get(self) -> Snapshot:
+        """Snapshot vigente; solo toca Mongo si hay que renovarlo."""
+        fresh = self.peek()
+        if fresh is not None:
+            return fresh
+
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is None or now - snapshot.loaded_at > self.ttl:
+            return self._reload(snapshot)
+
+        if not self._watching and now - self._checked_at > self.poll_interval:
+            self._checked_at = now
+            try:
+                version, _ = read_version(self._get_db(), CENTERS_VERSION_ID)
+            except PyMongoError:
+                logger.exception("No se pudo leer la versión de centros")
+                return snapshot
+            if version != snapshot.version:
+                return self._reload(snapshot)
+
+        return snapshot
+
+    def by_name(self) -> Mapping[str, Mapping]:
+        return self.get().by_name
+
+    def list(self):
+        """Centros en formato de respuesta (sin ``_id``), en orden de inserción."""
+        return [dict(center) for center in self.get().centers]
+
+    # ---------- invalidación ----------
+    def invalidate(self) -> None:
+        """Fuerza que la próxima lectura recargue los centros."""
+        self._snapshot = None
+
+    def reset(self) -> None:
+        """Estado limpio tras un fork: sin snapshot ni hilo del change stream."""
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watching = False
+
+    def _reload(self, stale: Optional[Snapshot]) -> Snapshot:
+        with self._lock:
+            # Otro hilo puede haber recargado mientras esperábamos el lock
+            current = self._snapshot
+            if current is not None and current is not stale:
+                return current
+
+            db = self._get_db()
+            version, updated_at = read_version(db, CENTERS_VERSION_ID)
+            centers = tuple(
+                MappingProxyType(center) for center in db["centros"].find({}, {"_id": 0})
+            )
+            snapshot = Snapshot(
+                by_name=MappingProxyType({c["name"]: c for c in centers}),
+                centers=centers,
+                version=version,
+                updated_at=updated_at,
+                loaded_at=time.monotonic(),
+                digest=centers_digest(centers),
+            )
+            self._snapshot = snapshot
+            self._checked_at = snapshot.loaded_at
+            self._start_watcher()
+            return snapshot
+
+    # ---------- change stream ----------
+    def _start_watcher(self) -> None:
+        if not self.change_stream or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, name="centers-change-stream", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch(self) -> None:
+        try:
+            with self._get_db()["centros"].watch() as stream:
+                self._watching = True
+                # Cambios entre la primera carga y la apertura del stream
+                self.invalidate()
+                for _change in stream:
+                    self.invalidate()
+        except PyMongoError as exc:
+            # Standalone sin replica set: se queda el contador de versión
+            logger.info("Change stream de centros no disponible: %s", exc)
+        finally:
+            self._watching = False
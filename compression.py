@@ -0,0 +1,126 @@
+"""Compresión de respuestas negociada con ``Accept-Encoding``.
+
+Los listados de citas son JSON muy repetitivo (los mismos centros y
+prefijos de fecha en cada elemento) y se comprimen muy bien. Un hook
+``after_request`` comprime con brotli o gzip, según prefiera el cliente:
+
+- Solo tipos comprimibles (``COMPRESS_MIMETYPES``) y respuestas de al menos
+  ``COMPRESS_MIN_SIZE`` bytes: las pequeñas, como ``/profile``, no pagan
+  el coste.
+- Las respuestas en streaming (``?stream=1``, NDJSON) se comprimen sobre la
+  marcha, sin acumular el cuerpo; no tienen umbral porque su tamaño no se
+  conoce de antemano y son las grandes por diseño.
+- El nivel se configura con ``COMPRESS_LEVEL`` (gzip, 1-9) y
+  ``COMPRESS_BR_LEVEL`` (brotli, 0-11).
+- Si se negocia una codificación, la ETag pasa a ser débil (otra
+  codificación, mismo contenido), también cuando el cuerpo no llega al
+  umbral y en los 304, para que el cliente vea la misma ETag y el mismo
+  ``Vary`` al revalidar. ``etags`` usa la comparación débil de
+  If-None-Match, así que los 304 siguen funcionando.
+
+brotli está en ``requirements.txt``; si falta, solo se ofrece gzip.
+"""
+import zlib
+
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encodings):
+    """Codificación con más calidad para el cliente; en empate, brotli."""
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """Interfaz común de gzip y brotli para comprimir por trozos."""
+
+    def __init__(self, encoding, config):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=config["COMPRESS_BR_LEVEL"])
+            self._process = self._compressor.process
+        else:
+            # wbits=31: formato gzip (cabecera y CRC), no zlib
+            self._compressor = zlib.compressobj(config["COMPRESS_LEVEL"], zlib.DEFLATED, 31)
+            self._process = self._compressor.compress
+
+    def compress(self, data):
+        return self._process(data)
+
+    def finish(self):
+        return self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+
+
+def compress_stream(chunks, compressor):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def weaken_etag(response):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+
+
+def compress_response(response):
+    config = current_app.config
+    if response.status_code == 304:
+        # Sin cuerpo, pero sus cabeceras deben coincidir con las del 200
+        if config["COMPRESS_ENABLED"]:
+            response.vary.add("Accept-Encoding")
+            if choose_encoding(request.accept_encodings) is not None:
+                weaken_etag(response)
+        return response
+
+    if (
+        not config["COMPRESS_ENABLED"]
+        or response.mimetype not in config["COMPRESS_MIMETYPES"]
+        or not 200 <= response.status_code < 300
+        or response.status_code == 204
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    # La representación depende de Accept-Encoding aunque esta vez no se comprima
+    response.vary.add("Accept-Encoding")
+
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+    weaken_etag(response)
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, Compressor(encoding, config))
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+        compressor = Compressor(encoding, config)
+        response.set_data(compressor.compress(data) + compressor.finish())
+
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
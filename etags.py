@@ -0,0 +1,78 @@
+"""Peticiones condicionales (ETag / If-None-Match y Last-Modified).
+
+El decorador ``conditional`` pide a una función barata el sello de versión
+del recurso (ver ``versions``) y, si coincide con lo que ya tiene el
+cliente, responde ``304 Not Modified`` sin ejecutar la vista, es decir, sin
+consultar Mongo ni serializar el cuerpo.
+"""
+import zlib
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import current_app, make_response, request
+
+
+Stamp = Tuple[str, Optional[datetime]]
+
+
+def make_etag(tag: str) -> str:
+    """
+    ETag fuerte para ``tag`` y la representación pedida.
+
+    Los parámetros de la query string y el tipo aceptado cambian el cuerpo
+    (paginación, streaming, NDJSON), así que entran en la etiqueta.
+    """
+    variant = request.query_string + b"|" + (request.accept_mimetypes.best or "").encode()
+    if variant == b"|":
+        return tag
+    return f"{tag}-{zlib.crc32(variant):08x}"
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    if request.if_none_match:
+        # Comparación débil (RFC 9110): la versión comprimida tiene ETag débil
+        return request.if_none_match.contains_weak(etag)
+
+    # If-Modified-Since solo se tiene en cuenta sin If-None-Match (RFC 9110)
+    since = request.if_modified_since
+    if since is None or last_modified is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional(get_stamp: Callable[[], Stamp], private: bool = False):
+    """
+    Añade ETag y Last-Modified a las respuestas 200 de la vista y responde
+    304 cuando el cliente ya tiene la versión actual.
+
+    ``get_stamp`` devuelve ``(etiqueta, fecha_de_modificación)``. Con
+    ``private`` la respuesta depende del usuario del token: se marca con
+    ``Cache-Control: private`` y ``Vary: Authorization`` para que ninguna
+    caché compartida la sirva a otro usuario.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            tag, last_modified = get_stamp()
+            etag = make_etag(tag)
+
+            if not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            if private:
+                response.cache_control.private = True
+                response.vary.add("Authorization")
+            return response
+
+        return wrapper
+
+    return decorator
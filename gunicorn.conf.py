@@ -0,0 +1,41 @@
+"""Configuración de gunicorn para la API (app WSGI).
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Todo se puede ajustar con variables de entorno:
+
+- ``WEB_CONCURRENCY``: procesos worker (por defecto 2 x CPUs + 1).
+- ``GUNICORN_THREADS``: hilos por worker (4). Cada hilo atiende una petición
+  y como mucho usa una conexión de Mongo a la vez.
+- ``MONGO_MAX_POOL_SIZE``: conexiones por worker. Si no se indica se ajusta a
+  los hilos + 2 (monitorización y el snapshot de centros), de modo que el
+  total contra Mongo es ``workers x (threads + 2)``.
+- ``MONGO_WAIT_QUEUE_TIMEOUT_MS``: espera máxima por una conexión libre.
+- ``GUNICORN_PRELOAD``: 1 para cargar la app en el maestro antes del fork
+  (arranque y reciclado de workers más rápidos).
+
+Con ``--preload`` la app se importa en el maestro, pero ``create_app`` no
+abre conexiones: cada worker crea su propio MongoClient en el primer uso y
+``post_fork`` descarta cualquier recurso heredado.
+"""
+import multiprocessing
+import os
+
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "30"))
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Se fija antes de importar la app, que lee la configuración del entorno
+os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(threads + 2))
+
+
+def post_fork(server, worker):
+    import application
+
+    application.reset_process_state()
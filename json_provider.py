@@ -0,0 +1,85 @@
+"""Proveedor JSON de la app: orjson, con datetime y ObjectId nativos.
+
+Todas las respuestas JSON pasan por ``app.json``: ``jsonify``, los listados
+en streaming y, en la app ASGI, ``JSONResponse``. ``OrjsonProvider``
+codifica con orjson, varias veces más rápido que ``json`` de la biblioteca
+estándar en los listados grandes, y genera directamente los bytes de la
+respuesta sin pasar por ``str``. También lee los cuerpos de las peticiones.
+
+Los tipos que devuelve Mongo se codifican tal cual, sin preparar antes los
+documentos:
+
+- ``datetime`` y ``date`` en ISO 8601 (``2026-01-02T10:00:00``).
+- ``ObjectId`` como su cadena hexadecimal.
+
+El proveedor se elige con ``JSON_PROVIDER`` (``orjson`` o ``stdlib``).
+``StdlibProvider`` es el de Flask con las mismas reglas para fechas y
+ObjectId, y es el que se usa si orjson no está instalado. Las respuestas
+solo difieren en el orden de las claves (orjson respeta el del documento)
+y en el escape de los caracteres no ASCII.
+"""
+from datetime import date
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+def encode_default(obj):
+    """Tipos que el codificador no conoce; orjson ya trae los de fecha."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    # Como en DefaultJSONProvider: None = sangrado solo en modo debug
+    compact = None
+    sort_keys = False
+    mimetype = "application/json"
+
+    def dumps_bytes(self, obj, **kwargs):
+        option = 0
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        if kwargs.get("newline"):
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(obj, default=encode_default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self.dumps_bytes(obj, indent=indent, newline=True), mimetype=self.mimetype
+        )
+
+
+class StdlibProvider(DefaultJSONProvider):
+    default = staticmethod(encode_default)
+
+    def dumps_bytes(self, obj, **kwargs):
+        return self.dumps(obj, **kwargs).encode("utf-8")
+
+
+PROVIDERS = {"orjson": OrjsonProvider, "stdlib": StdlibProvider}
+
+
+def init_json(app):
+    name = app.config["JSON_PROVIDER"]
+    if name == "orjson" and orjson is None:
+        name = "stdlib"
+    app.json = PROVIDERS[name](app)
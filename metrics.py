@@ -0,0 +1,281 @@
+"""Métricas de la API en formato de texto de Prometheus (``/metrics``).
+
+Registro mínimo en memoria, sin dependencias: contadores, gauges e
+histogramas con etiquetas. Cada observación es una suma bajo un lock, así
+que se puede dejar activo siempre. Cada proceso (worker de gunicorn) lleva
+sus propias métricas; Prometheus las agrega al hacer scrape de cada uno.
+
+Qué se mide:
+
+- Peticiones HTTP por ruta, método y código, su latencia y las que están
+  en curso (hooks ``before_request``/``after_request`` de Flask).
+- Comandos de Mongo por colección y operación y su duración
+  (``CommandListener`` de pymongo).
+- Espera para obtener una conexión del pool de Mongo
+  (``ConnectionPoolListener``).
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+from pymongo import monitoring
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{format_labels(self.labels, k)} {v}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # Por etiquetas: [cuentas por bucket (no acumuladas)..., +Inf, suma]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, *labels):
+        counts = self._values.get(labels)
+        return sum(counts[:-1]) if counts else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for labels, counts in items:
+            total = 0
+            for bound, n in zip(self.buckets + ("+Inf",), counts):
+                total += n
+                le = format_labels(self.labels, labels, [("le", bound)])
+                lines.append(f"{self.name}_bucket{le} {total}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {counts[-1]}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {total}")
+        return lines
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter("http_requests_total", "Peticiones HTTP atendidas.", ("endpoint", "method", "status"))
+)
+HTTP_LATENCY = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Tiempo hasta tener la respuesta (en streaming, hasta la cabecera).",
+        ("endpoint", "method"),
+    )
+)
+HTTP_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "Peticiones en curso."))
+MONGO_COMMANDS = registry.register(
+    Counter(
+        "mongo_commands_total",
+        "Comandos enviados a Mongo.",
+        ("collection", "command", "outcome"),
+    )
+)
+MONGO_LATENCY = registry.register(
+    Histogram(
+        "mongo_command_duration_seconds",
+        "Duración de los comandos de Mongo.",
+        ("collection", "command"),
+    )
+)
+POOL_WAIT = registry.register(
+    Histogram(
+        "mongo_pool_checkout_seconds",
+        "Espera para obtener una conexión del pool de Mongo.",
+        ("address",),
+    )
+)
+POOL_FAILURES = registry.register(
+    Counter(
+        "mongo_pool_checkout_failures_total",
+        "Conexiones del pool que no se pudieron obtener.",
+        ("address", "reason"),
+    )
+)
+
+
+# ================== MONGO ==================
+class CommandMetrics(monitoring.CommandListener):
+    """Cuenta y cronometra los comandos por colección y operación."""
+
+    def __init__(self):
+        # El evento de fin no trae la colección: se guarda al empezar
+        self._pending = {}
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "")
+        else:
+            target = event.command.get(event.command_name)
+            collection = target if isinstance(target, str) else ""
+        self._pending[(event.request_id, event.connection_id)] = collection
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
+
+    def _finish(self, event, outcome):
+        collection = self._pending.pop((event.request_id, event.connection_id), "")
+        MONGO_COMMANDS.inc(collection, event.command_name, outcome)
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Tiempo de espera al sacar una conexión del pool."""
+
+    def connection_checked_out(self, event):
+        POOL_WAIT.observe(event.duration, address(event))
+
+    def connection_check_out_failed(self, event):
+        POOL_FAILURES.inc(address(event), event.reason)
+        POOL_WAIT.observe(event.duration, address(event))
+
+    # El resto de eventos del pool no se miden
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+
+def address(event):
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+def mongo_listeners():
+    return [CommandMetrics(), PoolMetrics()]
+
+
+# ================== FLASK ==================
+def init_metrics(app):
+    """Hooks de petición y ruta ``/metrics`` (si ``METRICS_ENABLED``)."""
+    if not app.config["METRICS_ENABLED"]:
+        return
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        HTTP_IN_FLIGHT.inc()
+
+    @app.after_request
+    def record_response(response):
+        record_request(response.status_code)
+        return response
+
+    @app.teardown_request
+    def finish_request(error=None):
+        if "metrics_start" not in g:
+            return
+        # Excepción sin manejar: la respuesta no ha pasado por after_request
+        if not g.get("metrics_recorded"):
+            record_request(500)
+        HTTP_IN_FLIGHT.dec()
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+
+def record_request(status):
+    if "metrics_start" not in g or g.get("metrics_recorded"):
+        return
+    g.metrics_recorded = True
+    endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+    HTTP_LATENCY.observe(time.perf_counter() - g.metrics_start, endpoint, request.method)
+    HTTP_REQUESTS.inc(endpoint, request.method, str(status))
+
+
+def metrics_view():
+    return registry.render(), 200, {"Content-Type": CONTENT_TYPE}
@@ -0,0 +1,108 @@
+"""Migración: franja horaria nativa en las citas.
+
+Rellena ``slot_start`` (datetime BSON) y ``slot_epoch`` (segundos epoch) en
+las citas que solo tienen ``day``/``hour`` como texto, por lotes para no
+cargar toda la colección en memoria, y crea los índices que permiten
+resolver las consultas por día, semana o rango como recorridos acotados.
+"""
+import os
+from calendar import timegm
+from datetime import datetime
+from typing import Optional
+
+import pymongo
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+
+MONGO_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/")
+DB_NAME = os.environ.get("MONGODB_DB", "Clinica")
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", "1000"))
+
+
+def ensure_slot_indexes(db: Database) -> None:
+    """
+    Índices para las consultas por rango de ``slot_start``.
+
+    Los listados de un centro ordenan por (slot_start, _id): con ``_id`` en
+    el índice el orden sale del recorrido, sin ordenación en memoria. El
+    antiguo ``center_slot_start`` queda cubierto por este y se elimina. Sin
+    centro se usa ``slot_start_id`` (ver 004_pagination_indexes).
+    """
+    db["citas"].create_index(
+        [
+            ("center", pymongo.ASCENDING),
+            ("slot_start", pymongo.ASCENDING),
+            ("_id", pymongo.ASCENDING),
+        ],
+        name="center_slot_start_id",
+    )
+    if "center_slot_start" in db["citas"].index_information():
+        db["citas"].drop_index("center_slot_start")
+
+
+def legacy_slot_fields(doc: dict) -> Optional[dict]:
+    """Calcula los campos de franja a partir de ``day``/``hour`` en texto."""
+    try:
+        slot = datetime.strptime(f"{doc['day']} {doc['hour']}", "%d/%m/%Y %H")
+    except (KeyError, TypeError, ValueError):
+        return None
+    return {"slot_start": slot, "slot_epoch": timegm(slot.timetuple())}
+
+
+def backfill_slot_start(db: Database, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Añade los campos de franja a las citas que no los tienen.
+
+    Recorre las citas pendientes en orden de ``_id`` y aplica las
+    actualizaciones con ``bulk_write`` de ``batch_size`` en ``batch_size``.
+    Es idempotente: si se interrumpe basta con volver a ejecutarla.
+    Devuelve el número de citas actualizadas.
+    """
+    mycol = db["citas"]
+    pending = {"slot_start": {"$exists": False}}
+    updated = 0
+    last_id = None
+
+    while True:
+        query = dict(pending)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        batch = list(
+            mycol.find(query, {"day": 1, "hour": 1})
+            .sort("_id", pymongo.ASCENDING)
+            .limit(batch_size)
+        )
+        if not batch:
+            break
+
+        operations = []
+        for doc in batch:
+            fields = legacy_slot_fields(doc)
+            if fields is not None:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+
+        if operations:
+            updated += mycol.bulk_write(operations, ordered=False).modified_count
+        last_id = batch[-1]["_id"]
+
+    return updated
+
+
+def main() -> None:
+    client = pymongo.MongoClient(MONGO_URI)
+    db: Database = client[DB_NAME]
+
+    ensure_slot_indexes(db)
+    updated = backfill_slot_start(db)
+
+    print(
+        "Migración completada. {n} citas actualizadas en '{db}'.".format(
+            n=updated, db=DB_NAME
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
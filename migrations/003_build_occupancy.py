@@ -0,0 +1,120 @@
+"""Migración: documentos de ocupación por centro y día.
+
+Crea la colección ``ocupacion`` con un índice único sobre (center, day) y la
+reconstruye a partir de las citas no canceladas. Cada documento guarda la
+lista de horas ocupadas, de modo que ``/availability`` se resuelve con una
+única lectura por índice.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime
+
+import pymongo
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+
+MONGO_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/")
+DB_NAME = os.environ.get("MONGODB_DB", "Clinica")
+BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", "1000"))
+
+
+def ensure_occupancy_indexes(db: Database) -> None:
+    """Un documento de ocupación por centro y día."""
+    db["ocupacion"].create_index(
+        [("center", pymongo.ASCENDING), ("day", pymongo.ASCENDING)],
+        unique=True,
+        name="unique_occupancy_per_center_day",
+    )
+
+
+def build_occupancy(db: Database, batch_size: int = BATCH_SIZE) -> int:
+    """
+    Recalcula la ocupación desde ``citas`` (requiere la migración 002).
+
+    Las citas se leen en streaming y se agrupan por (centro, día) en memoria,
+    que crece con el número de días con citas y no con el de citas. Se puede
+    ejecutar con la app en marcha (ver los comentarios de las escrituras).
+    Devuelve el número de documentos de ocupación escritos.
+    """
+    # Ocupación anterior al recorrido: lo que sobre se quitará al final
+    previous = {
+        (doc["center"], doc["day"]): doc
+        for doc in db["ocupacion"].find({}, {"center": 1, "day": 1, "hours": 1})
+    }
+
+    occupancy = defaultdict(set)
+    cursor = db["citas"].find(
+        {"cancel": {"$ne": 1}, "slot_start": {"$exists": True}},
+        {"_id": 0, "center": 1, "slot_start": 1},
+        batch_size=batch_size,
+    )
+    for doc in cursor:
+        slot = doc["slot_start"]
+        day = slot.replace(hour=0, minute=0, second=0, microsecond=0)
+        occupancy[(doc["center"], day)].add(slot.hour)
+
+    # Se escriben diferencias ($addToSet / $pull) en el sitio, nunca
+    # documentos enteros, para que /availability no vea la colección vacía a
+    # medias y no se pierdan las horas que la app marca (mark_slot) mientras
+    # tanto. Solo se quitan las horas que ya estaban antes del recorrido y no
+    # tienen cita; una hora liberada y vuelta a reservar justo en ese
+    # intervalo puede quedar libre hasta la siguiente reconstrucción (el
+    # índice único de citas sigue impidiendo la doble reserva).
+    # (truncado a milisegundos, la precisión de las fechas BSON)
+    now = datetime.utcnow()
+    rebuilt_at = now.replace(microsecond=now.microsecond // 1000 * 1000)
+    additions = [
+        UpdateOne(
+            {"center": center, "day": day},
+            {"$addToSet": {"hours": {"$each": sorted(hours)}}, "$set": {"rebuilt_at": rebuilt_at}},
+            upsert=True,
+        )
+        for (center, day), hours in occupancy.items()
+    ]
+    write_batches(db, additions, batch_size)
+
+    # Documentos que ya no tienen citas y nadie ha tocado: se borran enteros
+    stale = [
+        {"_id": doc["_id"], "hours": doc.get("hours")}
+        for key, doc in previous.items()
+        if key not in occupancy
+    ]
+    for start in range(0, len(stale), batch_size):
+        db["ocupacion"].delete_many(
+            {"$or": stale[start:start + batch_size], "rebuilt_at": {"$ne": rebuilt_at}}
+        )
+
+    removals = []
+    for key, doc in previous.items():
+        extra = set(doc.get("hours") or ()) - occupancy.get(key, set())
+        if extra:
+            removals.append(
+                UpdateOne({"_id": doc["_id"]}, {"$pull": {"hours": {"$in": sorted(extra)}}})
+            )
+    write_batches(db, removals, batch_size)
+
+    return len(additions)
+
+
+def write_batches(db: Database, operations: list, batch_size: int) -> None:
+    for start in range(0, len(operations), batch_size):
+        db["ocupacion"].bulk_write(operations[start:start + batch_size], ordered=False)
+
+
+def main() -> None:
+    client = pymongo.MongoClient(MONGO_URI)
+    db: Database = client[DB_NAME]
+
+    ensure_occupancy_indexes(db)
+    written = build_occupancy(db)
+
+    print(
+        "Migración completada. {n} documentos de ocupación en '{db}'.".format(
+            n=written, db=DB_NAME
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
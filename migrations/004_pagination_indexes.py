@@ -0,0 +1,50 @@
+"""Migración: índices para la paginación keyset de citas.
+
+``/dates`` y ``/date/getByUser`` paginan ordenando por (slot_start, _id).
+Con estos índices cada página es un recorrido acotado que empieza en el
+cursor, sin ordenación en memoria ni ``skip``. ``slot_start_id`` también
+resuelve los rangos sin centro, así que el índice simple ``slot_start`` de
+versiones anteriores sobra (solo encarece cada reserva) y se elimina.
+"""
+import os
+
+import pymongo
+from pymongo.database import Database
+
+
+MONGO_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/")
+DB_NAME = os.environ.get("MONGODB_DB", "Clinica")
+
+
+def ensure_pagination_indexes(db: Database) -> None:
+    """
+    Índices (slot_start, _id) y (username, slot_start, _id) en ``citas``; el
+    simple ``slot_start``, si existe, se elimina.
+    """
+    db["citas"].create_index(
+        [("slot_start", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+        name="slot_start_id",
+    )
+    db["citas"].create_index(
+        [
+            ("username", pymongo.ASCENDING),
+            ("slot_start", pymongo.ASCENDING),
+            ("_id", pymongo.ASCENDING),
+        ],
+        name="username_slot_start_id",
+    )
+    if "slot_start" in db["citas"].index_information():
+        db["citas"].drop_index("slot_start")
+
+
+def main() -> None:
+    client = pymongo.MongoClient(MONGO_URI)
+    db: Database = client[DB_NAME]
+
+    ensure_pagination_indexes(db)
+
+    print("Migración completada. Índices de paginación creados en '{db}'.".format(db=DB_NAME))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Migración: colección ``rate_limits`` del límite de peticiones compartido.
+
+Solo hace falta con ``RATE_LIMIT_BACKEND=mongo``. Cada documento es una
+cubeta (``_id`` = ruta, clave y valor) y el índice TTL sobre
+``expires_at`` borra las que ya se han rellenado del todo.
+"""
+import os
+
+import pymongo
+from pymongo.database import Database
+
+
+MONGO_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/")
+DB_NAME = os.environ.get("MONGODB_DB", "Clinica")
+
+
+def ensure_rate_limit_indexes(db: Database) -> None:
+    """Índice TTL que caduca cada cubeta en su ``expires_at``."""
+    db["rate_limits"].create_index(
+        [("expires_at", pymongo.ASCENDING)],
+        expireAfterSeconds=0,
+        name="rate_limits_ttl",
+    )
+
+
+def main() -> None:
+    client = pymongo.MongoClient(MONGO_URI)
+    db: Database = client[DB_NAME]
+
+    ensure_rate_limit_indexes(db)
+
+    print("Migración completada. Índice TTL de rate_limits creado en '{db}'.".format(db=DB_NAME))
+
+
+if __name__ == "__main__":
+    main()
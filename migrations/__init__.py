@@ -0,0 +1,36 @@
+"""Scripts de migración de la base de datos Clinica.
+
+Cada script se ejecuta por separado (``python migrations/001_init_clinica.py``).
+Como sus nombres empiezan por número no se pueden importar con ``import``;
+``load_migration`` los carga como módulos para reutilizar sus funciones
+desde la app, los tests y los benchmarks.
+"""
+import importlib.util
+from pathlib import Path
+
+from pymongo.database import Database
+
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent
+
+
+def load_migration(filename):
+    """Carga ``migrations/<filename>`` como módulo."""
+    path = MIGRATIONS_DIR / filename
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def ensure_all_indexes(db: Database) -> None:
+    """
+    Crea todos los índices de los que depende la API (create_index es
+    idempotente). Sin ``unique_date_per_center`` dos reservas del mismo
+    hueco se insertarían las dos.
+    """
+    load_migration("001_init_clinica.py").ensure_indexes(db)
+    load_migration("002_backfill_slot_start.py").ensure_slot_indexes(db)
+    load_migration("003_build_occupancy.py").ensure_occupancy_indexes(db)
+    load_migration("004_pagination_indexes.py").ensure_pagination_indexes(db)
+    load_migration("005_rate_limits.py").ensure_rate_limit_indexes(db)
@@ -0,0 +1,95 @@
+"""Hash de contraseñas con bcrypt en un pool de hilos acotado.
+
+bcrypt es deliberadamente lento. Hacerlo en el hilo de la petición permite
+que una avalancha de logins ocupe todos los workers. Aquí el trabajo se
+manda a un pool de tamaño fijo (bcrypt libera el GIL, así que los hilos
+corren en paralelo) con una cola limitada: si no hay hueco en
+``queue_timeout`` segundos se lanza ``HasherBusy`` y la API responde 503.
+
+El coste (``rounds``) es configurable. ``needs_rehash`` indica si un hash
+guardado se hizo con otro coste para actualizarlo tras un login correcto.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """No hay hueco en el pool de bcrypt dentro del tiempo de espera."""
+
+
+class PasswordHasher:
+    """
+    Pool de bcrypt compartido por el proceso.
+
+    Como mucho ``pool_size`` hashes se calculan a la vez y otros
+    ``queue_size`` esperan turno; el resto de peticiones esperan un hueco
+    hasta ``queue_timeout`` segundos. El pool se crea en el primer uso para
+    que cada proceso (p. ej. cada worker tras un fork) tenga el suyo.
+    """
+
+    def __init__(
+        self,
+        rounds: int = 12,
+        pool_size: Optional[int] = None,
+        queue_size: int = 32,
+        queue_timeout: float = 2.0,
+    ):
+        self.rounds = rounds
+        self.pool_size = pool_size or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[threading.BoundedSemaphore] = None
+        self._lock = threading.Lock()
+
+    def hash(self, password: str) -> str:
+        hashed = self._run(bcrypt.hashpw, password.encode("utf-8"), bcrypt.gensalt(self.rounds))
+        return hashed.decode("utf-8")
+
+    def check(self, password: str, hashed: str) -> bool:
+        return self._run(bcrypt.checkpw, password.encode("utf-8"), hashed.encode("utf-8"))
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True si ``hashed`` no usa el coste configurado ($2b$<coste>$...)."""
+        try:
+            return int(hashed.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self) -> None:
+        """Cierra el pool; el siguiente uso crea uno nuevo."""
+        with self._lock:
+            executor, self._executor, self._slots = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def reset(self) -> None:
+        """
+        Olvida el pool sin cerrarlo: tras un fork sus hilos no existen en el
+        proceso hijo, que creará uno nuevo en el primer uso.
+        """
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _run(self, func, *args):
+        executor, slots = self._pool()
+        if not slots.acquire(timeout=self.queue_timeout):
+            raise HasherBusy()
+        try:
+            return executor.submit(func, *args).result()
+        finally:
+            slots.release()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.pool_size, thread_name_prefix="bcrypt"
+                )
+                self._slots = threading.BoundedSemaphore(self.pool_size + self.queue_size)
+            return self._executor, self._slots
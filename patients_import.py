@@ -0,0 +1,160 @@
+"""Importación masiva de pacientes desde CSV o NDJSON.
+
+Pensada para dar de alta una clínica nueva sin pasar miles de veces por
+``POST /register``:
+
+- El fichero se lee en streaming, por lotes de ``batch_size`` registros.
+- Cada registro se valida con las mismas reglas que ``/register``
+  (``services.parse_registration``); los incorrectos se informan y se
+  saltan.
+- Las contraseñas de cada lote se hashean con bcrypt en un pool de procesos
+  que usa todos los núcleos.
+- Cada lote se escribe con un ``insert_many`` sin orden. Los usuarios que
+  ya existen chocan con el índice único de ``username`` y se cuentan como
+  duplicados.
+- Tras cada lote se guarda en un fichero de control cuántos registros se
+  han procesado. Si la importación se interrumpe, al relanzarla continúa
+  desde ahí; repetir el último lote es inocuo por el índice único.
+
+Se usa con ``flask --app application import-patients pacientes.csv``.
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+import bcrypt
+from pymongo.errors import BulkWriteError
+
+from services import InvalidRequest, collided_indexes, parse_registration
+
+
+FORMATS = ("csv", "ndjson")
+
+
+def read_records(path, fmt=None):
+    """
+    Registros del fichero como diccionarios, sin cargarlo entero en memoria.
+
+    Una línea NDJSON que no es JSON válido se entrega como ``InvalidRequest``
+    en su posición, para rechazarla como cualquier otro registro incorrecto
+    sin abortar la importación ni descolocar la numeración del fichero de
+    control.
+    """
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato desconocido: {fmt!r}")
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                # Una celda vacía equivale a un campo ausente en /register
+                yield {key: value or None for key, value in row.items()}
+        else:
+            for line in f:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield InvalidRequest("Invalid JSON")
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["done"]
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path, done):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"done": done}, f)
+    os.replace(tmp, path)
+
+
+def import_patients(
+    db,
+    path,
+    fmt=None,
+    batch_size=1000,
+    workers=None,
+    rounds=12,
+    checkpoint=None,
+    restart=False,
+    report=print,
+):
+    """
+    Importa los pacientes de ``path`` en la colección ``usuarios``.
+
+    ``report`` recibe los mensajes de progreso y de registros rechazados.
+    Devuelve los contadores de la importación.
+    """
+    checkpoint = checkpoint or path + ".progress"
+    done = 0 if restart else load_checkpoint(checkpoint)
+    stats = {"read": done, "inserted": 0, "duplicates": 0, "invalid": 0}
+    if done:
+        report(f"Reanudando tras {done} registros")
+
+    records = enumerate(islice(read_records(path, fmt), done, None), start=done + 1)
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+
+            users, passwords = [], []
+            for number, record in batch:
+                try:
+                    if isinstance(record, InvalidRequest):
+                        raise record
+                    if not isinstance(record, dict):
+                        raise InvalidRequest()
+                    user = parse_registration(record)
+                    if not isinstance(record["password"], str):
+                        raise InvalidRequest()
+                except InvalidRequest as exc:
+                    stats["invalid"] += 1
+                    report(f"Registro {number} rechazado: {exc.msg}")
+                    continue
+                users.append(user)
+                passwords.append(record["password"])
+
+            chunksize = max(1, len(passwords) // (workers * 4))
+            hashes = pool.map(hash_password, passwords, repeat(rounds), chunksize=chunksize)
+            for user, hashed in zip(users, hashes):
+                user["password"] = hashed
+
+            if users:
+                try:
+                    db["usuarios"].insert_many(users, ordered=False)
+                    stats["inserted"] += len(users)
+                except BulkWriteError as exc:
+                    duplicates = len(collided_indexes(exc))
+                    stats["duplicates"] += duplicates
+                    stats["inserted"] += len(users) - duplicates
+
+            stats["read"] += len(batch)
+            save_checkpoint(checkpoint, stats["read"])
+
+            rate = (stats["read"] - done) / (time.perf_counter() - started)
+            report(
+                f"{stats['read']} registros: {stats['inserted']} insertados, "
+                f"{stats['duplicates']} duplicados, {stats['invalid']} rechazados "
+                f"({rate:.0f} reg/s)"
+            )
+
+    # Terminada: la próxima importación del mismo fichero empieza de cero
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    return stats
@@ -0,0 +1,206 @@
+"""Límite de peticiones por IP, usuario o identidad JWT.
+
+``/login`` y ``/register`` no requieren autenticación y cada llamada gasta
+un bcrypt completo: sin límite, un solo cliente puede ocupar toda la CPU.
+
+Cada regla es una cubeta de tokens de ``burst`` tokens que se rellena a
+``rate`` por segundo. Se implementa como GCRA: por clave solo se guarda el
+instante teórico de la siguiente llegada (``tat``), que equivale al nivel
+de la cubeta y se actualiza con una comparación y una suma.
+
+Las reglas se configuran por ruta con cadenas como
+``"ip:30/minute,username:10/minute"`` (opcionalmente ``...:ráfaga``). Las
+claves disponibles son ``ip``, ``username`` (del cuerpo JSON) e
+``identity`` (identidad del token JWT, si lo hay).
+
+Backends:
+
+- ``MemoryBuckets``: en memoria del proceso, con el diccionario repartido
+  en varias franjas con su propio lock para que los hilos no compitan.
+- ``MongoBuckets``: compartido entre workers en la colección
+  ``rate_limits`` (índice TTL de la migración 005), con actualización
+  optimista por comparación del ``tat``. Sus llamadas son síncronas: la app
+  ASGI las hace en un hilo.
+
+Detrás de un proxy (nginx, un balanceador) la IP de la conexión es la del
+proxy y todos los clientes compartirían cubeta. ``PROXY_COUNT`` indica
+cuántos proxies de confianza hay delante: la app WSGI aplica ``ProxyFix`` y
+la ASGI lee ``X-Forwarded-For`` con la misma regla (``client_ip``). Con
+uvicorn, si se usa ``--forwarded-allow-ips``, ``PROXY_COUNT`` debe quedar
+a 0 para no aplicar la cabecera dos veces. Sin proxy ha de ser 0: si no,
+cualquier cliente elige su IP con la cabecera.
+"""
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from functools import wraps
+from typing import NamedTuple
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from pymongo.errors import DuplicateKeyError
+
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+KEYS = ("ip", "username", "identity")
+
+
+class RateLimited(Exception):
+    """Se ha superado un límite; ``retry_after`` en segundos."""
+
+    def __init__(self, retry_after):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+    def headers(self):
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class Limit(NamedTuple):
+    key: str
+    interval: float  # segundos entre tokens
+    burst: int
+
+
+def parse_limits(spec):
+    """``"ip:30/minute,username:10/minute:20"`` -> lista de ``Limit``."""
+    limits = []
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, rate, *burst = part.split(":")
+        count, period = rate.split("/")
+        if key not in KEYS or period not in PERIODS:
+            raise ValueError(f"Límite no válido: {part!r}")
+        count = int(count)
+        limits.append(Limit(key, PERIODS[period] / count, int(burst[0]) if burst else count))
+    return limits
+
+
+# ================== BACKENDS ==================
+class MemoryBuckets:
+    # Por encima de este tamaño una franja purga las claves ya rellenas
+    MAX_KEYS = 10000
+
+    def __init__(self, stripes=64):
+        self._stripes = [(threading.Lock(), {}) for _ in range(stripes)]
+
+    def take(self, key, interval, burst, now=None):
+        """Consume un token; devuelve 0 o los segundos que faltan para tenerlo."""
+        now = time.monotonic() if now is None else now
+        lock, tats = self._stripes[hash(key) % len(self._stripes)]
+        with lock:
+            tat = max(tats.get(key, now), now)
+            wait = tat - now - interval * (burst - 1)
+            if wait > 0:
+                return wait
+            if len(tats) >= self.MAX_KEYS and key not in tats:
+                for stale in [k for k, t in tats.items() if t <= now]:
+                    del tats[stale]
+            tats[key] = tat + interval
+            return 0
+
+    def reset(self):
+        self._stripes = [(threading.Lock(), {}) for _ in self._stripes]
+
+
+class MongoBuckets:
+    ATTEMPTS = 5
+
+    def __init__(self, get_db):
+        self.get_db = get_db
+
+    def take(self, key, interval, burst, now=None):
+        now = time.time() if now is None else now
+        collection = self.get_db()["rate_limits"]
+
+        for _ in range(self.ATTEMPTS):
+            doc = collection.find_one({"_id": key}, {"tat": 1})
+            tat = max(doc["tat"], now) if doc else now
+            wait = tat - now - interval * (burst - 1)
+            if wait > 0:
+                return wait
+
+            new = {
+                "tat": tat + interval,
+                "expires_at": datetime.fromtimestamp(tat + interval, timezone.utc),
+            }
+            if doc is None:
+                try:
+                    collection.insert_one({"_id": key, **new})
+                    return 0
+                except DuplicateKeyError:
+                    continue
+            # Solo gana si nadie ha movido el tat desde que se leyó
+            if collection.update_one({"_id": key, "tat": doc["tat"]}, {"$set": new}).modified_count:
+                return 0
+
+        # Demasiada contención en la misma clave: se trata como cubeta vacía
+        return interval
+
+    def reset(self):
+        pass
+
+
+# ================== LIMITADOR ==================
+class RateLimiter:
+    def __init__(self, store=None):
+        self.store = store or MemoryBuckets()
+
+    def check(self, route, limits, get_value):
+        """
+        Aplica ``limits`` a la petición. ``get_value(clave)`` devuelve el valor
+        de la clave (IP, usuario...) o None si no aplica. Lanza ``RateLimited``.
+        """
+        for limit in limits:
+            value = get_value(limit.key)
+            if value is None:
+                continue
+            wait = self.store.take(f"{route}:{limit.key}:{value}", limit.interval, limit.burst)
+            if wait > 0:
+                raise RateLimited(wait)
+
+    def reset(self):
+        self.store.reset()
+
+
+def client_ip(remote_addr, forwarded_for, proxies):
+    """
+    IP del cliente detrás de ``proxies`` proxies de confianza: la entrada
+    ``-proxies`` de ``X-Forwarded-For``, como ``ProxyFix(x_for=proxies)``.
+    """
+    if proxies and forwarded_for:
+        hops = [hop.strip() for hop in forwarded_for.split(",")]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return remote_addr
+
+
+def request_value(key):
+    """Valor de ``key`` para la petición Flask en curso."""
+    if key == "ip":
+        # Ya corregida por ProxyFix si PROXY_COUNT > 0
+        return request.remote_addr
+    if key == "username":
+        body = request.get_json(silent=True)
+        username = body.get("username") if isinstance(body, dict) else None
+        return username if isinstance(username, str) else None
+    if key == "identity":
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    return None
+
+
+def rate_limited(limiter, route):
+    """Aplica a la vista los límites de ``RATE_LIMITS[route]``."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            if config["RATE_LIMIT_ENABLED"]:
+                limiter.check(route, config["RATE_LIMITS"].get(route, ()), request_value)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,436 @@
+"""Lógica de las rutas compartida por la app WSGI y la ASGI.
+
+Aquí está todo lo que no depende ni del framework web ni del driver de
+Mongo: validación de los datos de entrada, construcción de filtros y
+actualizaciones, cursores de paginación y formato de las respuestas.
+``application.py`` (Flask + pymongo) y ``asgi.py`` (Starlette +
+``AsyncMongoClient``) solo añaden la lectura de la petición y la ejecución
+de las operaciones en Mongo.
+
+Los errores de validación se lanzan como ``InvalidRequest`` y cada app los
+convierte en ``{"msg": ...}`` con su código de estado.
+"""
+import base64
+import json
+from calendar import timegm
+from datetime import datetime, timedelta
+
+import pymongo
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import BulkWriteError
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+
+SLOT_FORMAT = "%d/%m/%Y %H:00:00"
+DAY_FORMAT = "%d/%m/%Y"
+
+# Orden de los listados de citas; lo sirven los índices de la migración 004
+DATE_SORT = [("slot_start", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]
+# Los campos de franja solo se usan para consultar y ordenar
+DATE_PROJECTION = {"_id": 0, "slot_start": 0, "slot_epoch": 0}
+PROFILE_PROJECTION = {"_id": 0, "password": 0}
+# Campos que se pueden pedir con ?fields= y los campos de Mongo de cada uno
+DATE_FIELDS = {
+    "username": ("username",),
+    "center": ("center",),
+    "date": ("day", "hour"),
+    "created_at": ("created_at",),
+}
+PROFILE_FIELDS = {
+    field: (field,) for field in ("username", "name", "lastname", "email", "phone", "date")
+}
+LIVE = {"cancel": {"$ne": 1}}
+
+
+class InvalidRequest(Exception):
+    """Petición incorrecta; ``msg`` es el mensaje que se devuelve al cliente."""
+
+    def __init__(self, msg="Bad request", status=400):
+        super().__init__(msg)
+        self.msg = msg
+        self.status = status
+
+
+# ================== FECHAS ==================
+def parse_slot(value):
+    """Convierte "DD/MM/YYYY HH:00:00" en datetime."""
+    try:
+        return datetime.strptime(value, SLOT_FORMAT)
+    except (TypeError, ValueError):
+        raise InvalidRequest("Invalid date format")
+
+
+def slot_key(slot):
+    """Campos de texto day/hour que forman el índice único de citas."""
+    return {"day": slot.strftime(DAY_FORMAT), "hour": slot.strftime("%H")}
+
+
+def slot_fields(slot):
+    """Campos nativos del hueco: datetime BSON y segundos epoch (UTC)."""
+    return {"slot_start": slot, "slot_epoch": timegm(slot.timetuple())}
+
+
+def parse_day(value):
+    """
+    Convierte el día recibido en un datetime a medianoche.
+
+    Acepta "DD/MM/YYYY" o, por compatibilidad, un entero 1-31 que se
+    interpreta como día del mes actual.
+    """
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, DAY_FORMAT)
+        except ValueError:
+            raise InvalidRequest()
+
+    if isinstance(value, int) and not isinstance(value, bool):
+        today = datetime.now()
+        try:
+            return datetime(today.year, today.month, value)
+        except ValueError:
+            raise InvalidRequest()
+
+    raise InvalidRequest()
+
+
+def day_bounds(day):
+    return day, day + timedelta(days=1)
+
+
+def week_bounds(day):
+    """Semana de lunes a domingo que contiene ``day``."""
+    start = day - timedelta(days=day.weekday())
+    return start, start + timedelta(days=7)
+
+
+def parse_range(body):
+    start = parse_slot(body.get("start", None))
+    end = parse_slot(body.get("end", None))
+    if end <= start:
+        raise InvalidRequest()
+    return start, end
+
+
+def range_query(start, end, center=None):
+    """
+    Citas no canceladas con slot_start en [start, end).
+
+    Con centro se resuelve con el índice (center, slot_start, _id) y sin él con
+    (slot_start, _id); en ambos casos es un recorrido acotado.
+    """
+    query = {"slot_start": {"$gte": start, "$lt": end}, **LIVE}
+    if center is not None:
+        query["center"] = center
+    return query
+
+
+# ================== USUARIOS ==================
+def parse_registration(body):
+    """Datos de ``/register`` validados, sin la contraseña."""
+    try:
+        date = datetime.strptime(body.get("date", None), DAY_FORMAT).strftime(DAY_FORMAT)
+    except (TypeError, ValueError):
+        raise InvalidRequest("Invalid date format")
+
+    if body.get("username", None) is None or body.get("password", None) is None:
+        raise InvalidRequest()
+
+    return {
+        "username": body.get("username", None),
+        "name": body.get("name", None),
+        "lastname": body.get("lastname", None),
+        "email": body.get("email", None),
+        "phone": body.get("phone", None),
+        "date": date,
+    }
+
+
+# ================== RESERVAS ==================
+def booking_write(username, center, slot):
+    """
+    Filtro y actualización de la reserva atómica de un hueco.
+
+    Se ejecuta como ``update_one(..., upsert=True)``. El índice único
+    unique_date_per_center (day, hour, center) garantiza que solo una
+    petición se queda el hueco. El filtro con cancel=1 permite reutilizar
+    una cita cancelada; si el hueco está ocupado el upsert intenta insertar
+    y falla con clave duplicada.
+    """
+    return (
+        {**slot_key(slot), "center": center, "cancel": 1},
+        {"$set": new_booking(username, slot), "$unset": {"cancel": ""}},
+    )
+
+
+def new_booking(username, slot):
+    return {
+        "username": username,
+        "created_at": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+        **slot_fields(slot),
+    }
+
+
+def booking_doc(username, center, slot):
+    """Documento completo de una cita nueva, igual al que crea el upsert."""
+    return {**slot_key(slot), "center": center, **new_booking(username, slot)}
+
+
+def cancel_filter(center, slot):
+    return {**slot_key(slot), "center": center}
+
+
+def occupancy_write(center, slot, taken):
+    """
+    Filtro y actualización del documento de ocupación del centro y día
+    (colección "ocupacion", una lista de horas por documento).
+    """
+    day = slot.replace(hour=0, minute=0, second=0, microsecond=0)
+    if taken:
+        return {"center": center, "day": day}, {"$addToSet": {"hours": slot.hour}}
+    return {"center": center, "day": day}, {"$pull": {"hours": slot.hour}}
+
+
+def occupancy_batch(slots, taken=True):
+    """
+    Escrituras de ocupación para varios huecos ``(centro, hueco)``: una por
+    centro y día, con todas sus horas en un ``$addToSet``/``$each`` (o un
+    ``$pull``/``$in`` al liberarlas).
+    """
+    hours = {}
+    for center, slot in slots:
+        day = slot.replace(hour=0, minute=0, second=0, microsecond=0)
+        hours.setdefault((center, day), []).append(slot.hour)
+
+    writes = []
+    for (center, day), h in hours.items():
+        if taken:
+            update = {"$addToSet": {"hours": {"$each": sorted(h)}}}
+        else:
+            update = {"$pull": {"hours": {"$in": sorted(h)}}}
+        writes.append(({"center": center, "day": day}, update))
+    return writes
+
+
+def availability_payload(center, day, doc):
+    taken = set(doc["hours"]) if doc else set()
+    return {
+        "center": center,
+        "day": day.strftime(DAY_FORMAT),
+        "taken": [f"{h:02d}" for h in sorted(taken)],
+        "free": [f"{h:02d}" for h in range(24) if h not in taken],
+    }
+
+
+# ================== OPERACIONES EN LOTE ==================
+def parse_bulk(body, key, max_items):
+    """Lista de elementos de ``body[key]``; entre 1 y ``max_items`` objetos."""
+    items = body.get(key, None)
+    if not isinstance(items, list) or not 0 < len(items) <= max_items:
+        raise InvalidRequest()
+    if not all(isinstance(item, dict) for item in items):
+        raise InvalidRequest()
+    return items
+
+
+def plan_bookings(items, centers):
+    """
+    Valida las reservas de ``/date/bulkCreate`` sin ir a Mongo.
+
+    Devuelve el resultado de cada elemento, en el orden recibido, y la lista
+    ``(resultado, hueco)`` de los que hay que insertar. Los centros se
+    comprueban contra ``centers`` (el snapshot en memoria); un centro que no
+    es una cadena cuenta como desconocido.
+    """
+    results, pending = [], []
+    for item in items:
+        center = item.get("center", None)
+        date = item.get("date", None)
+        result = {"center": center, "date": date}
+        results.append(result)
+
+        if not isinstance(center, str) or center not in centers:
+            result["status"] = "center_not_found"
+            continue
+        try:
+            slot = parse_slot(date)
+        except InvalidRequest:
+            result["status"] = "invalid_date"
+            continue
+
+        result["status"] = "created"
+        pending.append((result, slot))
+    return results, pending
+
+
+def collided_indexes(error: BulkWriteError):
+    """
+    Posiciones del lote que chocaron con el índice único. Cualquier otro
+    error de escritura se relanza.
+    """
+    errors = error.details.get("writeErrors", [])
+    if any(e["code"] != 11000 for e in errors):
+        raise error
+    return [e["index"] for e in errors]
+
+
+def bulk_cancel_query(username, body, max_items):
+    """
+    Filtro de las citas a cancelar en ``/date/bulkDelete``.
+
+    El cuerpo trae una lista ``dates`` de pares {center, date} o un rango
+    ``start``/``end`` (con ``center`` opcional). El filtro exige que las
+    citas sean de ``username``, así que la comprobación de propiedad se hace
+    en la propia escritura y las citas de otros simplemente no coinciden.
+    """
+    if "dates" in body:
+        items = parse_bulk(body, "dates", max_items)
+        slots = [
+            {**slot_key(parse_slot(item.get("date", None))), "center": item.get("center", None)}
+            for item in items
+        ]
+        query = {"$or": slots, **LIVE}
+    else:
+        query = range_query(*parse_range(body), body.get("center", None))
+    return {**query, "username": username}
+
+
+def cancelled_query(query):
+    """Las mismas citas que ``query`` una vez canceladas."""
+    return {**query, "cancel": 1}
+
+
+def bulk_booking_payload(results):
+    created = sum(1 for r in results if r["status"] == "created")
+    return {"created": created, "results": results}
+
+
+# ================== PROYECCIÓN ==================
+def parse_fields(args, allowed, default):
+    """
+    Proyección de Mongo para ``?fields=a,b`` (por defecto, ``default``).
+
+    Cada campo pedido tiene que estar en ``allowed``, que da los campos de
+    Mongo con que se construye (``date`` sale de ``day`` y ``hour``). Así
+    solo salen de Mongo, pasan por format_dates y viajan en la respuesta
+    los campos que el cliente usa.
+    """
+    value = args.get("fields", None)
+    if value is None:
+        return default
+
+    projection = {"_id": 0}
+    for field in value.split(","):
+        field = field.strip()
+        if field not in allowed:
+            raise InvalidRequest("Invalid fields")
+        projection.update(dict.fromkeys(allowed[field], 1))
+    return projection
+
+
+def page_projection(projection):
+    """La paginación necesita además la clave del cursor (slot_start, _id)."""
+    if projection is DATE_PROJECTION:
+        return None
+    return {**projection, "_id": 1, "slot_start": 1}
+
+
+# ================== PAGINACIÓN ==================
+def encode_cursor(doc):
+    """Cursor opaco con la clave (slot_start, _id) del último elemento."""
+    slot = doc.get("slot_start")
+    key = {"s": slot.isoformat() if slot else None, "i": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """Filtro keyset para continuar justo después de ``cursor``."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        slot = datetime.fromisoformat(key["s"]) if key["s"] is not None else None
+        last_id = ObjectId(key["i"])
+    except (TypeError, KeyError, ValueError, InvalidId):
+        raise InvalidRequest("Invalid cursor")
+
+    if slot is None:
+        # Citas antiguas sin slot_start: ordenan antes que todas las demás
+        return {
+            "$or": [
+                {"slot_start": None, "_id": {"$gt": last_id}},
+                {"slot_start": {"$ne": None}},
+            ]
+        }
+    return {
+        "$or": [
+            {"slot_start": {"$gt": slot}},
+            {"slot_start": slot, "_id": {"$gt": last_id}},
+        ]
+    }
+
+
+def parse_page(args, query, max_page_size):
+    """
+    Lee ``limit`` y ``after`` de la query string.
+
+    Devuelve el tamaño de página y el filtro de la página, que empieza justo
+    después del cursor: cada página es un recorrido del índice cuyo coste
+    no depende de la profundidad (a diferencia de skip/offset).
+    """
+    try:
+        limit = int(args.get("limit"))
+    except (TypeError, ValueError):
+        raise InvalidRequest()
+    if limit < 1 or limit > max_page_size:
+        raise InvalidRequest()
+
+    after = args.get("after", None)
+    if after:
+        query = {"$and": [query, decode_cursor(after)]}
+    return limit, query
+
+
+def page_payload(page, limit):
+    """``page`` trae un elemento de más para saber si hay página siguiente."""
+    next_cursor = encode_cursor(page[limit - 1]) if len(page) > limit else None
+    return {"items": format_dates(page[:limit]), "next_cursor": next_cursor}
+
+
+def parse_batch_size(args, default, maximum):
+    try:
+        batch_size = int(args.get("batch_size", default))
+    except (TypeError, ValueError):
+        raise InvalidRequest()
+    if batch_size < 1 or batch_size > maximum:
+        raise InvalidRequest()
+    return batch_size
+
+
+# ================== FORMATO ==================
+def wants_ndjson(accept):
+    """
+    True si el tipo preferido de la cabecera ``Accept`` es NDJSON. Se usa la
+    negociación de werkzeug (calidades incluidas) en las dos apps, para que
+    ``application/json, application/x-ndjson;q=0.5`` dé JSON en ambas.
+    """
+    return parse_accept_header(accept, MIMEAccept).best == "application/x-ndjson"
+
+
+def format_date(date):
+    """Convierte un documento de ``citas`` al formato de respuesta de la API."""
+    if "day" in date:
+        date["date"] = f"{date.pop('day')} {date.pop('hour')}:00:00"
+    date.pop("_id", None)
+    date.pop("slot_start", None)
+    date.pop("slot_epoch", None)
+    return date
+
+
+def format_dates(dates):
+    """
+    Da formato a las citas en el orden en que llegan.
+
+    Los cursores ya vienen ordenados por slot_start desde Mongo (ver
+    DATE_SORT), por lo que no hace falta reordenar en Python.
+    """
+    return [format_date(date) for date in dates]
@@ -0,0 +1,131 @@
+"""Registro de consultas lentas con captura de ``explain()`` por muestreo.
+
+``SlowQueryLog`` es un ``CommandListener`` de pymongo: cualquier comando
+que tarde más de ``SLOW_QUERY_MS`` se registra en el logger
+``slow_queries`` con su colección, su duración y la forma del filtro (las
+claves y operadores, sin los valores). Para una fracción
+``SLOW_QUERY_EXPLAIN_RATE`` de esos comandos se pide además el plan con
+``explain`` (verbosidad queryPlanner, no ejecuta la consulta) y se registra
+un resumen: etapas, índice elegido y si hay COLLSCAN.
+
+El explain se lanza en un hilo aparte, nunca desde el propio listener (que
+corre dentro del driver), y como mucho hay unos pocos a la vez.
+"""
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+
+logger = logging.getLogger("slow_queries")
+
+# Comandos que admiten explain y dónde está su filtro
+FILTERS = {
+    "find": lambda c: c.get("filter", {}),
+    "count": lambda c: c.get("query", {}),
+    "distinct": lambda c: c.get("query", {}),
+    "findAndModify": lambda c: c.get("query", {}),
+    "delete": lambda c: c["deletes"][0].get("q", {}) if c.get("deletes") else {},
+    "update": lambda c: c["updates"][0].get("q", {}) if c.get("updates") else {},
+    "aggregate": lambda c: next(
+        (stage["$match"] for stage in c.get("pipeline", []) if "$match" in stage), {}
+    ),
+}
+MAX_PENDING_EXPLAINS = 2
+
+
+def filter_shape(value):
+    """Filtro con los valores sustituidos por "?" (misma forma, sin datos)."""
+    if isinstance(value, dict):
+        return {key: filter_shape(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [filter_shape(v) for v in value]
+        # {"$in": [...]} con muchos valores: basta con una muestra
+        return shapes if any(isinstance(v, dict) for v in shapes) else ["?"]
+    return "?"
+
+
+def plan_summary(explain):
+    """Etapas e índices del plan ganador, p. ej. "FETCH > IXSCAN(slot_start_id)"."""
+    planner = explain.get("queryPlanner", {})
+    plan = planner.get("winningPlan", {})
+    # Con el motor SBE el plan viene dentro de queryPlan
+    plan = plan.get("queryPlan", plan)
+
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if "indexName" in plan:
+            stage += f"({plan['indexName']})"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " > ".join(stages)
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    def __init__(self, get_client, threshold_ms, explain_rate=0.1):
+        self.get_client = get_client
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self._pending = {}
+        self._explains = threading.BoundedSemaphore(MAX_PENDING_EXPLAINS)
+        self._executor = None
+
+    def started(self, event):
+        self._pending[(event.request_id, event.connection_id)] = (
+            event.database_name,
+            event.command,
+        )
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        database, command = self._pending.pop((event.request_id, event.connection_id), (None, None))
+        elapsed_ms = event.duration_micros / 1000
+        if command is None or elapsed_ms < self.threshold_ms or event.command_name == "explain":
+            return
+
+        name = event.command_name
+        collection = command.get("collection") if name == "getMore" else command.get(name)
+        get_filter = FILTERS.get(name)
+        shape = filter_shape(get_filter(command)) if get_filter else None
+        logger.warning(
+            "Consulta lenta: %s.%s %.1f ms filtro=%s", collection, name, elapsed_ms, shape
+        )
+
+        if get_filter and random.random() < self.explain_rate:
+            self._explain(database, collection, name, command)
+
+    def _explain(self, database, collection, name, command):
+        # Sin hueco para otro explain: se descarta esta muestra
+        if not self._explains.acquire(blocking=False):
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="explain")
+        explained = {k: v for k, v in command.items() if not k.startswith("$") and k != "lsid"}
+        self._executor.submit(self._run_explain, database, collection, name, explained)
+
+    def _run_explain(self, database, collection, name, command):
+        try:
+            result = self.get_client()[database].command(
+                "explain", command, verbosity="queryPlanner"
+            )
+            summary = plan_summary(result)
+            log = logger.warning if "COLLSCAN" in summary else logger.info
+            log("Plan de %s.%s: %s", collection, name, summary)
+        except PyMongoError as exc:
+            logger.info("No se pudo obtener el plan de %s.%s: %s", collection, name, exc)
+        finally:
+            self._explains.release()
+
+    def reset(self):
+        """Tras un fork el hilo de explain no existe en el hijo."""
+        self._executor = None
+        self._explains = threading.BoundedSemaphore(MAX_PENDING_EXPLAINS)
@@ -0,0 +1,241 @@
+"""Generador de datos sintéticos para pruebas de escala.
+
+Crea ``usuarios``, ``centros`` y ``citas`` (con su ``ocupacion``) en el
+volumen que se pida, con distribuciones parecidas a las reales:
+
+- Horas punta: más citas a media mañana y a media tarde (``HOUR_WEIGHTS``),
+  muchas menos en fin de semana (``WEEKDAY_WEIGHTS``).
+- Centros populares: la demanda de cada centro sigue una ley de Zipf, así
+  que unos pocos concentran buena parte de las citas. Un centro nunca
+  recibe más citas que huecos tiene; lo que no cabe se reparte entre los
+  demás.
+- Cancelaciones: una fracción ``cancel_rate`` de las citas se marca con
+  ``cancel: 1``.
+
+Los huecos de cada centro se eligen sin repetición (muestreo ponderado de
+Efraimidis-Spirakis), así que se respeta el índice único por centro, día y
+hora. Cada centro usa su propia semilla, por lo que el resultado es el mismo
+con uno o varios procesos: con ``processes > 1`` los centros se reparten
+entre procesos y cada uno escribe los suyos. Todo se escribe con
+``insert_many`` por lotes.
+
+Todos los usuarios comparten el mismo hash de contraseña, calculado una
+sola vez: hashear millones de contraseñas no aporta nada a estas pruebas.
+
+Cada centro tiene un hueco por hora y día, así que caben como mucho
+``centers * days * len(HOUR_WEIGHTS)`` citas. Si no se indica ``centers``,
+se calcula a partir de ``dates`` y ``days`` para una ocupación media de
+``FILL_RATE``: un millón de citas en un año son unos 350 centros.
+
+Se usa con ``flask --app application generate-data --dates 1000000``.
+"""
+import heapq
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+from services import booking_doc
+
+
+HOUR_WEIGHTS = {
+    8: 3, 9: 8, 10: 10, 11: 9, 12: 6, 13: 3, 14: 2,
+    15: 4, 16: 7, 17: 8, 18: 6, 19: 3, 20: 1,
+}
+# Lunes a domingo
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 0.9, 0.3, 0.05)
+ZIPF_EXPONENT = 1.1
+# Ocupación media cuando el número de centros se deduce del volumen
+FILL_RATE = 0.6
+
+
+def center_names(prefix, count):
+    return [f"Centro {prefix} {i + 1}" for i in range(count)]
+
+
+def username(prefix, index):
+    return f"{prefix}-paciente-{index}"
+
+
+def default_centers(dates, days):
+    """Centros necesarios para ``dates`` citas en ``days`` días con ``FILL_RATE``."""
+    return max(1, math.ceil(dates / (days * len(HOUR_WEIGHTS) * FILL_RATE)))
+
+
+def check_capacity(dates, centers, days):
+    """Lanza ``ValueError`` si ``dates`` citas no caben en los huecos disponibles."""
+    check_quota(dates, centers, days * len(HOUR_WEIGHTS))
+
+
+def check_quota(total, centers, capacity):
+    if total > capacity * centers:
+        raise ValueError(
+            f"No caben {total} citas en {centers} centros de {capacity} huecos; "
+            "usa más días o más centros"
+        )
+
+
+def center_quotas(total, weights, capacity):
+    """
+    Reparte ``total`` citas entre centros según ``weights`` sin pasar de
+    ``capacity`` huecos por centro.
+    """
+    check_quota(total, len(weights), capacity)
+    quotas = [0] * len(weights)
+    remaining = total
+    while remaining:
+        open_centers = [i for i, q in enumerate(quotas) if q < capacity]
+        weight_sum = sum(weights[i] for i in open_centers)
+        left = remaining
+        for i in open_centers:
+            share = math.ceil(remaining * weights[i] / weight_sum)
+            share = min(share, capacity - quotas[i], left)
+            quotas[i] += share
+            left -= share
+        remaining = left
+    return quotas
+
+
+def pick_slots(rng, quota, start, days):
+    """``quota`` huecos distintos de ``days`` días, ponderados por hora y día."""
+    slots = []
+    keys = []
+    for d in range(days):
+        day = start + timedelta(days=d)
+        day_weight = WEEKDAY_WEIGHTS[day.weekday()]
+        for hour, hour_weight in HOUR_WEIGHTS.items():
+            slots.append(day.replace(hour=hour))
+            keys.append(rng.random() ** (1 / (day_weight * hour_weight)))
+    chosen = heapq.nlargest(quota, range(len(slots)), key=keys.__getitem__)
+    return sorted(slots[i] for i in chosen)
+
+
+def user_docs(prefix, start, stop, password_hash, seed):
+    rng = random.Random(f"{seed}-usuarios-{start}")
+    for i in range(start, stop):
+        name = username(prefix, i)
+        birth = datetime(1940, 1, 1) + timedelta(days=rng.randrange(80 * 365))
+        yield {
+            "username": name,
+            "password": password_hash,
+            "name": f"Nombre{i}",
+            "lastname": f"Apellido{i}",
+            "email": f"{name}@example.com",
+            "phone": f"6{rng.randrange(10 ** 8):08d}",
+            "date": birth.strftime("%d/%m/%Y"),
+        }
+
+
+def date_docs(center, index, quota, options):
+    """Citas de un centro; también devuelve las horas ocupadas por día."""
+    rng = random.Random(f"{options['seed']}-centro-{index}")
+    occupancy = {}
+    docs = []
+    for slot in pick_slots(rng, quota, options["start"], options["days"]):
+        user = username(options["prefix"], rng.randrange(options["users"]))
+        doc = booking_doc(user, center, slot)
+        created = slot - timedelta(days=rng.randrange(1, 60), minutes=rng.randrange(600))
+        doc["created_at"] = created.strftime("%d/%m/%Y %H:%M:%S")
+        if rng.random() < options["cancel_rate"]:
+            doc["cancel"] = 1
+        else:
+            day = slot.replace(hour=0)
+            occupancy.setdefault(day, []).append(slot.hour)
+        docs.append(doc)
+    return docs, occupancy
+
+
+def insert_batches(collection, docs, batch_size):
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def write_centers(get_db, centers, options):
+    """Escribe las citas y la ocupación de ``centers`` (lista de (índice, nombre, cupo))."""
+    db = get_db()
+    written = 0
+    for index, center, quota in centers:
+        docs, occupancy = date_docs(center, index, quota, options)
+        insert_batches(db["citas"], docs, options["batch_size"])
+        insert_batches(
+            db["ocupacion"],
+            ({"center": center, "day": day, "hours": sorted(h)} for day, h in occupancy.items()),
+            options["batch_size"],
+        )
+        written += len(docs)
+    return written
+
+
+def generate(
+    get_db,
+    users=10000,
+    centers=None,
+    dates=1000000,
+    days=365,
+    start=None,
+    cancel_rate=0.1,
+    batch_size=5000,
+    processes=1,
+    seed=1,
+    prefix="sint",
+    password_hash="",
+    report=print,
+):
+    """
+    Genera los datos en la base de datos que devuelve ``get_db``.
+
+    Con ``processes > 1``, ``get_db`` tiene que poder usarse en un proceso
+    hijo (p. ej. ``application.get_db``, que crea un cliente por proceso).
+    Sin ``centers`` se usan los de ``default_centers``. Si las citas no
+    caben, lanza ``ValueError`` antes de escribir nada.
+    """
+    if centers is None:
+        centers = default_centers(dates, days)
+    check_capacity(dates, centers, days)
+    start = (start or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    db = get_db()
+
+    names = center_names(prefix, centers)
+    db["centros"].insert_many(
+        [{"name": name, "address": f"Calle Sintética, {i + 1}, Madrid"} for i, name in enumerate(names)]
+    )
+    report(f"{centers} centros creados")
+
+    insert_batches(db["usuarios"], user_docs(prefix, 0, users, password_hash, seed), batch_size)
+    report(f"{users} usuarios creados")
+
+    weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(centers)]
+    quotas = center_quotas(dates, weights, days * len(HOUR_WEIGHTS))
+    work = [(i, name, quota) for i, (name, quota) in enumerate(zip(names, quotas)) if quota]
+    options = {
+        "users": users,
+        "days": days,
+        "start": start,
+        "cancel_rate": cancel_rate,
+        "batch_size": batch_size,
+        "seed": seed,
+        "prefix": prefix,
+    }
+
+    if processes <= 1:
+        written = 0
+        for item in work:
+            written += write_centers(get_db, [item], options)
+            report(f"{written}/{dates} citas")
+        return written
+
+    # Centros intercalados para que cada proceso reciba populares y no populares
+    chunks = [work[i::processes] for i in range(processes)]
+    written = 0
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(write_centers, get_db, chunk, options) for chunk in chunks if chunk]
+        for future in futures:
+            written += future.result()
+            report(f"{written}/{dates} citas")
+    return written
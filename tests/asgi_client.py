@@ -0,0 +1,39 @@
+"""Cliente de pruebas para la app ASGI con la interfaz del de Flask.
+
+Permite ejecutar los mismos tests contra ``application.app`` y contra
+``asgi.app``: acepta ``data``/``content_type``/``headers`` como
+``app.test_client()`` y devuelve respuestas con ``status_code``,
+``headers``, ``data``, ``mimetype``, ``get_json()`` y ``get_data()``.
+"""
+import json
+
+from starlette.testclient import TestClient
+
+
+class AsgiResponse:
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.data = response.content
+        self.mimetype = response.headers.get("content-type", "").split(";")[0]
+
+    def get_json(self):
+        return json.loads(self.data)
+
+    def get_data(self, as_text=False):
+        return self.data.decode("utf-8") if as_text else self.data
+
+
+class AsgiTestClient:
+    def __init__(self, app):
+        self._client = TestClient(app)
+
+    def get(self, url, headers=None):
+        return AsgiResponse(self._client.get(url, headers=headers))
+
+    def post(self, url, data=None, content_type=None, headers=None):
+        headers = dict(headers or {})
+        if content_type:
+            headers["Content-Type"] = content_type
+        return AsgiResponse(self._client.post(url, content=data, headers=headers))
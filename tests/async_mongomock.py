@@ -0,0 +1,69 @@
+"""Envoltorio asíncrono sobre mongomock para probar la app ASGI.
+
+mongomock solo tiene API síncrona. Estas clases exponen la parte de la API
+de ``AsyncMongoClient`` que usa ``asgi.py`` (métodos awaitables y cursores
+con ``async for`` / ``to_list``) delegando en un cliente mongomock, de modo
+que las apps WSGI y ASGI comparten los mismos datos en los tests.
+"""
+
+
+class AsyncMongomockClient:
+    def __init__(self, client):
+        self._client = client
+
+    def __getitem__(self, name):
+        return AsyncDatabase(self._client[name])
+
+
+class AsyncDatabase:
+    def __init__(self, db):
+        self._db = db
+
+    def __getitem__(self, name):
+        return AsyncCollection(self._db[name])
+
+
+class AsyncCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def find(self, *args, **kwargs):
+        return AsyncCursor(self._collection.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self._collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+class AsyncCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self._cursor = self._cursor.sort(*args, **kwargs)
+        return self
+
+    def limit(self, *args):
+        self._cursor = self._cursor.limit(*args)
+        return self
+
+    def batch_size(self, *args):
+        self._cursor = self._cursor.batch_size(*args)
+        return self
+
+    async def to_list(self, length=None):
+        docs = list(self._cursor)
+        return docs if length is None else docs[:length]
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._cursor)
+        except StopIteration:
+            raise StopAsyncIteration
@@ -1,11 +1,19 @@
 # tests/conftest.py
+import json
+
 import pytest
 import mongomock
 
 import application  # importamos el módulo entero
+import asgi
+from migrations import load_migration
+from tests.asgi_client import AsgiTestClient
+from tests.async_mongomock import AsyncMongomockClient
 
 
 DB_NAME = "Clinica"
+NORTE = "Centro de Salud Madrid Norte"
+SUR = "Centro Médico Madrid Sur"
 
 
 def _setup_test_db():
@@ -16,7 +24,7 @@ def _setup_test_db():
     mock_client = mongomock.MongoClient()
 
     # 2) Sustituir el cliente real de la app por el simulado
-    application.myclient = mock_client
+    application.resources().client = mock_client
 
     # 3) Trabajar con la BD "Clinica" dentro de este cliente falso
     db = mock_client[DB_NAME]
@@ -25,6 +33,12 @@ def _setup_test_db():
     db["usuarios"].delete_many({})
     db["citas"].delete_many({})
     db["centros"].delete_many({})
+    db["ocupacion"].delete_many({})
+
+    # Índices de producción (incluido el único por centro, día y hora)
+    load_migration("001_init_clinica.py").ensure_indexes(db)
+    load_migration("003_build_occupancy.py").ensure_occupancy_indexes(db)
+    load_migration("004_pagination_indexes.py").ensure_pagination_indexes(db)
 
     # Semilla mínima de centros para que los tests tengan datos coherentes
     db["centros"].insert_many(
@@ -40,9 +54,36 @@ def _setup_test_db():
         ]
     )
 
+    # El snapshot de centros debe leer de la BD recién sembrada. mongomock no
+    # tiene change streams: se usa el contador de versión.
+    application.centers_snapshot.change_stream = False
+    application.centers_snapshot.invalidate()
+
+    # Cubetas de límite de peticiones vacías en cada test
+    application.rate_limiter.reset()
+
     return mock_client
 
 
+@pytest.fixture(params=["wsgi", "asgi"])
+def api_client(request):
+    """
+    Cliente de pruebas para la app WSGI (Flask) y para la ASGI (asgi.py),
+    sobre la misma BD en memoria. Los tests de flujo de la API lo usan para
+    comprobar que ambas variantes se comportan igual.
+    """
+    application.app.config["TESTING"] = True
+    application.password_hasher.rounds = 4
+    mock_client = _setup_test_db()
+
+    if request.param == "wsgi":
+        with application.app.test_client() as client:
+            yield client
+    else:
+        application.resources().async_client = AsyncMongomockClient(mock_client)
+        yield AsgiTestClient(asgi.app)
+
+
 @pytest.fixture
 def client():
     """
@@ -50,7 +91,61 @@ def client():
     con una BD limpia en cada test.
     """
     application.app.config["TESTING"] = True
+    # Coste mínimo de bcrypt para que los tests sean rápidos
+    application.password_hasher.rounds = 4
     _setup_test_db()
 
     with application.app.test_client() as client:
         yield client
+
+
+@pytest.fixture
+def restore_process():
+    """
+    Deja los clientes de Mongo de la app del módulo como estaban, para los
+    tests que los sustituyen.
+    """
+    state = application.resources(application.app)
+    clients = state.client, state.async_client
+    yield
+    state.client, state.async_client = clients
+
+
+# ================== PETICIONES ==================
+# Valen para el cliente de Flask y para el de la app ASGI (AsgiTestClient)
+def post_json(api_client, headers, url, payload):
+    return api_client.post(
+        url,
+        data=json.dumps(payload),
+        content_type="application/json",
+        headers=headers,
+    )
+
+
+def register_and_login(api_client, username="user_dates"):
+    """Registra ``username`` y devuelve su token de acceso."""
+    post_json(
+        api_client,
+        None,
+        "/register",
+        {
+            "username": username,
+            "password": "password_dates",
+            "name": "Nombre",
+            "lastname": "Apellido",
+            "email": "dates@example.com",
+            "phone": "611111111",
+            "date": "02/02/2000",
+        },
+    )
+
+    r = post_json(api_client, None, "/login", {"username": username, "password": "password_dates"})
+    assert r.status_code == 200
+    return r.get_json()["access_token"]
+
+
+def create_date(api_client, headers, date, center=NORTE):
+    """Reserva ``date`` en ``center`` con /date/create y comprueba que se crea."""
+    r = post_json(api_client, headers, "/date/create", {"center": center, "date": date})
+    assert r.status_code == 200
+    return r
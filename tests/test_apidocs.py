@@ -0,0 +1,79 @@
+# tests/test_apidocs.py
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import application
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_lazy_mode_does_not_import_flasgger_at_startup():
+    code = "import sys, application; sys.exit('flasgger' in sys.modules)"
+    env = dict(os.environ, APIDOCS_MODE="lazy")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env)
+    assert result.returncode == 0
+
+
+def test_lazy_docs_built_on_first_access(client):
+    # La app principal no tiene las rutas de flasgger
+    assert "flasgger" not in application.app.blueprints
+
+    resp = client.get("/apispec_1.json")
+    assert resp.status_code == 200
+    spec = resp.get_json()
+    assert spec["info"]["title"] == "API de Clínica"
+    assert "/login" in spec["paths"]
+    assert "/date/create" in spec["paths"]
+
+    assert client.get("/apidocs/").status_code == 200
+    # El resto de rutas siguen yendo a la app principal
+    assert client.get("/").status_code == 200
+
+
+def test_eager_and_off_modes(restore_process):
+    eager = application.create_app({"APIDOCS_MODE": "eager"})
+    assert "flasgger" in eager.blueprints
+    assert eager.test_client().get("/apispec_1.json").status_code == 200
+
+    off = application.create_app({"APIDOCS_MODE": "off"})
+    assert off.test_client().get("/apidocs/").status_code == 404
+
+
+def test_frozen_spec_export_and_cache_headers(restore_process, tmp_path):
+    path = tmp_path / "apispec.json"
+    runner = application.app.test_cli_runner()
+    result = runner.invoke(args=["export-apispec", "--output", str(path)])
+    assert result.exit_code == 0, result.output
+    exported = json.loads(path.read_text(encoding="utf-8"))
+    assert "/login" in exported["paths"]
+
+    app = application.create_app({"APIDOCS_MODE": "frozen", "APISPEC_PATH": str(path)})
+    assert "flasgger" not in app.blueprints
+    client = app.test_client()
+
+    resp = client.get("/apispec_1.json")
+    assert resp.status_code == 200
+    assert resp.get_json() == exported
+    assert resp.headers["Cache-Control"] == "public, max-age=86400"
+
+    resp = client.get("/apispec_1.json", headers={"If-None-Match": resp.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+def test_frozen_mode_without_spec_file(restore_process, tmp_path):
+    path = tmp_path / "apispec.json"
+    app = application.create_app({"APIDOCS_MODE": "frozen", "APISPEC_PATH": str(path)})
+    client = app.test_client()
+
+    resp = client.get("/apispec_1.json")
+    assert resp.status_code == 503
+    assert resp.get_json() == {"msg": "API spec not available"}
+
+    # La app ya creada sirve para generarlo, y a partir de ahí se sirve
+    result = app.test_cli_runner().invoke(args=["export-apispec", "--output", str(path)])
+    assert result.exit_code == 0, result.output
+    assert client.get("/apispec_1.json").status_code == 200
@@ -0,0 +1,107 @@
+# tests/test_app_factory.py
+import os
+import threading
+import time
+
+import pytest
+
+import application
+
+
+def test_create_app_lazy_client_with_pool_settings(restore_process):
+    app = application.create_app(
+        {
+            "MONGODB_URI": "mongodb://127.0.0.1:1/",
+            "MONGO_MAX_POOL_SIZE": 7,
+            "MONGO_MIN_POOL_SIZE": 2,
+            "MONGO_WAIT_QUEUE_TIMEOUT_MS": 1500,
+            "MONGO_SERVER_SELECTION_TIMEOUT_MS": 100,
+        }
+    )
+
+    # Crear la app no abre conexiones
+    assert application.resources(app).client is None
+    assert app.config["MONGO_MAX_POOL_SIZE"] == 7
+
+    client = application.get_client(app)
+    try:
+        pool = client.options.pool_options
+        assert pool.max_pool_size == 7
+        assert pool.min_pool_size == 2
+        assert pool.wait_queue_timeout == 1.5
+        assert client.options.server_selection_timeout == 0.1
+        assert application.get_client(app) is client
+        # Dentro de la app se usa su propio cliente
+        with app.app_context():
+            assert application.get_client() is client
+    finally:
+        client.close()
+
+
+def test_create_app_does_not_touch_module_app(restore_process):
+    default_client = application.get_client()
+    default_rounds = application.password_hasher.rounds
+
+    other = application.create_app(
+        {
+            "MONGODB_URI": "mongodb://127.0.0.1:1/",
+            "MONGO_MAX_POOL_SIZE": 7,
+            "MONGODB_DB": "Other",
+            "BCRYPT_ROUNDS": 5,
+        }
+    )
+
+    assert application.get_client() is default_client
+    assert application.get_db().name == "Clinica"
+    assert application.password_hasher.rounds == default_rounds
+    assert application.resources(other).password_hasher.rounds == 5
+    assert application.resources(other).centers_snapshot is not application.resources().centers_snapshot
+
+    client = application.get_client(other)
+    try:
+        assert client is not default_client
+        assert client.options.pool_options.max_pool_size == 7
+        assert application.get_db(other).name == "Other"
+    finally:
+        client.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requiere os.fork")
+def test_child_process_drops_inherited_client(restore_process):
+    state = application.resources()
+    state.client = object()
+    state.async_client = object()
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if state.client is None and state.async_client is None else 1)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    # El padre conserva sus clientes
+    assert state.client is not None
+    assert state.async_client is not None
+
+
+def test_concurrent_first_requests_share_one_client(restore_process, monkeypatch):
+    app = application.create_app()
+    created = []
+
+    def slow_client(*args, **kwargs):
+        time.sleep(0.01)
+        created.append(object())
+        return created[-1]
+
+    monkeypatch.setattr(application.pymongo, "MongoClient", slow_client)
+    clients = []
+    threads = [
+        threading.Thread(target=lambda: clients.append(application.get_client(app)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(client is created[0] for client in clients)
@@ -1,7 +1,7 @@
 import json
 
 
-def test_register_login_and_get_centers(client):
+def test_register_login_and_get_centers(api_client):
     # 1. Registro de usuario
     register_payload = {
         "username": "usuario_test",
@@ -13,7 +13,7 @@ def test_register_login_and_get_centers(client):
         "date": "01/01/2000",
     }
 
-    r = client.post(
+    r = api_client.post(
         "/register",
         data=json.dumps(register_payload),
         content_type="application/json",
@@ -22,7 +22,7 @@ def test_register_login_and_get_centers(client):
 
     # 2. Login
     login_payload = {"username": "usuario_test", "password": "password_test"}
-    r = client.post(
+    r = api_client.post(
         "/login",
         data=json.dumps(login_payload),
         content_type="application/json",
@@ -34,7 +34,7 @@ def test_register_login_and_get_centers(client):
     token = data["access_token"]
 
     # 3. Obtener centros
-    r = client.get("/centers", headers={"Authorization": f"Bearer {token}"})
+    r = api_client.get("/centers", headers={"Authorization": f"Bearer {token}"})
     assert r.status_code == 200
 
     centers = r.get_json()
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import mongomock
+
+from migrations import load_migration
+from tests.conftest import NORTE, post_json, register_and_login
+
+
+def test_availability_follows_create_and_delete(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r = api_client.get(f"/availability?center={NORTE}&day=25/12/2025", headers=headers)
+    assert r.status_code == 200
+    data = r.get_json()
+    assert data["taken"] == []
+    assert len(data["free"]) == 24
+
+    post_json(api_client, headers, "/date/create", {"center": NORTE, "date": "25/12/2025 14:00:00"})
+    post_json(api_client, headers, "/date/create", {"center": NORTE, "date": "25/12/2025 09:00:00"})
+    post_json(api_client, headers, "/date/create", {"center": NORTE, "date": "26/12/2025 09:00:00"})
+
+    r = api_client.get(f"/availability?center={NORTE}&day=25/12/2025", headers=headers)
+    data = r.get_json()
+    assert data["taken"] == ["09", "14"]
+    assert "14" not in data["free"]
+    assert len(data["free"]) == 22
+
+    post_json(api_client, headers, "/date/delete", {"center": NORTE, "date": "25/12/2025 14:00:00"})
+
+    r = api_client.get(f"/availability?center={NORTE}&day=25/12/2025", headers=headers)
+    assert r.get_json()["taken"] == ["09"]
+
+
+def test_availability_requires_center_and_day(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert api_client.get("/availability?day=25/12/2025", headers=headers).status_code == 400
+    assert api_client.get(f"/availability?center={NORTE}&day=25-12-2025", headers=headers).status_code == 400
+
+
+def test_rebuild_keeps_occupancy_written_during_scan(monkeypatch):
+    migration = load_migration("003_build_occupancy.py")
+    db = mongomock.MongoClient()["Clinica"]
+    migration.ensure_occupancy_indexes(db)
+    day = datetime(2026, 1, 2)
+    db["citas"].insert_one({"center": NORTE, "slot_start": day.replace(hour=9)})
+    # La hora 15 de NORTE no tiene cita; "Viejo" y "Otro" son restos sin citas
+    db["ocupacion"].insert_one({"center": NORTE, "day": day, "hours": [9, 15]})
+    db["ocupacion"].insert_one({"center": "Viejo", "day": day, "hours": [8]})
+    db["ocupacion"].insert_one({"center": "Otro", "day": day, "hours": [8]})
+
+    citas = db["citas"]
+    find = citas.find
+
+    def find_while_booking(*args, **kwargs):
+        # La app reserva mientras la migración recorre las citas
+        for center, hour in ((NORTE, 10), ("Sur", 11), ("Otro", 12)):
+            db["ocupacion"].update_one(
+                {"center": center, "day": day}, {"$addToSet": {"hours": hour}}, upsert=True
+            )
+        return find(*args, **kwargs)
+
+    def bulk_update(operations, ordered=True):
+        # mongomock no admite UpdateOne en bulk_write con este pymongo
+        for op in operations:
+            db["ocupacion"].update_one(op._filter, op._doc, upsert=op._upsert)
+
+    monkeypatch.setattr(citas, "find", find_while_booking)
+    monkeypatch.setattr(db["ocupacion"], "bulk_write", bulk_update)
+    assert migration.build_occupancy(db) == 1
+
+    hours = {doc["center"]: sorted(doc["hours"]) for doc in db["ocupacion"].find()}
+    assert hours == {NORTE: [9, 10], "Sur": [11], "Otro": [12]}
@@ -0,0 +1,132 @@
+import application
+from tests.conftest import NORTE, SUR, post_json, register_and_login
+
+
+def test_bulk_create_reports_each_slot(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Hueco ya ocupado y hueco cancelado (que se puede reutilizar)
+    post_json(api_client, headers, "/date/create", {"center": NORTE, "date": "08/01/2026 10:00:00"})
+    post_json(api_client, headers, "/date/create", {"center": NORTE, "date": "15/01/2026 10:00:00"})
+    post_json(api_client, headers, "/date/delete", {"center": NORTE, "date": "15/01/2026 10:00:00"})
+
+    dates = [
+        {"center": NORTE, "date": "01/01/2026 10:00:00"},
+        {"center": NORTE, "date": "08/01/2026 10:00:00"},
+        {"center": NORTE, "date": "15/01/2026 10:00:00"},
+        {"center": NORTE, "date": "22/01/2026 10:00:00"},
+        {"center": NORTE, "date": "22/01/2026 10:00:00"},
+        {"center": "Centro inexistente", "date": "29/01/2026 10:00:00"},
+        {"center": SUR, "date": "29/01/2026 25:00:00"},
+        {"center": SUR, "date": "22/01/2026 11:00:00"},
+        {"center": {"a": 1}, "date": "29/01/2026 11:00:00"},
+        {"center": [SUR], "date": "29/01/2026 12:00:00"},
+    ]
+    r = post_json(api_client, headers, "/date/bulkCreate", {"dates": dates})
+    assert r.status_code == 200
+    data = r.get_json()
+
+    assert [item["status"] for item in data["results"]] == [
+        "created",
+        "taken",
+        "created",
+        "created",
+        "taken",
+        "center_not_found",
+        "invalid_date",
+        "created",
+        "center_not_found",
+        "center_not_found",
+    ]
+    assert data["created"] == 4
+    assert data["results"][0] == {**dates[0], "status": "created"}
+
+    r = api_client.get("/date/getByUser", headers=headers)
+    assert len(r.get_json()) == 5
+
+    r = api_client.get(f"/availability?center={NORTE}&day=22/01/2026", headers=headers)
+    assert r.get_json()["taken"] == ["10"]
+    r = api_client.get(f"/availability?center={NORTE}&day=15/01/2026", headers=headers)
+    assert r.get_json()["taken"] == ["10"]
+
+
+def test_bulk_create_validates_payload(api_client, monkeypatch):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    one = {"center": NORTE, "date": "01/01/2026 10:00:00"}
+
+    assert post_json(api_client, headers, "/date/bulkCreate", {"dates": []}).status_code == 400
+    assert post_json(api_client, headers, "/date/bulkCreate", {"dates": one}).status_code == 400
+    assert post_json(api_client, headers, "/date/bulkCreate", {"dates": ["x"]}).status_code == 400
+
+    monkeypatch.setitem(application.app.config, "MAX_BULK_SIZE", 2)
+    r = post_json(api_client, headers, "/date/bulkCreate", {"dates": [one] * 3})
+    assert r.status_code == 400
+
+
+def test_bulk_delete_by_pairs_only_cancels_own_dates(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    dates = [
+        {"center": NORTE, "date": "01/02/2026 09:00:00"},
+        {"center": NORTE, "date": "01/02/2026 10:00:00"},
+        {"center": SUR, "date": "02/02/2026 09:00:00"},
+    ]
+    post_json(api_client, headers, "/date/bulkCreate", {"dates": dates})
+
+    # Cita de otro usuario en el mismo día
+    other = register_and_login(api_client, username="otro")
+    other_headers = {"Authorization": f"Bearer {other}"}
+    post_json(api_client, other_headers, "/date/create", {"center": NORTE, "date": "01/02/2026 11:00:00"})
+
+    payload = {
+        "dates": dates[:2]
+        + [
+            {"center": NORTE, "date": "01/02/2026 11:00:00"},
+            {"center": NORTE, "date": "01/02/2026 12:00:00"},
+        ]
+    }
+    r = post_json(api_client, headers, "/date/bulkDelete", payload)
+    assert r.status_code == 200
+    assert r.get_json() == {"matched": 2, "modified": 2}
+
+    r = api_client.get(f"/availability?center={NORTE}&day=01/02/2026", headers=headers)
+    assert r.get_json()["taken"] == ["11"]
+
+    r = api_client.get("/date/getByUser", headers=headers)
+    assert [d["date"] for d in r.get_json()] == ["02/02/2026 09:00:00"]
+
+    # Repetir no cancela nada más
+    r = post_json(api_client, headers, "/date/bulkDelete", payload)
+    assert r.get_json() == {"matched": 0, "modified": 0}
+
+
+def test_bulk_delete_by_range(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    dates = [
+        {"center": NORTE, "date": "03/02/2026 15:00:00"},
+        {"center": NORTE, "date": "03/02/2026 17:00:00"},
+        {"center": SUR, "date": "03/02/2026 16:00:00"},
+        {"center": NORTE, "date": "03/02/2026 20:00:00"},
+    ]
+    post_json(api_client, headers, "/date/bulkCreate", {"dates": dates})
+
+    r = post_json(
+        api_client,
+        headers,
+        "/date/bulkDelete",
+        {"start": "03/02/2026 14:00:00", "end": "03/02/2026 20:00:00", "center": NORTE},
+    )
+    assert r.get_json() == {"matched": 2, "modified": 2}
+
+    r = api_client.get(f"/availability?center={NORTE}&day=03/02/2026", headers=headers)
+    assert r.get_json()["taken"] == ["20"]
+    r = api_client.get(f"/availability?center={SUR}&day=03/02/2026", headers=headers)
+    assert r.get_json()["taken"] == ["16"]
+
+    bad = {"start": "03/02/2026 20:00:00", "end": "03/02/2026 14:00:00"}
+    assert post_json(api_client, headers, "/date/bulkDelete", bad).status_code == 400
+    bad = {"dates": [{"center": NORTE, "date": "03/02/2026"}]}
+    assert post_json(api_client, headers, "/date/bulkDelete", bad).status_code == 400
@@ -0,0 +1,57 @@
+import application
+from centers_cache import bump_centers_version
+from tests.conftest import DB_NAME, NORTE, create_date, post_json, register_and_login
+
+
+NUEVO = "Centro Nuevo Madrid Este"
+SLOT = "25/12/2025 14:00:00"
+
+
+def test_booking_validates_against_snapshot_without_reading_centros(api_client, monkeypatch):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    application.centers_snapshot.get()
+
+    db = application.get_client()[DB_NAME]
+    monkeypatch.setattr(db["centros"], "find_one", None)
+    monkeypatch.setattr(db["centros"], "find", None)
+
+    create_date(api_client, headers, SLOT, NORTE)
+    for center in ("Centro Inexistente", [NORTE], {"name": NORTE}):
+        r = post_json(api_client, headers, "/date/create", {"center": center, "date": SLOT})
+        assert r.status_code == 400
+        assert r.get_json()["msg"] == "Center not found"
+
+
+def test_snapshot_refreshes_on_version_bump(api_client, monkeypatch):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    snapshot = application.centers_snapshot
+    assert len(api_client.get("/centers", headers=headers).get_json()) == 2
+
+    db = application.get_client()[DB_NAME]
+    db["centros"].insert_one({"name": NUEVO, "address": "Calle Este, 1, Madrid"})
+
+    # Sin invalidar, el snapshot sigue vigente
+    r = post_json(api_client, headers, "/date/create", {"center": NUEVO, "date": SLOT})
+    assert r.status_code == 400
+
+    monkeypatch.setattr(snapshot, "poll_interval", 0)
+    bump_centers_version(db)
+    create_date(api_client, headers, SLOT, NUEVO)
+    assert len(api_client.get("/centers", headers=headers).get_json()) == 3
+
+
+def test_snapshot_refreshes_on_invalidate_and_ttl(api_client, monkeypatch):
+    snapshot = application.centers_snapshot
+    db = application.get_client()[DB_NAME]
+    assert len(snapshot.list()) == 2
+
+    db["centros"].insert_one({"name": NUEVO, "address": "Calle Este, 1, Madrid"})
+    assert NUEVO not in snapshot.by_name()
+    snapshot.invalidate()
+    assert NUEVO in snapshot.by_name()
+
+    db["centros"].delete_one({"name": NUEVO})
+    monkeypatch.setattr(snapshot, "ttl", -1)
+    assert NUEVO not in snapshot.by_name()
@@ -0,0 +1,100 @@
+# tests/test_compression.py
+import gzip
+import json
+
+import pytest
+
+from tests.conftest import NORTE, post_json, register_and_login
+
+
+def _book_many(client, headers, count=60):
+    dates = [
+        {"center": NORTE, "date": f"{day:02d}/03/2026 {hour:02d}:00:00"}
+        for day in range(1, 29)
+        for hour in range(8, 20)
+    ][:count]
+    for i in range(0, count, 30):
+        r = post_json(client, headers, "/date/bulkCreate", {"dates": dates[i : i + 30]})
+        assert r.get_json()["created"] == len(dates[i : i + 30])
+
+
+def test_large_json_is_gzipped(client):
+    headers = {"Authorization": f"Bearer {register_and_login(client)}"}
+    _book_many(client, headers)
+
+    plain = client.get("/date/getByUser", headers=headers)
+    assert "Content-Encoding" not in plain.headers
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+    r = client.get("/date/getByUser", headers={**headers, "Accept-Encoding": "gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in r.headers["Vary"]
+    assert len(r.data) < len(plain.data) / 4
+    assert json.loads(gzip.decompress(r.data)) == plain.get_json()
+
+    # ETag débil en la versión comprimida y 304 al revalidar
+    assert r.headers["ETag"].startswith('W/"')
+    r = client.get(
+        "/date/getByUser",
+        headers={**headers, "Accept-Encoding": "gzip", "If-None-Match": r.headers["ETag"]},
+    )
+    assert r.status_code == 304
+    assert r.headers["ETag"].startswith('W/"')
+    assert "Accept-Encoding" in r.headers["Vary"]
+
+
+def test_brotli_preferred_when_available(client):
+    brotli = pytest.importorskip("brotli")
+    headers = {"Authorization": f"Bearer {register_and_login(client)}"}
+    _book_many(client, headers)
+
+    r = client.get("/dates", headers={**headers, "Accept-Encoding": "gzip, br"})
+    assert r.headers["Content-Encoding"] == "br"
+    assert len(json.loads(brotli.decompress(r.data))) == 60
+
+    r = client.get("/dates", headers={**headers, "Accept-Encoding": "br;q=0.5, gzip"})
+    assert r.headers["Content-Encoding"] == "gzip"
+
+
+def test_small_responses_are_not_compressed(client):
+    headers = {"Authorization": f"Bearer {register_and_login(client)}", "Accept-Encoding": "gzip"}
+
+    r = client.get("/profile", headers=headers)
+    assert r.status_code == 200
+    assert "Content-Encoding" not in r.headers
+
+    # Misma ETag débil y mismo Vary en el 200 sin comprimir y en el 304
+    etag = r.headers["ETag"]
+    assert etag.startswith('W/"')
+    r = client.get("/profile", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    assert "Accept-Encoding" in r.headers["Vary"]
+
+
+def test_streamed_ndjson_is_compressed_incrementally(client):
+    headers = {"Authorization": f"Bearer {register_and_login(client)}"}
+    _book_many(client, headers)
+
+    r = client.get(
+        "/dates",
+        headers={**headers, "Accept": "application/x-ndjson", "Accept-Encoding": "gzip"},
+    )
+    assert r.is_streamed
+    assert r.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in r.headers
+    lines = gzip.decompress(r.data).decode("utf-8").splitlines()
+    assert len(lines) == 60
+    assert json.loads(lines[0])["date"] == "01/03/2026 08:00:00"
+
+
+def test_gzip_in_both_apps(api_client):
+    headers = {"Authorization": f"Bearer {register_and_login(api_client)}"}
+    _book_many(api_client, headers)
+
+    r = api_client.get("/dates", headers={**headers, "Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["Content-Encoding"] == "gzip"
+    # El cliente ASGI (httpx) ya entrega el cuerpo descomprimido
+    body = gzip.decompress(r.data) if r.data[:2] == b"\x1f\x8b" else r.data
+    assert len(json.loads(body)) == 60
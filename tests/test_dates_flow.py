@@ -1,38 +1,10 @@
 import json
 
+from tests.conftest import register_and_login
 
-def _register_and_login(client):
-    # Crear usuario de pruebas
-    client.post(
-        "/register",
-        data=json.dumps(
-            {
-                "username": "user_dates",
-                "password": "password_dates",
-                "name": "Nombre",
-                "lastname": "Apellido",
-                "email": "dates@example.com",
-                "phone": "611111111",
-                "date": "02/02/2000",
-            }
-        ),
-        content_type="application/json",
-    )
-
-    # Login
-    r = client.post(
-        "/login",
-        data=json.dumps(
-            {"username": "user_dates", "password": "password_dates"}
-        ),
-        content_type="application/json",
-    )
-    assert r.status_code == 200
-    return r.get_json()["access_token"]
 
-
-def test_create_list_and_delete_date(client):
-    token = _register_and_login(client)
+def test_create_list_and_delete_date(api_client):
+    token = register_and_login(api_client)
     headers = {"Authorization": f"Bearer {token}"}
 
     # 1. Crear cita
@@ -40,7 +12,7 @@ def test_create_list_and_delete_date(client):
         "center": "Centro de Salud Madrid Norte",
         "date": "25/12/2025 14:00:00",
     }
-    r = client.post(
+    r = api_client.post(
         "/date/create",
         data=json.dumps(create_payload),
         content_type="application/json",
@@ -49,7 +21,7 @@ def test_create_list_and_delete_date(client):
     assert r.status_code == 200
 
     # 2. Listar citas del usuario
-    r = client.get("/date/getByUser", headers=headers)
+    r = api_client.get("/date/getByUser", headers=headers)
     assert r.status_code == 200
     dates = r.get_json()
     assert len(dates) == 1
@@ -59,7 +31,7 @@ def test_create_list_and_delete_date(client):
         "center": "Centro de Salud Madrid Norte",
         "date": "25/12/2025 14:00:00",
     }
-    r = client.post(
+    r = api_client.post(
         "/date/delete",
         data=json.dumps(delete_payload),
         content_type="application/json",
@@ -68,7 +40,43 @@ def test_create_list_and_delete_date(client):
     assert r.status_code == 200
 
     # 4. Comprobar que ya no hay citas
-    r = client.get("/date/getByUser", headers=headers)
+    r = api_client.get("/date/getByUser", headers=headers)
     assert r.status_code == 200
     dates = r.get_json()
     assert dates == []
+
+
+def test_create_date_uses_unique_slot_per_center(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def create(center):
+        return api_client.post(
+            "/date/create",
+            data=json.dumps({"center": center, "date": "25/12/2025 14:00:00"}),
+            content_type="application/json",
+            headers=headers,
+        )
+
+    assert create("Centro de Salud Madrid Norte").status_code == 200
+
+    # Mismo hueco en el mismo centro: ocupado
+    r = create("Centro de Salud Madrid Norte")
+    assert r.status_code == 400
+    assert r.get_json()["msg"] == "Date and hour already taken"
+
+    # Mismo hueco en otro centro: libre
+    assert create("Centro Médico Madrid Sur").status_code == 200
+
+    # Tras cancelar, el hueco se puede volver a reservar
+    r = api_client.post(
+        "/date/delete",
+        data=json.dumps({"center": "Centro de Salud Madrid Norte", "date": "25/12/2025 14:00:00"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert r.status_code == 200
+    assert create("Centro de Salud Madrid Norte").status_code == 200
+
+    r = api_client.get("/date/getByUser", headers=headers)
+    assert len(r.get_json()) == 2
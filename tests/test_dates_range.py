@@ -0,0 +1,105 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import mongomock
+
+import application
+from migrations import load_migration
+from tests.conftest import (
+    DB_NAME,
+    NORTE,
+    SUR,
+    create_date,
+    post_json,
+    register_and_login,
+)
+
+
+def test_create_stores_native_slot(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    create_date(api_client, headers, "25/12/2025 14:00:00", NORTE)
+
+    doc = application.get_client()[DB_NAME]["citas"].find_one({})
+    assert doc["slot_start"] == datetime(2025, 12, 25, 14)
+    assert doc["slot_epoch"] == 1766671200
+
+
+def test_get_by_day_week_and_range(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    create_date(api_client, headers, "22/12/2025 09:00:00", NORTE)
+    create_date(api_client, headers, "25/12/2025 14:00:00", NORTE)
+    create_date(api_client, headers, "25/12/2025 16:00:00", SUR)
+    create_date(api_client, headers, "29/12/2025 10:00:00", NORTE)
+
+    r = post_json(api_client, headers, "/date/getByDay", {"day": "25/12/2025"})
+    assert r.status_code == 200
+    assert [d["date"] for d in r.get_json()] == ["25/12/2025 14:00:00", "25/12/2025 16:00:00"]
+
+    r = post_json(api_client, headers, "/date/getByDay", {"day": "25/12/2025", "center": SUR})
+    assert [d["date"] for d in r.get_json()] == ["25/12/2025 16:00:00"]
+
+    r = post_json(api_client, headers, "/date/getByWeek", {"day": "24/12/2025"})
+    assert r.status_code == 200
+    assert len(r.get_json()) == 3
+
+    r = post_json(
+        api_client,
+        headers,
+        "/date/getByRange",
+        {"start": "25/12/2025 15:00:00", "end": "29/12/2025 11:00:00"},
+    )
+    assert r.status_code == 200
+    assert [d["date"] for d in r.get_json()] == ["25/12/2025 16:00:00", "29/12/2025 10:00:00"]
+
+
+def test_get_by_day_rejects_bad_input(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert post_json(api_client, headers, "/date/getByDay", {"day": 32}).status_code == 400
+    assert post_json(api_client, headers, "/date/getByDay", {"day": "2025-12-25"}).status_code == 400
+    r = post_json(
+        api_client,
+        headers,
+        "/date/getByRange",
+        {"start": "25/12/2025 15:00:00", "end": "25/12/2025 15:00:00"},
+    )
+    assert r.status_code == 400
+
+
+def test_legacy_slot_fields():
+    migration = load_migration("002_backfill_slot_start.py")
+
+    assert migration.legacy_slot_fields({"day": "02/03/2025", "hour": "17"}) == {
+        "slot_start": datetime(2025, 3, 2, 17),
+        "slot_epoch": 1740934800,
+    }
+    assert migration.legacy_slot_fields({"day": "no es fecha", "hour": "xx"}) is None
+
+
+def test_backfill_migration_sets_slot_fields(monkeypatch):
+    migration = load_migration("002_backfill_slot_start.py")
+    db = mongomock.MongoClient()[DB_NAME]
+
+    def bulk_update(operations, ordered=True):
+        # mongomock no admite UpdateOne en bulk_write con este pymongo
+        modified = sum(
+            db["citas"].update_one(op._filter, op._doc).modified_count for op in operations
+        )
+        return SimpleNamespace(modified_count=modified)
+
+    monkeypatch.setattr(db["citas"], "bulk_write", bulk_update)
+    db["citas"].insert_many(
+        [
+            {"username": "a", "day": "01/03/2025", "hour": "09", "center": NORTE},
+            {"username": "b", "day": "02/03/2025", "hour": "17", "center": NORTE},
+            {"username": "c", "day": "no es fecha", "hour": "xx", "center": NORTE},
+        ]
+    )
+
+    assert migration.backfill_slot_start(db, batch_size=2) == 2
+    doc = db["citas"].find_one({"username": "b"})
+    assert doc["slot_start"] == datetime(2025, 3, 2, 17)
+    assert migration.backfill_slot_start(db, batch_size=2) == 0
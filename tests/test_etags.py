@@ -0,0 +1,109 @@
+import application
+from centers_cache import bump_centers_version
+from tests.conftest import create_date, register_and_login
+
+
+def test_read_endpoints_answer_304_for_current_etag(client):
+    token = register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    for url in ("/centers", "/profile", "/date/getByUser"):
+        r = client.get(url, headers=headers)
+        assert r.status_code == 200
+        etag = r.headers["ETag"]
+
+        r = client.get(url, headers={**headers, "If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.data == b""
+        assert r.headers["ETag"] == etag
+
+
+def test_user_etag_changes_after_booking(client):
+    token = register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r = client.get("/date/getByUser", headers=headers)
+    etag = r.headers["ETag"]
+
+    create_date(client, headers, "25/12/2025 14:00:00")
+
+    r = client.get("/date/getByUser", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert len(r.get_json()) == 1
+    assert r.headers["ETag"] != etag
+
+    # Otra representación (paginada) tiene su propia etiqueta
+    r_page = client.get("/date/getByUser?limit=5", headers=headers)
+    assert r_page.headers["ETag"] != r.headers["ETag"]
+
+
+def test_if_modified_since(client):
+    token = register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Last-Modified sale del contador de versión de los centros
+    bump_centers_version(application.get_db())
+    application.centers_snapshot.invalidate()
+
+    r = client.get("/centers", headers=headers)
+    last_modified = r.headers["Last-Modified"]
+
+    r = client.get("/centers", headers={**headers, "If-Modified-Since": last_modified})
+    assert r.status_code == 304
+
+    r = client.get(
+        "/centers",
+        headers={**headers, "If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"},
+    )
+    assert r.status_code == 200
+
+
+def test_user_data_is_revalidated_by_etag_only(client):
+    token = register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r = client.get("/date/getByUser", headers=headers)
+    assert "Last-Modified" not in r.headers
+
+    # Reserva en el mismo segundo: con If-Modified-Since daría un 304 viejo
+    create_date(client, headers, "25/12/2025 14:00:00")
+    r = client.get(
+        "/date/getByUser",
+        headers={**headers, "If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"},
+    )
+    assert r.status_code == 200
+    assert len(r.get_json()) == 1
+
+
+def test_user_etag_is_per_user(client):
+    alice = {"Authorization": f"Bearer {register_and_login(client, 'alice')}"}
+    bob = {"Authorization": f"Bearer {register_and_login(client, 'bob')}"}
+
+    for url in ("/profile", "/date/getByUser"):
+        r = client.get(url, headers=alice)
+        assert r.headers["Cache-Control"] == "private"
+        assert "Authorization" in r.headers["Vary"]
+
+        # Misma versión (1) para los dos, pero la ETag de Alice no vale para Bob
+        r = client.get(url, headers={**bob, "If-None-Match": r.headers["ETag"]})
+        assert r.status_code == 200
+        assert r.headers["Cache-Control"] == "private"
+
+        r = client.get(url, headers={**bob, "If-None-Match": r.headers["ETag"]})
+        assert r.status_code == 304
+        assert "Authorization" in r.headers["Vary"]
+
+
+def test_centers_etag_follows_snapshot_reload(client):
+    headers = {"Authorization": f"Bearer {register_and_login(client)}"}
+    r = client.get("/centers", headers=headers)
+    etag = r.headers["ETag"]
+
+    # Cambio sin tocar el contador de versión (TTL o change stream)
+    application.get_db()["centros"].insert_one({"name": "Centro Nuevo", "address": "Calle Nueva, 1"})
+    application.centers_snapshot.invalidate()
+
+    r = client.get("/centers", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert len(r.get_json()) == 3
+    assert r.headers["ETag"] != etag
@@ -0,0 +1,75 @@
+# tests/test_fields.py
+import json
+
+import pytest
+
+from services import DATE_FIELDS, DATE_PROJECTION, InvalidRequest, parse_fields
+from tests.conftest import NORTE, create_date, register_and_login
+
+
+def test_parse_fields_builds_projection():
+    assert parse_fields({}, DATE_FIELDS, DATE_PROJECTION) is DATE_PROJECTION
+    assert parse_fields({"fields": "center, date"}, DATE_FIELDS, DATE_PROJECTION) == {
+        "_id": 0,
+        "center": 1,
+        "day": 1,
+        "hour": 1,
+    }
+    for value in ("", "center,slot_start", "password"):
+        with pytest.raises(InvalidRequest):
+            parse_fields({"fields": value}, DATE_FIELDS, DATE_PROJECTION)
+
+
+def test_profile_fields(api_client):
+    headers = {"Authorization": f"Bearer {register_and_login(api_client)}"}
+
+    r = api_client.get("/profile?fields=username,date", headers=headers)
+    assert r.status_code == 200
+    assert r.get_json() == {"username": "user_dates", "date": "02/02/2000"}
+
+    # password no está en la lista blanca
+    r = api_client.get("/profile?fields=username,password", headers=headers)
+    assert r.status_code == 400
+    assert r.get_json()["msg"] == "Invalid fields"
+
+
+def test_listing_fields(api_client):
+    headers = {"Authorization": f"Bearer {register_and_login(api_client)}"}
+    for date in ["02/01/2026 10:00:00", "02/01/2026 11:00:00", "03/01/2026 09:00:00"]:
+        create_date(api_client, headers, date)
+
+    r = api_client.get("/date/getByUser?fields=date", headers=headers)
+    assert r.get_json() == [
+        {"date": "02/01/2026 10:00:00"},
+        {"date": "02/01/2026 11:00:00"},
+        {"date": "03/01/2026 09:00:00"},
+    ]
+
+    r = api_client.post(
+        "/date/getByDay?fields=center",
+        data=json.dumps({"day": "02/01/2026"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert r.get_json() == [{"center": NORTE}, {"center": NORTE}]
+
+    r = api_client.get("/dates?fields=date&stream=1", headers={**headers, "Accept": "application/x-ndjson"})
+    assert [json.loads(line) for line in r.get_data(as_text=True).splitlines()][0] == {
+        "date": "02/01/2026 10:00:00"
+    }
+
+    r = api_client.get("/dates?fields=username,cancel", headers=headers)
+    assert r.status_code == 400
+
+
+def test_paginated_fields_keep_cursor(api_client):
+    headers = {"Authorization": f"Bearer {register_and_login(api_client)}"}
+    for date in ["02/01/2026 10:00:00", "02/01/2026 11:00:00", "03/01/2026 09:00:00"]:
+        create_date(api_client, headers, date)
+
+    r = api_client.get("/dates?limit=2&fields=date", headers=headers)
+    page = r.get_json()
+    assert page["items"] == [{"date": "02/01/2026 10:00:00"}, {"date": "02/01/2026 11:00:00"}]
+
+    r = api_client.get(f"/dates?limit=2&fields=date&after={page['next_cursor']}", headers=headers)
+    assert r.get_json() == {"items": [{"date": "03/01/2026 09:00:00"}], "next_cursor": None}
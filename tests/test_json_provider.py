@@ -0,0 +1,52 @@
+# tests/test_json_provider.py
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+import application
+from json_provider import OrjsonProvider, StdlibProvider
+from tests.conftest import NORTE, register_and_login
+
+
+@pytest.mark.parametrize("provider_class", [OrjsonProvider, StdlibProvider])
+def test_mongo_types_are_encoded(provider_class):
+    if provider_class is OrjsonProvider:
+        pytest.importorskip("orjson")
+    provider = provider_class(application.app)
+    oid = ObjectId()
+    doc = {"_id": oid, "slot_start": datetime(2026, 1, 2, 10), "center": "Centro Médico Madrid Sur"}
+
+    encoded = provider.dumps_bytes(doc)
+    assert json.loads(encoded) == {
+        "_id": str(oid),
+        "slot_start": "2026-01-02T10:00:00",
+        "center": "Centro Médico Madrid Sur",
+    }
+    assert provider.loads(encoded)["_id"] == str(oid)
+
+    with pytest.raises(TypeError):
+        provider.dumps({"x": object()})
+
+
+def test_app_uses_configured_provider(restore_process):
+    pytest.importorskip("orjson")
+    assert isinstance(application.app.json, OrjsonProvider)
+    assert isinstance(application.create_app({"JSON_PROVIDER": "stdlib"}).json, StdlibProvider)
+
+
+def test_responses_match_between_providers(client, monkeypatch):
+    headers = {"Authorization": f"Bearer {register_and_login(client)}"}
+    r = client.post("/date/create", json={"center": NORTE, "date": "02/01/2026 10:00:00"}, headers=headers)
+    assert r.status_code == 200
+
+    urls = ["/profile", "/date/getByUser", "/dates?limit=10", "/date/getByUser?stream=1"]
+    fast = [client.get(url, headers=headers) for url in urls]
+
+    monkeypatch.setattr(application.app, "json", StdlibProvider(application.app))
+    slow = [client.get(url, headers=headers) for url in urls]
+
+    for a, b in zip(fast, slow):
+        assert a.status_code == b.status_code == 200
+        assert json.loads(a.data) == json.loads(b.data)
@@ -0,0 +1,96 @@
+# tests/test_metrics.py
+from types import SimpleNamespace
+
+from metrics import (
+    HTTP_IN_FLIGHT,
+    HTTP_REQUESTS,
+    MONGO_COMMANDS,
+    MONGO_LATENCY,
+    POOL_FAILURES,
+    POOL_WAIT,
+    CommandMetrics,
+    Histogram,
+    PoolMetrics,
+)
+from tests.conftest import register_and_login
+
+
+def test_requests_are_counted_per_route(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    before = HTTP_REQUESTS.value("/centers", "GET", "200")
+    missing = HTTP_REQUESTS.value("<unmatched>", "GET", "404")
+
+    assert api_client.get("/centers", headers=headers).status_code == 200
+    assert api_client.get("/centers", headers=headers).status_code == 200
+    assert api_client.get("/no-existe").status_code == 404
+
+    assert HTTP_REQUESTS.value("/centers", "GET", "200") == before + 2
+    assert HTTP_REQUESTS.value("<unmatched>", "GET", "404") == missing + 1
+    assert HTTP_IN_FLIGHT.value() == 0
+
+    r = api_client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["Content-Type"].startswith("text/plain")
+    body = r.get_data(as_text=True)
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_requests_total{endpoint="/centers",method="GET",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{endpoint="/centers",method="GET",le="+Inf"}' in body
+
+
+def test_command_listener_times_by_collection():
+    listener = CommandMetrics()
+    before = MONGO_COMMANDS.value("citas", "find", "success")
+    observed = MONGO_LATENCY.count("citas", "find")
+
+    listener.started(
+        SimpleNamespace(
+            command={"find": "citas", "filter": {}}, command_name="find", request_id=1, connection_id=("h", 1)
+        )
+    )
+    listener.succeeded(
+        SimpleNamespace(command_name="find", request_id=1, connection_id=("h", 1), duration_micros=1500)
+    )
+    listener.started(
+        SimpleNamespace(
+            command={"getMore": 123, "collection": "citas"},
+            command_name="getMore",
+            request_id=2,
+            connection_id=("h", 1),
+        )
+    )
+    listener.failed(
+        SimpleNamespace(command_name="getMore", request_id=2, connection_id=("h", 1), duration_micros=10)
+    )
+
+    assert MONGO_COMMANDS.value("citas", "find", "success") == before + 1
+    assert MONGO_COMMANDS.value("citas", "getMore", "failure") >= 1
+    assert MONGO_LATENCY.count("citas", "find") == observed + 1
+
+
+def test_pool_listener_records_checkout_wait():
+    listener = PoolMetrics()
+    observed = POOL_WAIT.count("db:27017")
+
+    listener.connection_checked_out(SimpleNamespace(address=("db", 27017), duration=0.02))
+    listener.connection_check_out_failed(
+        SimpleNamespace(address=("db", 27017), duration=1.0, reason="timeout")
+    )
+
+    assert POOL_WAIT.count("db:27017") == observed + 2
+    assert POOL_FAILURES.value("db:27017", "timeout") >= 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("prueba_seconds", "Prueba.", ("ruta",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    assert histogram.samples() == [
+        'prueba_seconds_bucket{ruta="/a",le="0.1"} 1',
+        'prueba_seconds_bucket{ruta="/a",le="1.0"} 2',
+        'prueba_seconds_bucket{ruta="/a",le="+Inf"} 3',
+        'prueba_seconds_sum{ruta="/a"} 5.55',
+        'prueba_seconds_count{ruta="/a"} 3',
+    ]
@@ -0,0 +1,63 @@
+# tests/test_migracion.py
+import json
+
+import mongomock
+import pytest
+
+import application
+from tests.conftest import register_and_login
+
+
+@pytest.fixture
+def empty_client(restore_process):
+    """App Flask sobre un servidor Mongo vacío, sin índices ni colecciones."""
+    application.app.config["TESTING"] = True
+    application.password_hasher.rounds = 4
+    application.rate_limiter.reset()
+    application.resources().client = mongomock.MongoClient()
+    application.centers_snapshot.change_stream = False
+    application.centers_snapshot.invalidate()
+
+    with application.app.test_client() as client:
+        yield client
+
+
+def test_migracion_creates_indexes_and_blocks_double_booking(empty_client):
+    r = empty_client.get("/migracion")
+    assert r.get_json()["msg"] == "Database and collections created"
+
+    indexes = application.get_db()["citas"].index_information()
+    assert indexes["unique_date_per_center"]["unique"]
+    assert "slot_start_id" in indexes
+
+    body = json.dumps({"center": "Centro de Salud Madrid Norte", "date": "02/01/2026 10:00:00"})
+    statuses = []
+    for username in ("ana", "bea"):
+        token = register_and_login(empty_client, username)
+        r = empty_client.post(
+            "/date/create",
+            data=body,
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        statuses.append(r.status_code)
+    assert statuses == [200, 400]
+    assert application.get_db()["citas"].count_documents({}) == 1
+
+
+def test_migracion_adds_missing_indexes_to_existing_db(empty_client):
+    citas = application.get_db()["citas"]
+    citas.insert_one({"day": "02/01/2026"})
+    # Índice de una versión anterior, sin _id para desempatar
+    citas.create_index([("center", 1), ("slot_start", 1)], name="center_slot_start")
+    citas.create_index([("slot_start", 1)], name="slot_start")
+
+    r = empty_client.get("/migracion")
+    assert r.get_json()["msg"] == "Database already exists"
+    indexes = citas.index_information()
+    assert "unique_date_per_center" in indexes
+    assert indexes["center_slot_start_id"]["key"] == [("center", 1), ("slot_start", 1), ("_id", 1)]
+    assert "center_slot_start" not in indexes
+    # Prefijo de slot_start_id: redundante
+    assert "slot_start" not in indexes
+    assert "slot_start_id" in indexes
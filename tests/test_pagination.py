@@ -0,0 +1,45 @@
+from tests.conftest import create_date, register_and_login
+
+
+def test_keyset_pagination_walks_all_dates(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    # Se crean desordenadas para comprobar que la página sigue slot_start
+    for day in (5, 1, 4, 2, 3):
+        create_date(api_client, headers, f"0{day}/01/2026 10:00:00")
+
+    for url in ("/dates", "/date/getByUser"):
+        seen = []
+        after = ""
+        while True:
+            r = api_client.get(f"{url}?limit=2&after={after}", headers=headers)
+            assert r.status_code == 200
+            page = r.get_json()
+            assert len(page["items"]) <= 2
+            seen.extend(d["date"] for d in page["items"])
+            if page["next_cursor"] is None:
+                break
+            after = page["next_cursor"]
+
+        assert seen == [f"0{day}/01/2026 10:00:00" for day in range(1, 6)]
+
+
+def test_pagination_rejects_bad_parameters(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert api_client.get("/dates?limit=0", headers=headers).status_code == 400
+    assert api_client.get("/dates?limit=abc", headers=headers).status_code == 400
+    assert api_client.get("/dates?limit=1000", headers=headers).status_code == 400
+    r = api_client.get("/dates?limit=2&after=no-es-un-cursor", headers=headers)
+    assert r.status_code == 400
+    assert r.get_json()["msg"] == "Invalid cursor"
+
+
+def test_listing_without_limit_keeps_plain_list(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    create_date(api_client, headers, "01/01/2026 10:00:00")
+
+    r = api_client.get("/dates", headers=headers)
+    assert isinstance(r.get_json(), list)
@@ -0,0 +1,66 @@
+import json
+import threading
+
+import application
+from passwords import PasswordHasher
+from tests.conftest import DB_NAME
+from tests.conftest import register_and_login
+
+
+def _login(client):
+    return client.post(
+        "/login",
+        data=json.dumps({"username": "user_dates", "password": "password_dates"}),
+        content_type="application/json",
+    )
+
+
+def test_login_rehashes_when_cost_changes(client, monkeypatch):
+    register_and_login(client)
+    users = application.get_client()[DB_NAME]["usuarios"]
+    assert users.find_one({"username": "user_dates"})["password"].startswith("$2b$04$")
+
+    monkeypatch.setattr(application.password_hasher, "rounds", 5)
+    assert _login(client).status_code == 200
+    assert users.find_one({"username": "user_dates"})["password"].startswith("$2b$05$")
+
+    # El hash actualizado sigue siendo válido
+    assert _login(client).status_code == 200
+
+
+def test_needs_rehash():
+    hasher = PasswordHasher(rounds=4)
+    hashed = hasher.hash("secreto")
+
+    assert hasher.check("secreto", hashed)
+    assert not hasher.check("otro", hashed)
+    assert not hasher.needs_rehash(hashed)
+    hasher.rounds = 6
+    assert hasher.needs_rehash(hashed)
+    assert hasher.needs_rehash("no-es-un-hash")
+
+
+def test_login_returns_503_when_pool_is_saturated(client, monkeypatch):
+    register_and_login(client)
+    busy = PasswordHasher(rounds=4, pool_size=1, queue_size=0, queue_timeout=0.01)
+    monkeypatch.setattr(application, "password_hasher", busy)
+
+    # Se ocupa el único hueco del pool con un trabajo que no termina
+    started = threading.Event()
+    release = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    occupier = threading.Thread(target=busy._run, args=(block,))
+    occupier.start()
+    started.wait()
+    try:
+        r = _login(client)
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "1"
+    finally:
+        release.set()
+        occupier.join()
+        busy.shutdown()
@@ -0,0 +1,104 @@
+# tests/test_patients_import.py
+import json
+
+import mongomock
+import pytest
+
+import application
+from patients_import import import_patients, save_checkpoint
+
+
+def _patient(i, **overrides):
+    return {
+        "username": f"paciente{i}",
+        "password": f"clave{i}",
+        "name": "Nombre",
+        "lastname": "Apellido",
+        "email": f"p{i}@example.com",
+        "phone": "600000000",
+        "date": "01/02/1990",
+        **overrides,
+    }
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient()["Clinica"]
+    db["usuarios"].create_index("username", unique=True)
+    return db
+
+
+def _write_ndjson(path, records):
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n", encoding="utf-8")
+
+
+def test_import_ndjson_validates_and_skips_duplicates(db, tmp_path):
+    db["usuarios"].insert_one({"username": "paciente2"})
+    records = [_patient(i) for i in range(5)]
+    records[3]["date"] = "1990-02-01"
+    source = tmp_path / "pacientes.ndjson"
+    _write_ndjson(source, records)
+
+    messages = []
+    stats = import_patients(db, str(source), batch_size=2, workers=2, rounds=4, report=messages.append)
+
+    assert stats == {"read": 5, "inserted": 3, "duplicates": 1, "invalid": 1}
+    assert "Registro 4 rechazado: Invalid date format" in messages
+    assert not (tmp_path / "pacientes.ndjson.progress").exists()
+
+    user = db["usuarios"].find_one({"username": "paciente0"})
+    assert application.password_hasher.check("clave0", user["password"])
+    assert user["date"] == "01/02/1990"
+
+
+def test_import_csv(db, tmp_path):
+    source = tmp_path / "pacientes.csv"
+    source.write_text(
+        "username,password,name,lastname,email,phone,date\n"
+        "ana,secreto,Ana,,ana@example.com,,03/04/1985\n"
+        ",secreto,Sin,Usuario,,,03/04/1985\n",
+        encoding="utf-8",
+    )
+
+    stats = import_patients(db, str(source), workers=1, rounds=4, report=lambda msg: None)
+
+    assert stats["inserted"] == 1
+    assert stats["invalid"] == 1
+    user = db["usuarios"].find_one({"username": "ana"}, {"_id": 0, "password": 0})
+    assert user == {
+        "username": "ana",
+        "name": "Ana",
+        "lastname": None,
+        "email": "ana@example.com",
+        "phone": None,
+        "date": "03/04/1985",
+    }
+
+
+def test_import_resumes_from_checkpoint(db, tmp_path):
+    source = tmp_path / "pacientes.ndjson"
+    _write_ndjson(source, [_patient(i) for i in range(4)])
+    # Simula una importación interrumpida tras los dos primeros registros
+    save_checkpoint(str(source) + ".progress", 2)
+
+    stats = import_patients(db, str(source), workers=1, rounds=4, report=lambda msg: None)
+
+    assert stats["read"] == 4
+    assert stats["inserted"] == 2
+    assert sorted(u["username"] for u in db["usuarios"].find()) == ["paciente2", "paciente3"]
+
+
+def test_malformed_ndjson_line_is_rejected_and_resumable(db, tmp_path):
+    source = tmp_path / "pacientes.ndjson"
+    lines = [json.dumps(_patient(i)) for i in range(4)]
+    lines[2] = '{"username": "roto",'
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    # Interrumpida justo antes de la línea rota
+    save_checkpoint(str(source) + ".progress", 2)
+
+    messages = []
+    stats = import_patients(db, str(source), batch_size=1, workers=1, rounds=4, report=messages.append)
+
+    assert stats == {"read": 4, "inserted": 1, "duplicates": 0, "invalid": 1}
+    assert "Registro 3 rechazado: Invalid JSON" in messages
+    assert [u["username"] for u in db["usuarios"].find()] == ["paciente3"]
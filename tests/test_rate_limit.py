@@ -0,0 +1,129 @@
+# tests/test_rate_limit.py
+import json
+
+import mongomock
+import pytest
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+import application
+from rate_limit import Limit, MemoryBuckets, MongoBuckets, client_ip, parse_limits
+from migrations import load_migration
+from tests.conftest import register_and_login
+
+
+def test_parse_limits():
+    assert parse_limits("ip:30/minute, username:10/hour:3") == [
+        Limit("ip", 2.0, 30),
+        Limit("username", 360.0, 3),
+    ]
+    assert parse_limits("") == []
+    with pytest.raises(ValueError):
+        parse_limits("cookie:1/minute")
+
+
+@pytest.mark.parametrize("backend", ["memory", "mongo"])
+def test_token_bucket(backend):
+    if backend == "memory":
+        store = MemoryBuckets(stripes=4)
+    else:
+        db = mongomock.MongoClient()["Clinica"]
+        load_migration("005_rate_limits.py").ensure_rate_limit_indexes(db)
+        store = MongoBuckets(lambda: db)
+
+    # Ráfaga de 3 y un token cada 10 s. Instantes en el futuro para que el
+    # TTL de rate_limits no caduque las cubetas durante el test
+    t = 2_000_000_000
+    assert [store.take("k", 10, 3, now=t) for _ in range(3)] == [0, 0, 0]
+    assert store.take("k", 10, 3, now=t) == 10
+    assert store.take("k", 10, 3, now=t + 4) == 6
+    assert store.take("otra", 10, 3, now=t + 4) == 0
+    assert store.take("k", 10, 3, now=t + 10) == 0
+    assert store.take("k", 10, 3, now=t + 10) == 10
+    # Tras rellenarse del todo vuelve a admitir la ráfaga completa
+    assert [store.take("k", 10, 3, now=t + 1000) for _ in range(3)] == [0, 0, 0]
+
+
+def test_login_limited_per_username(api_client, monkeypatch):
+    register_and_login(api_client)
+    monkeypatch.setitem(
+        application.app.config["RATE_LIMITS"], "login", parse_limits("username:2/minute")
+    )
+    application.rate_limiter.reset()
+
+    def login(username):
+        return api_client.post(
+            "/login",
+            data=json.dumps({"username": username, "password": "password_dates"}),
+            content_type="application/json",
+        )
+
+    assert login("user_dates").status_code == 200
+    assert login("user_dates").status_code == 200
+    r = login("user_dates")
+    assert r.status_code == 429
+    assert r.get_json() == {"msg": "Too many requests"}
+    assert r.headers["Retry-After"] == "30"
+
+    # Otro usuario tiene su propia cubeta
+    assert login("otro").status_code == 401
+
+
+def test_register_limited_per_ip(api_client, monkeypatch):
+    monkeypatch.setitem(application.app.config["RATE_LIMITS"], "register", parse_limits("ip:1/hour"))
+
+    def register(username):
+        body = {"username": username, "password": "x", "date": "01/01/2000"}
+        return api_client.post("/register", data=json.dumps(body), content_type="application/json")
+
+    assert register("uno").status_code == 200
+    assert register("dos").status_code == 429
+
+    monkeypatch.setitem(application.app.config, "RATE_LIMIT_ENABLED", False)
+    assert register("tres").status_code == 200
+
+
+def test_client_ip_behind_proxies():
+    assert client_ip("10.0.0.1", None, 1) == "10.0.0.1"
+    assert client_ip("10.0.0.1", "1.2.3.4", 0) == "10.0.0.1"
+    assert client_ip("10.0.0.1", "9.9.9.9, 1.2.3.4", 1) == "1.2.3.4"
+    assert client_ip("10.0.0.1", "9.9.9.9, 1.2.3.4", 2) == "9.9.9.9"
+    # Menos saltos de los esperados: la cabecera no es de fiar
+    assert client_ip("10.0.0.1", "1.2.3.4", 2) == "10.0.0.1"
+
+    assert isinstance(application.create_app({"PROXY_COUNT": 1}).wsgi_app, ProxyFix)
+    assert not isinstance(application.create_app().wsgi_app, ProxyFix)
+
+
+def test_register_limited_per_forwarded_ip(api_client, monkeypatch):
+    monkeypatch.setitem(application.app.config, "PROXY_COUNT", 1)
+    monkeypatch.setattr(application.app, "wsgi_app", ProxyFix(application.app.wsgi_app, x_for=1))
+    monkeypatch.setitem(application.app.config["RATE_LIMITS"], "register", parse_limits("ip:1/hour"))
+
+    def register(username, ip):
+        body = {"username": username, "password": "x", "date": "01/01/2000"}
+        return api_client.post(
+            "/register",
+            data=json.dumps(body),
+            content_type="application/json",
+            headers={"X-Forwarded-For": ip},
+        )
+
+    # Mismo proxy, clientes distintos: cada uno con su cubeta
+    assert register("uno", "1.1.1.1").status_code == 200
+    assert register("dos", "2.2.2.2").status_code == 200
+    assert register("tres", "1.1.1.1").status_code == 429
+
+
+def test_mongo_backend_through_the_api(api_client, monkeypatch):
+    db = mongomock.MongoClient()["Clinica"]
+    monkeypatch.setitem(application.app.config, "RATE_LIMIT_BACKEND", "mongo")
+    monkeypatch.setattr(application.rate_limiter, "store", MongoBuckets(lambda: db))
+    monkeypatch.setitem(application.app.config["RATE_LIMITS"], "register", parse_limits("ip:1/hour"))
+
+    def register(username):
+        body = {"username": username, "password": "x", "date": "01/01/2000"}
+        return api_client.post("/register", data=json.dumps(body), content_type="application/json")
+
+    assert register("uno").status_code == 200
+    assert register("dos").status_code == 429
+    assert db["rate_limits"].count_documents({}) == 1
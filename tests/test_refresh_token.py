@@ -0,0 +1,38 @@
+import json
+
+from tests.conftest import register_and_login
+
+
+def _login(api_client):
+    r = api_client.post(
+        "/login",
+        data=json.dumps({"username": "user_dates", "password": "password_dates"}),
+        content_type="application/json",
+    )
+    assert r.status_code == 200
+    return r.get_json()
+
+
+def test_refresh_token_issues_new_access_token(api_client):
+    register_and_login(api_client)
+    tokens = _login(api_client)
+    assert "refresh_token" in tokens
+
+    r = api_client.post("/token/refresh", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert r.status_code == 200
+    access_token = r.get_json()["access_token"]
+
+    r = api_client.get("/profile", headers={"Authorization": f"Bearer {access_token}"})
+    assert r.status_code == 200
+    assert r.get_json()["username"] == "user_dates"
+
+
+def test_refresh_rejects_access_token_and_vice_versa(api_client):
+    register_and_login(api_client)
+    tokens = _login(api_client)
+
+    r = api_client.post("/token/refresh", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert r.status_code == 422
+
+    r = api_client.get("/profile", headers={"Authorization": f"Bearer {tokens['refresh_token']}"})
+    assert r.status_code == 422
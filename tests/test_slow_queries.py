@@ -0,0 +1,115 @@
+# tests/test_slow_queries.py
+import logging
+from types import SimpleNamespace
+
+from slow_queries import SlowQueryLog, filter_shape, plan_summary
+
+
+COLLSCAN_PLAN = {
+    "queryPlanner": {
+        "winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN", "direction": "forward"}}
+    }
+}
+IXSCAN_PLAN = {
+    "queryPlanner": {
+        "winningPlan": {
+            "queryPlan": {
+                "stage": "FETCH",
+                "inputStage": {"stage": "IXSCAN", "indexName": "username_slot_start_id"},
+            }
+        }
+    }
+}
+
+
+class FakeClient:
+    def __init__(self, plan):
+        self.plan = plan
+        self.commands = []
+
+    def __getitem__(self, name):
+        return self
+
+    def command(self, name, command, **kwargs):
+        self.commands.append((name, command, kwargs))
+        return self.plan
+
+
+def _run(log, command, duration_ms, request_id=1):
+    name = next(iter(command))
+    log.started(
+        SimpleNamespace(
+            command=command,
+            command_name=name,
+            database_name="Clinica",
+            request_id=request_id,
+            connection_id=("db", 27017),
+        )
+    )
+    log.succeeded(
+        SimpleNamespace(
+            command_name=name,
+            request_id=request_id,
+            connection_id=("db", 27017),
+            duration_micros=duration_ms * 1000,
+        )
+    )
+
+
+def test_filter_shape_hides_values():
+    query = {
+        "username": "ana",
+        "cancel": {"$ne": 1},
+        "$or": [{"slot_start": {"$gt": 5}}, {"center": "Norte"}],
+        "hour": {"$in": ["09", "10"]},
+    }
+    assert filter_shape(query) == {
+        "username": "?",
+        "cancel": {"$ne": "?"},
+        "$or": [{"slot_start": {"$gt": "?"}}, {"center": "?"}],
+        "hour": {"$in": ["?"]},
+    }
+
+
+def test_plan_summary():
+    assert plan_summary(COLLSCAN_PLAN) == "SORT > COLLSCAN"
+    assert plan_summary(IXSCAN_PLAN) == "FETCH > IXSCAN(username_slot_start_id)"
+
+
+def test_slow_commands_are_logged_and_explained(caplog):
+    client = FakeClient(COLLSCAN_PLAN)
+    log = SlowQueryLog(lambda: client, threshold_ms=50, explain_rate=1.0)
+    caplog.set_level(logging.INFO, logger="slow_queries")
+
+    command = {"find": "citas", "filter": {"username": "ana"}, "$db": "Clinica", "lsid": {}}
+    _run(log, command, duration_ms=10)
+    assert caplog.records == []
+
+    _run(log, command, duration_ms=120, request_id=2)
+    log._executor.shutdown(wait=True)
+
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages[0] == "Consulta lenta: citas.find 120.0 ms filtro={'username': '?'}"
+    assert messages[1] == "Plan de citas.find: SORT > COLLSCAN"
+    assert caplog.records[1].levelno == logging.WARNING
+
+    # El explain se lanza sin los campos de sesión ni $db
+    name, explained, kwargs = client.commands[0]
+    assert name == "explain"
+    assert explained == {"find": "citas", "filter": {"username": "ana"}}
+    assert kwargs == {"verbosity": "queryPlanner"}
+
+
+def test_no_explain_without_sample(caplog):
+    client = FakeClient(IXSCAN_PLAN)
+    log = SlowQueryLog(lambda: client, threshold_ms=50, explain_rate=0.0)
+    caplog.set_level(logging.INFO, logger="slow_queries")
+
+    _run(log, {"getMore": 1, "collection": "citas"}, duration_ms=80)
+    _run(log, {"count": "usuarios", "query": {}}, duration_ms=80, request_id=2)
+
+    assert [r.getMessage() for r in caplog.records] == [
+        "Consulta lenta: citas.getMore 80.0 ms filtro=None",
+        "Consulta lenta: usuarios.count 80.0 ms filtro={}",
+    ]
+    assert client.commands == []
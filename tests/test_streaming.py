@@ -0,0 +1,67 @@
+import json
+
+from tests.conftest import create_date, register_and_login
+
+
+def _create_dates(client, headers):
+    for day in (3, 1, 2):
+        create_date(client, headers, f"0{day}/01/2026 10:00:00")
+
+
+def test_stream_json_array_matches_plain_listing(client):
+    token = register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+    _create_dates(client, headers)
+
+    for url in ("/dates", "/date/getByUser"):
+        plain = client.get(url, headers=headers).get_json()
+        r = client.get(f"{url}?stream=1&batch_size=2", headers=headers)
+        assert r.status_code == 200
+        assert r.is_streamed
+        assert json.loads(r.get_data(as_text=True)) == plain
+
+    r = client.post(
+        "/date/getByDay?stream=1",
+        data=json.dumps({"day": "02/01/2026"}),
+        content_type="application/json",
+        headers=headers,
+    )
+    assert [d["date"] for d in json.loads(r.get_data(as_text=True))] == ["02/01/2026 10:00:00"]
+
+
+def test_stream_ndjson(client):
+    token = register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}", "Accept": "application/x-ndjson"}
+    _create_dates(client, headers)
+
+    r = client.get("/dates", headers=headers)
+    assert r.status_code == 200
+    assert r.mimetype == "application/x-ndjson"
+    lines = r.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["date"] for line in lines] == [
+        "01/01/2026 10:00:00",
+        "02/01/2026 10:00:00",
+        "03/01/2026 10:00:00",
+    ]
+
+
+def test_stream_rejects_bad_batch_size(client):
+    token = register_and_login(client)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert client.get("/dates?stream=1&batch_size=0", headers=headers).status_code == 400
+    assert client.get("/dates?stream=1&batch_size=x", headers=headers).status_code == 400
+
+
+def test_ndjson_negotiated_by_quality(api_client):
+    token = register_and_login(api_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    create_date(api_client, headers, "01/01/2026 10:00:00")
+
+    # Mismo resultado en la app WSGI y en la ASGI
+    r = api_client.get("/dates", headers={**headers, "Accept": "application/json, application/x-ndjson;q=0.5"})
+    assert r.mimetype == "application/json"
+    assert len(r.get_json()) == 1
+
+    r = api_client.get("/dates", headers={**headers, "Accept": "application/json;q=0.5, application/x-ndjson"})
+    assert r.mimetype == "application/x-ndjson"
@@ -0,0 +1,99 @@
+# tests/test_synthetic_data.py
+from datetime import datetime
+
+import mongomock
+import pytest
+
+import application
+from synthetic_data import HOUR_WEIGHTS, center_quotas, check_capacity, default_centers, generate
+
+
+START = datetime(2030, 1, 7)
+
+
+def _generate(seed=1):
+    db = mongomock.MongoClient()["Clinica"]
+    written = generate(
+        lambda: db,
+        users=40,
+        centers=5,
+        dates=600,
+        days=20,
+        start=START,
+        cancel_rate=0.2,
+        batch_size=100,
+        seed=seed,
+        password_hash="hash",
+        report=lambda msg: None,
+    )
+    return db, written
+
+
+def test_generates_requested_volumes_with_unique_slots():
+    db, written = _generate()
+
+    assert written == 600
+    assert db["citas"].count_documents({}) == 600
+    assert db["usuarios"].count_documents({}) == 40
+    assert db["centros"].count_documents({}) == 5
+
+    keys = {(d["day"], d["hour"], d["center"]) for d in db["citas"].find()}
+    assert len(keys) == 600
+
+    cancelled = db["citas"].count_documents({"cancel": 1})
+    assert 60 < cancelled < 180
+
+    # Los más populares reciben más citas
+    per_center = [db["citas"].count_documents({"center": f"Centro sint {i}"}) for i in range(1, 6)]
+    assert per_center == sorted(per_center, reverse=True)
+
+    hours = [d["slot_start"].hour for d in db["citas"].find()]
+    assert set(hours) <= set(HOUR_WEIGHTS)
+    assert hours.count(10) > hours.count(20)
+
+
+def test_occupancy_matches_live_dates():
+    db, _ = _generate()
+    live = {(d["center"], d["day"], int(d["hour"])) for d in db["citas"].find({"cancel": {"$ne": 1}})}
+    occupied = {
+        (o["center"], o["day"].strftime("%d/%m/%Y"), hour)
+        for o in db["ocupacion"].find()
+        for hour in o["hours"]
+    }
+    assert occupied == live
+
+
+def test_same_seed_same_data():
+    def snapshot(db):
+        return sorted((d["day"], d["hour"], d["center"], d["username"]) for d in db["citas"].find())
+
+    assert snapshot(_generate(seed=3)[0]) == snapshot(_generate(seed=3)[0])
+    assert snapshot(_generate(seed=3)[0]) != snapshot(_generate(seed=4)[0])
+
+
+def test_center_quotas_respect_capacity():
+    quotas = center_quotas(25, [10, 1, 1], capacity=10)
+    assert quotas[0] == 10
+    assert sum(quotas) == 25
+    assert max(quotas) <= 10
+
+    with pytest.raises(ValueError):
+        center_quotas(31, [1, 1, 1], capacity=10)
+
+
+def test_default_centers_fit_requested_volume():
+    for dates, days in [(1000000, 365), (600, 20), (1, 1)]:
+        check_capacity(dates, default_centers(dates, days), days)
+
+    db = mongomock.MongoClient()["Clinica"]
+    with pytest.raises(ValueError):
+        generate(lambda: db, users=5, centers=1, dates=100, days=1, report=lambda msg: None)
+    # Se comprueba antes de escribir nada
+    assert db.list_collection_names() == []
+
+
+def test_cli_reports_capacity_as_usage_error():
+    runner = application.app.test_cli_runner()
+    result = runner.invoke(args=["generate-data", "--centers", "1", "--days", "1", "--dates", "100"])
+    assert result.exit_code == 2
+    assert "No caben 100 citas" in result.output
@@ -0,0 +1,52 @@
+"""Contadores de versión por colección o por usuario.
+
+Cada escritura que cambia lo que devuelve un endpoint de lectura incrementa
+un contador en la colección ``versiones`` (``{"_id": clave, "v": n,
+"updated_at": fecha}``). A partir de él se calculan los ETag y
+Last-Modified sin ejecutar la consulta ni serializar la respuesta.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from pymongo.database import Database
+
+
+VERSIONS_COLLECTION = "versiones"
+
+
+def user_key(username: str) -> str:
+    return f"user:{username}"
+
+
+def user_tag(username: str) -> str:
+    """Huella corta del usuario para las ETag (no expone el nombre)."""
+    return hashlib.sha1(username.encode("utf-8")).hexdigest()[:12]
+
+
+def bump_version(db: Database, key: str):
+    """
+    Incrementa la versión de ``key`` y guarda la fecha de la escritura.
+
+    Devuelve el resultado de ``update_one``; con una base de datos del
+    cliente asíncrono es la corrutina que hay que esperar.
+    """
+    return db[VERSIONS_COLLECTION].update_one(
+        {"_id": key},
+        {"$inc": {"v": 1}, "$currentDate": {"updated_at": True}},
+        upsert=True,
+    )
+
+
+def read_version(db: Database, key: str) -> Tuple[int, Optional[datetime]]:
+    """Versión actual de ``key`` (0 si nunca se ha escrito) y su fecha en UTC."""
+    return version_from_doc(db[VERSIONS_COLLECTION].find_one({"_id": key}))
+
+
+def version_from_doc(doc: Optional[dict]) -> Tuple[int, Optional[datetime]]:
+    if not doc:
+        return 0, None
+    updated_at = doc.get("updated_at")
+    if updated_at is not None and updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    return doc["v"], updated_at